@@ -3,17 +3,18 @@ AI-Driven Smart Healthcare Appointment System
 Main Page: Patient Registration & Symptom Analysis
 """
 
+import uuid
 import streamlit as st
 from datetime import date, timedelta
-from database.connection import initialize_pool
+from database.connection import ensure_pool, bind_session, register_error_hook, transaction
 from services.patient_service import create_patient, get_patient_by_phone
 from services.symptom_service import save_symptom
 from services.gemini_service import analyze_symptoms, get_urgency_label, get_urgency_color
 from services.appointment_service import (
-    save_prediction, find_available_doctor, create_appointment,
-    get_all_specializations
+    save_prediction, book_earliest_available, get_all_specializations, BookingConflict
 )
 from services.audit_service import log_action
+from config import BOOKING_HORIZON_DAYS
 
 # Page configuration
 st.set_page_config(
@@ -23,14 +24,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize database connection
-@st.cache_resource
-def init_database():
-    """Initialize database connection pool (cached)"""
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # Custom CSS for better styling
 st.markdown("""
@@ -203,77 +201,89 @@ if submitted:
         status_text = st.empty()
         
         try:
-            # Step 1: Create patient
-            status_text.text("Step 1/5: Saving patient information...")
-            progress_bar.progress(20)
-            
-            patient_id = create_patient(
-                first_name=first_name,
-                last_name=last_name or "",
-                gender=gender,
-                age=age,
-                phone=phone,
-                allergies=allergies or "None"
-            )
-            
-            if not patient_id:
-                st.error("❌ Failed to create patient record. Phone number may already exist.")
-                st.stop()
-            
-            log_action('INSERT', 'patients', patient_id, 'system',
-                       new_values=f'name={first_name} {last_name}, phone={phone}',
-                       description=f'New patient registered: {first_name} {last_name}')
-            
-            # Step 2: Save symptom
-            status_text.text("Step 2/5: Recording symptoms...")
-            progress_bar.progress(40)
+            # A booking that failed earlier keeps its saved patient/symptom: retry only step 3
+            pending = st.session_state.get('pending_booking')
+            if pending and (pending['phone'], pending['symptom_text']) != (phone, symptom_text.strip()):
+                pending = None
+            
+            if pending:
+                diagnosis, patient_id, symptom_id = pending['diagnosis'], pending['patient_id'], pending['symptom_id']
+                status_text.text("Retrying the booking with your saved details...")
+                progress_bar.progress(60)
+            else:
+                # Step 1: AI Analysis (runs before any DB work so no transaction is held open)
+                status_text.text("Step 1/3: Analyzing symptoms with AI... (may take 10-15 seconds)")
+                progress_bar.progress(20)
+                
+                diagnosis = analyze_symptoms(symptom_text)
+                
+                if not diagnosis:
+                    st.error("❌ AI analysis failed")
+                    st.stop()
+                
+                # Step 2 shares one connection and one commit; any failure rolls back all of it.
+                # The booking runs after the commit so it can retry its own lock conflicts.
+                with transaction():
+                    # Step 2: Save patient, symptoms and diagnostic results
+                    status_text.text("Step 2/3: Saving patient information and diagnosis...")
+                    progress_bar.progress(60)
+                    
+                    patient_id = create_patient(
+                        first_name=first_name,
+                        last_name=last_name or "",
+                        gender=gender,
+                        age=age,
+                        phone=phone,
+                        allergies=allergies or "None"
+                    )
+                    
+                    if not patient_id:
+                        st.error("❌ Failed to create patient record. Phone number may already exist.")
+                        st.stop()
+                    
+                    log_action('INSERT', 'patients', patient_id, 'system',
+                               new_values=f'name={first_name} {last_name}, phone={phone}',
+                               description=f'New patient registered: {first_name} {last_name}')
+                    
+                    symptom_id = save_symptom(patient_id, symptom_text.strip())
+                    
+                    if not symptom_id:
+                        st.error("❌ Failed to save symptoms")
+                        st.stop()
+                    
+                    prediction_id = save_prediction(symptom_id, diagnosis)
+                
+                st.session_state.pending_booking = {
+                    'phone': phone, 'symptom_text': symptom_text.strip(), 'diagnosis': diagnosis,
+                    'patient_id': patient_id, 'symptom_id': symptom_id
+                }
             
-            symptom_id = save_symptom(patient_id, symptom_text.strip())
+            # Step 3: Create appointment
+            status_text.text("Step 3/3: Scheduling appointment...")
+            progress_bar.progress(90)
             
-            if not symptom_id:
-                st.error("❌ Failed to save symptoms")
+            # Earliest free slot (requested date first, General Medicine as fallback), claimed atomically
+            try:
+                doctor = book_earliest_available(patient_id, symptom_id, preferred_spec, appointment_date,
+                                                 diagnosis['urgency_level'], mode=consultation_mode)
+            except BookingConflict:
+                st.warning("⚠️ Many bookings are being made right now and we could not secure a slot. "
+                           "Your details are saved - please submit again in a moment.")
                 st.stop()
             
-            # Step 3: AI Analysis
-            status_text.text("Step 3/5: Analyzing symptoms with AI... (may take 10-15 seconds)")
-            progress_bar.progress(60)
-            
-            diagnosis = analyze_symptoms(symptom_text)
-            
-            if not diagnosis:
-                st.error("❌ AI analysis failed")
+            if not doctor:
+                st.error(f"❌ No doctors available within {BOOKING_HORIZON_DAYS} days. "
+                         "Your details are saved - please try another date.")
                 st.stop()
             
-            # Step 4: Save prediction
-            status_text.text("Step 4/5: Saving diagnostic results...")
-            progress_bar.progress(80)
-            
-            prediction_id = save_prediction(symptom_id, diagnosis)
-            
-            # Step 5: Create appointment
-            status_text.text("Step 5/5: Scheduling appointment...")
-            progress_bar.progress(90)
+            st.session_state.pop('pending_booking', None)
             
-            # Find available doctor
-            doctor = find_available_doctor(preferred_spec, appointment_date)
-            
-            if not doctor:
-                st.warning(f"⚠️ No {preferred_spec} available on {appointment_date}. Trying General Medicine...")
-                doctor = find_available_doctor("General Medicine", appointment_date)
-            
-            if not doctor:
-                st.error("❌ No doctors available on selected date. Please try another date.")
-                st.stop()
+            if doctor['specialization'] != preferred_spec:
+                st.warning(f"⚠️ No {preferred_spec} available. Booked with {doctor['specialization']} instead.")
+            if doctor['appointment_date'] != appointment_date:
+                st.info(f"ℹ️ {appointment_date} was fully booked. Earliest available: {doctor['appointment_date']}")
             
-            # Create appointment
-            appointment_id = create_appointment(
-                patient_id=patient_id,
-                doctor_id=doctor['doctor_id'],
-                symptom_id=symptom_id,
-                urgency_level=diagnosis['urgency_level'],
-                appointment_date=appointment_date,
-                mode=consultation_mode
-            )
+            appointment_id = doctor['appointment_id']
             
             log_action('INSERT', 'appointments', appointment_id, 'system',
                        new_values=f'patient_id={patient_id}, doctor={doctor["name"]}, urgency={diagnosis["urgency_level"]}',
@@ -335,14 +345,14 @@ if submitted:
             with col_c:
                 st.markdown(f"""
                 **👨‍⚕️ Assigned Doctor:** Dr. {doctor['name']}  
-                **🏥 Specialization:** {preferred_spec}  
+                **🏥 Specialization:** {doctor['specialization']}  
                 **🎓 Qualification:** {doctor['qualification']}  
                 """)
             
             with col_d:
                 st.markdown(f"""
-                **📅 Date:** {appointment_date.strftime('%B %d, %Y')}  
-                **🕐 Time:** Will be assigned based on urgency  
+                **📅 Date:** {doctor['appointment_date'].strftime('%B %d, %Y')}  
+                **🕐 Time:** {doctor['appointment_time'].strftime('%I:%M %p')}  
                 **💻 Mode:** {consultation_mode}  
                 """)
             
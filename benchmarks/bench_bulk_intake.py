@@ -0,0 +1,106 @@
+"""
+Benchmark: mass intake, one-at-a-time pipeline vs bulk_intake()
+Run from the project root:  python -m benchmarks.bench_bulk_intake --rows 1000 --sample 100
+The per-row path (create_patient, save_symptom, save_prediction, book_best_available)
+is timed on a sample and extrapolated; bulk_intake() books all rows.
+Uses a scratch specialization with its own doctors; everything is deleted afterwards.
+"""
+
+import argparse
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from database.connection import ensure_pool, execute_query, execute_many
+from services.appointment_service import save_prediction, book_best_available
+from services.gemini_service import create_fallback_response
+from services.intake_service import bulk_intake
+from services.patient_service import create_patient
+from services.symptom_service import save_symptom
+
+BENCH_SPEC = 'Benchmark Intake'
+PHONE_PREFIX = '0999'
+SYMPTOMS = [
+    "Mild fever and cough for three days, no breathing trouble",
+    "Severe pain in lower back after lifting, cannot walk properly",
+    "Routine vaccination follow-up, feeling well overall",
+    "Headache and dizziness every morning for about a week",
+]
+
+
+def make_records(n, offset=0):
+    return [{
+        'first_name': f"Camp{offset + i}",
+        'last_name': "Attendee",
+        'gender': ('Male', 'Female', 'Other')[i % 3],
+        'age': 18 + i % 60,
+        'phone': f"{PHONE_PREFIX}{offset + i:06d}",
+        'symptom_text': SYMPTOMS[i % len(SYMPTOMS)],
+        'specialization': BENCH_SPEC
+    } for i in range(n)]
+
+
+def setup(doctor_count):
+    cleanup()
+    spec_id = execute_query("INSERT INTO specializations (spec_name) VALUES (%s)", (BENCH_SPEC,))
+    execute_many("INSERT INTO doctors (name, qualification, experience_years, spec_id) VALUES (%s, %s, %s, %s)",
+                 [(f"Bench Camp Doctor {i}", "MBBS", 5, spec_id) for i in range(doctor_count)])
+
+
+def cleanup():
+    execute_query("DELETE FROM patients WHERE phone LIKE %s", (PHONE_PREFIX + '%',))  # cascades
+    execute_query("""
+        DELETE d FROM doctors d INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s
+        """, (BENCH_SPEC,))
+    execute_query("DELETE FROM specializations WHERE spec_name = %s", (BENCH_SPEC,))
+
+
+def per_row(records, start):
+    booked = 0
+    for r in records:
+        patient_id = create_patient(r['first_name'], r['last_name'], r['gender'], r['age'], r['phone'])
+        symptom_id = save_symptom(patient_id, r['symptom_text'])
+        diagnosis = create_fallback_response(r['symptom_text'])
+        save_prediction(symptom_id, diagnosis)
+        if book_best_available(patient_id, symptom_id, BENCH_SPEC, start, diagnosis['urgency_level']):
+            booked += 1
+    return booked
+
+
+def run(rows, sample, doctor_count, horizon):
+    ensure_pool()
+    setup(doctor_count)
+    start = date.today() + timedelta(days=3650)
+    capacity = doctor_count * 16 * horizon
+
+    print(f"\n🏕️ Intake of {rows} patients, {doctor_count} doctors, {horizon} day(s) (capacity {capacity})")
+    print("-" * 72)
+
+    started = time.perf_counter()
+    booked = per_row(make_records(sample, offset=500000), start)
+    per_row_s = time.perf_counter() - started
+    estimate = per_row_s / sample * rows
+    print(f"per-row pipeline | {sample:>5} rows in {per_row_s:7.2f} s | booked {booked:>5} "
+          f"| ≈ {estimate:7.1f} s for {rows}")
+
+    started = time.perf_counter()
+    report = bulk_intake(make_records(rows), start + timedelta(days=1), horizon)
+    bulk_s = time.perf_counter() - started
+    counts = Counter(entry['status'] for entry in report)
+    print(f"bulk_intake      | {rows:>5} rows in {bulk_s:7.2f} s | booked {counts['booked']:>5} "
+          f"| {rows / bulk_s:7.0f} rows/s")
+    print("-" * 72)
+    print(f"⚡ Speed-up: {estimate / bulk_s:.1f}x | statuses: {dict(counts)}")
+
+    cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--sample", type=int, default=100)
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--horizon", type=int, default=7)
+    args = parser.parse_args()
+    run(args.rows, args.sample, args.doctors, args.horizon)
@@ -0,0 +1,54 @@
+"""
+Benchmark: full queue refresh vs polling the appointment change feed
+Run from the project root:  python -m benchmarks.bench_change_feed --changes 10
+Touches --changes queued appointments (status flipped and restored, same as a
+dashboard action), waits out the feed lag and compares one poll with a full reload.
+"""
+
+import argparse
+import time
+
+from config import CHANGE_FEED_LAG_SECONDS
+from database.connection import ensure_pool
+from services.appointment_service import get_appointment_queue, update_appointment_status
+from services.change_feed import get_appointment_changes, get_change_token
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def report(label, rows, ms):
+    size = len(repr(rows).encode())
+    print(f"{label:<22} | {len(rows):>6} rows | {size / 1024:9.1f} KiB | {ms:8.2f} ms")
+
+
+def run(changes):
+    ensure_pool()
+    token = get_change_token()
+
+    print(f"\n🔁 Full refresh vs change feed ({changes} changed appointments)")
+    print("-" * 66)
+    queue, ms = timed(lambda: get_appointment_queue(live=True))
+    report("full queue JOIN", queue, ms)
+
+    feed, ms = timed(lambda: get_appointment_changes(token))
+    report("feed poll (idle)", feed['changes'], ms)
+
+    for appointment in queue[:changes]:
+        flipped = 'Pending' if appointment['status'] == 'Confirmed' else 'Confirmed'
+        update_appointment_status(appointment['appointment_id'], flipped)
+        update_appointment_status(appointment['appointment_id'], appointment['status'])
+    time.sleep(CHANGE_FEED_LAG_SECONDS + 1)
+
+    feed, ms = timed(lambda: get_appointment_changes(feed['token']))
+    report("feed poll (changes)", feed['changes'], ms)
+    print("-" * 66)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--changes", type=int, default=10)
+    run(parser.parse_args().changes)
@@ -0,0 +1,78 @@
+"""
+Benchmark: dashboard statistics for many viewers, uncached vs the shared TTL cache
+Run from the project root:  python -m benchmarks.bench_dashboard_stats --viewers 20 --views 25
+Each viewer thread loads the three dashboard aggregates per view (queue stats,
+Analytics overview, patient stats). Uncached calls go straight to the database
+through the functions' __wrapped__ originals; cached calls share one result per
+TTL window (every 10th view of viewer 0 invalidates 'appointments', as a booking would).
+"""
+
+import argparse
+import threading
+import time
+
+from database.connection import ensure_pool
+from services.analytics_service import get_overview_counts, _overview_row
+from services.appointment_service import get_appointment_statistics
+from services.cache import get_stats_cache
+from services.patient_service import get_patient_statistics
+
+CACHED = [get_appointment_statistics, _overview_row, get_patient_statistics]
+UNCACHED = [fn.__wrapped__ for fn in CACHED]
+
+
+def run_viewers(viewers, views, calls, invalidate):
+    latencies = []
+    lock = threading.Lock()
+
+    def viewer(n):
+        local = []
+        for i in range(views):
+            if invalidate and n == 0 and i % 10 == 9:
+                get_stats_cache().invalidate('appointments')
+            started = time.perf_counter()
+            for fn in calls:
+                fn()
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=viewer, args=(n,)) for n in range(viewers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(label, elapsed, latencies, db_queries):
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} | {len(latencies):>5} views in {elapsed:6.2f} s | "
+          f"p50 {latencies[len(latencies) // 2]:7.2f} ms | p95 {p95:7.2f} ms | stats queries {db_queries}")
+
+
+def run(viewers, views):
+    ensure_pool()
+    print(f"\n🧮 {viewers} viewers x {views} views, {len(CACHED)} aggregates per view")
+    print(f"   overview: {get_overview_counts()}")
+    print("-" * 92)
+    elapsed, latencies = run_viewers(viewers, views, UNCACHED, False)
+    report("uncached", elapsed, latencies, viewers * views * len(UNCACHED))
+
+    cache = get_stats_cache()
+    cache.invalidate()
+    before = cache.stats()
+    elapsed, latencies = run_viewers(viewers, views, CACHED, True)
+    after = cache.stats()
+    report("TTL cache", elapsed, latencies, after['loads'] - before['loads'])
+    print("-" * 92)
+    print(f"📊 Cache: {after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--viewers", type=int, default=20)
+    parser.add_argument("--views", type=int, default=25)
+    args = parser.parse_args()
+    run(args.viewers, args.views)
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-row INSERT loop vs execute_many() multi-row INSERT
+Run from the project root:  python -m benchmarks.bench_execute_many --rows 5000
+Uses a scratch table (bench_batch_rows) that is dropped afterwards.
+"""
+
+import argparse
+import math
+import time
+
+from database.connection import ensure_pool, get_connection, execute_query, execute_many
+
+SCRATCH_DDL = """
+CREATE TABLE IF NOT EXISTS bench_batch_rows (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    record_id INT NOT NULL,
+    medicine_name VARCHAR(100) NOT NULL,
+    dosage VARCHAR(50),
+    duration VARCHAR(50)
+)
+"""
+
+INSERT_SQL = """
+INSERT INTO bench_batch_rows (record_id, medicine_name, dosage, duration)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def make_rows(n):
+    return [(i % 97, f"Medicine {i}", "500mg", "7 days") for i in range(n)]
+
+
+def per_row_insert(rows):
+    """Current path: one cursor.execute per row, single commit (old add_prescriptions_bulk)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    for row in rows:
+        cursor.execute(INSERT_SQL, row)
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return len(rows) + 1  # statements + commit
+
+
+def batched_insert(rows, chunk_size):
+    execute_many(INSERT_SQL, rows, chunk_size=chunk_size)
+    return math.ceil(len(rows) / chunk_size) + 1
+
+
+def run(rows_count, chunk_size):
+    ensure_pool()
+    execute_query(SCRATCH_DDL)
+    rows = make_rows(rows_count)
+
+    print(f"\n📦 Inserting {rows_count} rows (chunk size {chunk_size})")
+    print("-" * 60)
+    results = {}
+    for label, fn in [("per-row loop", lambda: per_row_insert(rows)),
+                      ("execute_many", lambda: batched_insert(rows, chunk_size))]:
+        execute_query("TRUNCATE TABLE bench_batch_rows")
+        started = time.perf_counter()
+        round_trips = fn()
+        elapsed = time.perf_counter() - started
+        results[label] = elapsed
+        print(f"{label:<14} | round trips: {round_trips:>6} | wall: {elapsed * 1000:9.1f} ms "
+              f"| {rows_count / elapsed:10.0f} rows/s")
+
+    print("-" * 60)
+    print(f"⚡ Speed-up: {results['per-row loop'] / results['execute_many']:.1f}x")
+    execute_query("DROP TABLE IF EXISTS bench_batch_rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+    run(args.rows, args.chunk)
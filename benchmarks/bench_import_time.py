@@ -0,0 +1,63 @@
+"""
+Benchmark: cold import time of the data/service layer (headless workers, CLIs, cron jobs)
+Run from the project root:  python -m benchmarks.bench_import_time --runs 5
+Each module is imported in a fresh interpreter; Streamlit must not be pulled in.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "database.connection",
+    "services.patient_service",
+    "services.symptom_service",
+    "services.appointment_service",
+    "services.medical_service",
+    "services.audit_service",
+    "services.analytics_service",
+    "services.gemini_service",
+]
+
+BUDGET_MS = 100
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(f"{{elapsed:.1f}} {{int('streamlit' in sys.modules)}}")
+"""
+
+
+def measure(module, runs):
+    samples, streamlit_loaded = [], False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+                             capture_output=True, text=True, check=True).stdout.split()
+        samples.append(float(out[0]))
+        streamlit_loaded |= out[1] == "1"
+    return statistics.median(samples), streamlit_loaded
+
+
+def run(runs):
+    print(f"\n🚀 Cold import time (median of {runs} fresh interpreters, budget {BUDGET_MS} ms)")
+    print("-" * 70)
+    failures = 0
+    for module in MODULES:
+        median_ms, streamlit_loaded = measure(module, runs)
+        ok = median_ms <= BUDGET_MS and not streamlit_loaded
+        failures += 0 if ok else 1
+        flag = "✅" if ok else "❌"
+        note = " (imports streamlit!)" if streamlit_loaded else ""
+        print(f"{flag} {module:<32} {median_ms:8.1f} ms{note}")
+    print("-" * 70)
+    print("✅ All modules within budget" if not failures else f"❌ {failures} module(s) over budget")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(1 if run(parser.parse_args().runs) else 0)
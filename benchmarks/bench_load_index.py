@@ -0,0 +1,128 @@
+"""
+Benchmark: least-loaded doctor via GROUP BY/HAVING query vs the in-process load index
+Run from the project root:  python -m benchmarks.bench_load_index --doctors 100 --appointments 1000000
+Seeds a scratch specialization with its own doctors and appointments; everything is deleted afterwards.
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+from database.connection import ensure_pool, execute_query, execute_many
+from services.doctor_load_index import DoctorLoadIndex
+
+BENCH_SPEC = 'Benchmark Load Index'
+BENCH_PHONE = '0000000002'
+SLOTS_PER_DAY = 15  # leave one slot free so every doctor stays selectable
+
+# The previous find_available_doctor() query
+LEGACY_QUERY = """
+SELECT
+    d.doctor_id,
+    d.name,
+    d.qualification,
+    COUNT(a.appointment_id) as appointment_count
+FROM doctors d
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+LEFT JOIN appointments a ON d.doctor_id = a.doctor_id
+    AND a.appointment_date = %s
+    AND a.status IN ('Confirmed', 'Pending')
+WHERE s.spec_name = %s AND d.available = TRUE
+GROUP BY d.doctor_id
+HAVING appointment_count < 16
+ORDER BY appointment_count ASC
+LIMIT 1
+"""
+
+
+def seed(doctor_count, appointment_count, start):
+    cleanup()
+    spec_id = execute_query("INSERT INTO specializations (spec_name) VALUES (%s)", (BENCH_SPEC,))
+    execute_many("INSERT INTO doctors (name, qualification, experience_years, spec_id) VALUES (%s, %s, %s, %s)",
+                 [(f"Bench Doctor {i}", "MBBS", 5, spec_id) for i in range(doctor_count)])
+    doctor_ids = [r['doctor_id'] for r in execute_query(
+        "SELECT doctor_id FROM doctors WHERE spec_id = %s ORDER BY doctor_id", (spec_id,), fetch=True)]
+
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Bench', 'Bench Patient', 'Other', 30, BENCH_PHONE)
+    )
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'benchmark'))
+
+    # Fill doctors day by day, one slot per doctor per pass
+    per_day = doctor_count * SLOTS_PER_DAY
+    chunk = 50000
+    for offset in range(0, appointment_count, chunk):
+        rows = []
+        for i in range(offset, min(offset + chunk, appointment_count)):
+            slot = (i % per_day) // doctor_count
+            rows.append((patient_id, doctor_ids[i % doctor_count], symptom_id, 5,
+                         start + timedelta(days=i // per_day),
+                         f"{9 + slot // 2:02d}:{30 * (slot % 2):02d}:00"))
+        execute_many("""
+            INSERT INTO appointments
+            (patient_id, doctor_id, symptom_id, urgency_level, appointment_date, appointment_time, status, mode)
+            VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', 'Offline')
+            """, rows)
+        print(f"   seeded {min(offset + chunk, appointment_count):>9} appointments", end="\r")
+    print()
+    return appointment_count // per_day
+
+
+def cleanup():
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))  # cascades to appointments
+    execute_query("""
+        DELETE d FROM doctors d INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s
+        """, (BENCH_SPEC,))
+    execute_query("DELETE FROM specializations WHERE spec_name = %s", (BENCH_SPEC,))
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} | avg {statistics.mean(samples):10.1f} µs | "
+          f"p50 {statistics.median(samples):10.1f} µs | p95 {p95:10.1f} µs")
+
+
+def run(doctor_count, appointment_count, iterations):
+    ensure_pool()
+    start = date.today() + timedelta(days=3650)
+    print(f"\n🌱 Seeding {doctor_count} doctors / {appointment_count} appointments...")
+    days = seed(doctor_count, appointment_count, start)
+    target = start + timedelta(days=max(days - 1, 0))
+
+    index = DoctorLoadIndex(check_interval=1.0)
+    expected = execute_query(LEGACY_QUERY, (target, BENCH_SPEC), fetch=True, fetch_one=True)
+    actual = index.least_loaded(BENCH_SPEC, target)
+    same_load = (expected or {}).get('appointment_count') == (actual or {}).get('appointment_count')
+
+    print(f"\n👩‍⚕️ Least-loaded doctor on {target} ({iterations} lookups each)")
+    print("-" * 80)
+    report("GROUP BY/HAVING query", time_calls(lambda: execute_query(
+        LEGACY_QUERY, (target, BENCH_SPEC), fetch=True, fetch_one=True), iterations))
+    report("load index", time_calls(lambda: index.least_loaded(BENCH_SPEC, target), iterations))
+    print("-" * 80)
+    print(f"{'✅' if same_load else '❌'} Index agrees with the query on the minimum load | {index.stats()}")
+
+    cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    run(args.doctors, args.appointments, args.iterations)
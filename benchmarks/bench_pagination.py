@@ -0,0 +1,102 @@
+"""
+Benchmark: deep pages of the doctor listing, OFFSET vs keyset tokens
+Run from the project root:  python -m benchmarks.bench_pagination --rows 50000 --pages 200
+Seeds one scratch doctor with --rows appointments (dates ten years out), walks --pages
+pages with next_token and times the same pages fetched with LIMIT/OFFSET.
+Everything is deleted afterwards.
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from database.connection import ensure_pool, execute_query, execute_many
+from services.appointment_service import _DOCTOR_SELECT, get_appointments_by_doctor_page
+from services.queue_view import refresh_for_doctor
+from services.slot_service import SLOT_COUNT, slot_to_time
+
+BENCH_SPEC = 'Benchmark Pagination'
+BENCH_PHONE = '0000000004'
+PAGE_SIZE = 25
+
+
+def setup(rows):
+    cleanup()
+    spec_id = execute_query("INSERT INTO specializations (spec_name) VALUES (%s)", (BENCH_SPEC,))
+    doctor_id = execute_query("INSERT INTO doctors (name, qualification, experience_years, spec_id) "
+                              "VALUES (%s, %s, %s, %s)", ("Bench Page Doctor", "MBBS", 5, spec_id))
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Bench', 'Bench Patient', 'Other', 30, BENCH_PHONE))
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'benchmark'))
+    execute_query("""
+        INSERT INTO predictions (symptom_id, predicted_disease, probability, urgency_level, urgency_reason)
+        VALUES (%s, 'Benchmark', 50, 5, 'benchmark')
+        """, (symptom_id,))
+    first_day = date.today() + timedelta(days=3650)
+    execute_many("""
+        INSERT INTO appointments
+        (patient_id, doctor_id, symptom_id, urgency_level, appointment_date, appointment_time, status, mode)
+        VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', 'Offline')
+        """, [(patient_id, doctor_id, symptom_id, random.randint(1, 10),
+               first_day + timedelta(days=i // SLOT_COUNT), slot_to_time(i % SLOT_COUNT)) for i in range(rows)])
+    refresh_for_doctor(doctor_id)  # the listing reads appointment_queue_view
+    return doctor_id
+
+
+def cleanup():
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))  # cascades to appointments
+    execute_query("""
+        DELETE d FROM doctors d INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s
+        """, (BENCH_SPEC,))
+    execute_query("DELETE FROM specializations WHERE spec_name = %s", (BENCH_SPEC,))
+
+
+def walk_keyset(doctor_id, pages):
+    samples, token = [], None
+    for _ in range(pages):
+        started = time.perf_counter()
+        page = get_appointments_by_doctor_page(doctor_id, page_size=PAGE_SIZE, token=token)
+        samples.append((time.perf_counter() - started) * 1000)
+        token = page['next_token']
+        if not token:
+            break
+    return samples
+
+
+def walk_offset(doctor_id, pages):
+    query = (_DOCTOR_SELECT + " ORDER BY a.urgency_level DESC, a.appointment_date, a.appointment_time, "
+             "a.appointment_id LIMIT %s OFFSET %s")
+    samples = []
+    for n in range(pages):
+        started = time.perf_counter()
+        execute_query(query, (doctor_id, PAGE_SIZE, n * PAGE_SIZE), fetch=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<8} | first page {samples[0]:7.2f} ms | last page {samples[-1]:7.2f} ms "
+          f"| avg {sum(samples) / len(samples):7.2f} ms")
+
+
+def run(rows, pages):
+    ensure_pool()
+    doctor_id = setup(rows)
+    print(f"\n📄 {pages} pages of {PAGE_SIZE} over {rows} appointments")
+    print("-" * 66)
+    report("OFFSET", walk_offset(doctor_id, pages))
+    report("keyset", walk_keyset(doctor_id, pages))
+    print("-" * 66)
+    cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.pages)
@@ -0,0 +1,49 @@
+"""
+Microbenchmark: queue JOIN as a plain query vs a cached prepared statement
+Run from the project root:  python -m benchmarks.bench_prepared_queue --iterations 500
+"""
+
+import argparse
+import statistics
+import time
+
+from database.connection import ensure_pool, execute_query, get_pool_stats
+from services.queue_engine import QUEUE_SELECT
+
+QUEUE_SQL = QUEUE_SELECT + " ORDER BY a.urgency_level DESC, a.appointment_date ASC, a.appointment_time ASC"
+
+
+def time_calls(iterations, prepared):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        execute_query(QUEUE_SQL, fetch=True, prepared=prepared)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<10} | avg {statistics.mean(samples):7.3f} ms | "
+          f"p50 {statistics.median(samples):7.3f} ms | p95 {p95:7.3f} ms")
+
+
+def run(iterations):
+    ensure_pool()
+    # Warm both paths (connections, buffer pool, statement cache)
+    time_calls(20, prepared=False)
+    time_calls(20, prepared=True)
+
+    print(f"\n⏱️ Queue query x{iterations}")
+    print("-" * 60)
+    report("plain", time_calls(iterations, prepared=False))
+    report("prepared", time_calls(iterations, prepared=True))
+    print("-" * 60)
+    print(f"📊 Statement cache: {get_pool_stats()['stmt_cache']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    run(parser.parse_args().iterations)
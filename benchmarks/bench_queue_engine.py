@@ -0,0 +1,84 @@
+"""
+Benchmark: dashboard viewers polling the queue, live JOIN vs the shared QueueEngine
+Run from the project root:  python -m benchmarks.bench_queue_engine --viewers 20 --views 25
+Each viewer thread renders the queue with a rotating filter; every 10th view a status
+flip (Confirmed -> Pending -> Confirmed) is written on one queued appointment so the
+engine has deltas to apply. Statuses are restored afterwards.
+"""
+
+import argparse
+import threading
+import time
+
+from database.connection import ensure_pool
+from services.appointment_service import get_appointment_queue, update_appointment_status
+from services.queue_engine import get_queue_engine
+
+FILTERS = [
+    {},
+    {'urgency_filter': 'High'},
+    {'urgency_filter': 'Medium'},
+    {'specialization_filter': 'General Medicine'},
+]
+
+
+def run_viewers(viewers, views, live, writable):
+    latencies = []
+    lock = threading.Lock()
+
+    def viewer(n):
+        local = []
+        for i in range(views):
+            if writable and n == 0 and i % 10 == 9:
+                appointment = writable[i % len(writable)]
+                flipped = 'Pending' if appointment['status'] == 'Confirmed' else 'Confirmed'
+                update_appointment_status(appointment['appointment_id'], flipped)
+                update_appointment_status(appointment['appointment_id'], appointment['status'])
+            started = time.perf_counter()
+            get_appointment_queue(live=live, **FILTERS[(n + i) % len(FILTERS)])
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=viewer, args=(n,)) for n in range(viewers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(label, elapsed, latencies, db_queries):
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<12} | {len(latencies):>5} views in {elapsed:6.2f} s | "
+          f"p50 {latencies[len(latencies) // 2]:7.2f} ms | p95 {p95:7.2f} ms | queue queries {db_queries}")
+
+
+def run(viewers, views):
+    ensure_pool()
+    writable = get_appointment_queue(live=True)[:5]
+    total = viewers * views
+
+    print(f"\n📋 {viewers} viewers x {views} views (queue size {len(get_appointment_queue(live=True))})")
+    print("-" * 92)
+    elapsed, latencies = run_viewers(viewers, views, True, writable)
+    report("live JOIN", elapsed, latencies, total)
+
+    engine = get_queue_engine()
+    engine.invalidate()
+    before = engine.stats()
+    elapsed, latencies = run_viewers(viewers, views, False, writable)
+    after = engine.stats()
+    db_queries = (after['loads'] - before['loads']) + (after['delta_queries'] - before['delta_queries'])
+    report("QueueEngine", elapsed, latencies, db_queries)
+    print("-" * 92)
+    print(f"📊 Engine: {after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--viewers", type=int, default=20)
+    parser.add_argument("--views", type=int, default=25)
+    args = parser.parse_args()
+    run(args.viewers, args.views)
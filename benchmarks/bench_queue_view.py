@@ -0,0 +1,117 @@
+"""
+Benchmark: queue reads from the six-table JOIN vs appointment_queue_view
+Run from the project root:  python -m benchmarks.bench_queue_view --rows 1000000
+Seeds --rows Confirmed appointments over 50 scratch doctors (dates ten years out),
+fills their view rows, then times the same listings against the JOIN, the view
+and the view's 'summary' projection (no TEXT columns): a week of the queue, the
+first queue page and a doctor's first page.
+Everything is deleted afterwards (the view rows cascade with the appointments).
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from database.connection import ensure_pool, execute_query, execute_many
+from services.queue_view import SUMMARY_SELECT, VIEW_SELECT, _SOURCE_SELECT, refresh_for_doctor
+from services.slot_service import SLOT_COUNT, slot_to_time
+
+BENCH_SPEC = 'Benchmark Queue View'
+BENCH_PHONE = '0000000005'
+DOCTORS = 50
+CHUNK = 10000
+
+ACTIVE = "a.status IN ('Confirmed', 'Pending')"
+QUEUE_ORDER = " ORDER BY a.urgency_level DESC, a.appointment_date, a.appointment_time, a.appointment_id"
+SOURCES = {
+    'JOIN': _SOURCE_SELECT.format(where=ACTIVE),
+    'view': VIEW_SELECT + " WHERE " + ACTIVE,
+    'summary': SUMMARY_SELECT + " WHERE " + ACTIVE,
+}
+
+
+def setup(rows):
+    cleanup()
+    spec_id = execute_query("INSERT INTO specializations (spec_name) VALUES (%s)", (BENCH_SPEC,))
+    doctor_ids = [execute_query("INSERT INTO doctors (name, qualification, experience_years, spec_id) "
+                                "VALUES (%s, %s, %s, %s)", (f"Bench View Doctor {n}", "MBBS", 5, spec_id))
+                  for n in range(DOCTORS)]
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Bench', 'Bench Patient', 'Other', 30, BENCH_PHONE))
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'benchmark'))
+    execute_query("""
+        INSERT INTO predictions (symptom_id, predicted_disease, probability, urgency_level, urgency_reason)
+        VALUES (%s, 'Benchmark', 50, 5, 'benchmark')
+        """, (symptom_id,))
+
+    first_day = date.today() + timedelta(days=3650)
+    per_day = DOCTORS * SLOT_COUNT
+    for start in range(0, rows, CHUNK):
+        execute_many("""
+            INSERT INTO appointments
+            (patient_id, doctor_id, symptom_id, urgency_level, appointment_date, appointment_time, status, mode)
+            VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', 'Offline')
+            """, [(patient_id, doctor_ids[(i % per_day) // SLOT_COUNT], symptom_id, random.randint(1, 10),
+                   first_day + timedelta(days=i // per_day), slot_to_time(i % SLOT_COUNT))
+                  for i in range(start, min(start + CHUNK, rows))])
+    # Bulk seeding bypasses the service layer, so fill the view the way a repair would
+    for doctor_id in doctor_ids:
+        refresh_for_doctor(doctor_id)
+    return doctor_ids[0], first_day
+
+
+def cleanup():
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))  # cascades to appointments
+    execute_query("""
+        DELETE d FROM doctors d INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s
+        """, (BENCH_SPEC,))
+    execute_query("DELETE FROM specializations WHERE spec_name = %s", (BENCH_SPEC,))
+
+
+def time_query(query, params, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        rows = execute_query(query, params, fetch=True, prepared=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return rows or [], samples
+
+
+def report(label, source, rows, samples):
+    size = len(repr(rows).encode())
+    print(f"{label:<18} {source:<7} | {len(rows):>6} rows | {size / 1024:9.1f} KiB "
+          f"| avg {statistics.mean(samples):8.2f} ms | p50 {statistics.median(samples):8.2f} ms")
+
+
+def run(rows, iterations):
+    ensure_pool()
+    print(f"\n🌱 Seeding {rows} appointments...")
+    doctor_id, first_day = setup(rows)
+    week = (first_day, first_day + timedelta(days=7))
+
+    listings = [
+        ("queue, one week", " AND a.appointment_date >= %s AND a.appointment_date < %s" + QUEUE_ORDER, week),
+        ("queue, first page", QUEUE_ORDER + " LIMIT 26", ()),
+        ("doctor, first page", " AND a.doctor_id = %s" + QUEUE_ORDER + " LIMIT 26", (doctor_id,)),
+    ]
+    print(f"\n🗂️ Queue listings over {rows} appointments, x{iterations}")
+    print("-" * 96)
+    for label, tail, params in listings:
+        for source, select in SOURCES.items():
+            time_query(select + tail, params, 2)  # warm the statement cache and buffer pool
+            report(label, source, *time_query(select + tail, params, iterations))
+    print("-" * 96)
+    cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.iterations)
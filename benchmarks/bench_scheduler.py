@@ -0,0 +1,99 @@
+"""
+Benchmark: re-optimizing a 5,000-appointment day
+Run from the project root:  python -m benchmarks.bench_scheduler --appointments 5000
+Planning is timed in memory; add --db to seed a scratch specialization (doctors + appointments
+on a date ten years out), time optimize_day() end to end, and delete everything afterwards.
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from services.scheduler import plan_day, weighted_wait
+from services.slot_service import SLOT_COUNT, slot_to_time
+
+BENCH_SPEC = 'Benchmark Scheduler'
+BENCH_PHONE = '0000000003'
+
+
+def synthetic_day(appointment_count, spec_count=4):
+    doctor_count = -(-appointment_count // SLOT_COUNT)
+    doctors = [{'doctor_id': i, 'spec_id': i % spec_count} for i in range(doctor_count)]
+    appointments = []
+    for i in range(appointment_count):
+        doctor = doctors[i % doctor_count]
+        appointments.append({
+            'appointment_id': i + 1, 'doctor_id': doctor['doctor_id'], 'spec_id': doctor['spec_id'],
+            'appointment_time': slot_to_time(i // doctor_count), 'urgency_level': random.randint(1, 10),
+            'status': 'Confirmed', 'created_at': datetime(2026, 1, 1)
+        })
+    return appointments, doctors
+
+
+def bench_plan(appointment_count):
+    appointments, doctors = synthetic_day(appointment_count)
+    started = time.perf_counter()
+    moves, _ = plan_day(appointments, doctors)
+    elapsed = time.perf_counter() - started
+    before = weighted_wait((m['urgency_level'], m['old_slot']) for m in moves)
+    after = weighted_wait((m['urgency_level'], m['slot']) for m in moves)
+    print(f"plan_day (memory) | {appointment_count} appointments, {len(doctors)} doctors "
+          f"| {elapsed * 1000:8.1f} ms | weighted wait {before} → {after}")
+
+
+def bench_db(appointment_count):
+    from database.connection import ensure_pool, execute_query, execute_many
+    from services.scheduler import optimize_day
+    from services.slot_service import rebuild_slot_masks
+
+    ensure_pool()
+    day = date.today() + timedelta(days=3650)
+    cleanup(execute_query)
+    doctor_count = -(-appointment_count // SLOT_COUNT)
+
+    spec_id = execute_query("INSERT INTO specializations (spec_name) VALUES (%s)", (BENCH_SPEC,))
+    execute_many("INSERT INTO doctors (name, qualification, experience_years, spec_id) VALUES (%s, %s, %s, %s)",
+                 [(f"Bench Sched Doctor {i}", "MBBS", 5, spec_id) for i in range(doctor_count)])
+    doctor_ids = [r['doctor_id'] for r in execute_query(
+        "SELECT doctor_id FROM doctors WHERE spec_id = %s ORDER BY doctor_id", (spec_id,), fetch=True)]
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Bench', 'Bench Patient', 'Other', 30, BENCH_PHONE))
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'benchmark'))
+    execute_many("""
+        INSERT INTO appointments
+        (patient_id, doctor_id, symptom_id, urgency_level, appointment_date, appointment_time, status, mode)
+        VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', 'Offline')
+        """, [(patient_id, doctor_ids[i % doctor_count], symptom_id, random.randint(1, 10), day,
+               slot_to_time(i // doctor_count)) for i in range(appointment_count)])
+    rebuild_slot_masks(day)
+
+    started = time.perf_counter()
+    summary = optimize_day(day)
+    elapsed = time.perf_counter() - started
+    flag = "✅" if elapsed < 1 else "⚠️"
+    print(f"{flag} optimize_day (db) | {summary['appointments'] if summary else 0} appointments "
+          f"| moved {summary['moved'] if summary else 0} | {elapsed * 1000:8.1f} ms")
+    cleanup(execute_query)
+
+
+def cleanup(execute_query):
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))  # cascades to appointments
+    execute_query("""
+        DELETE d FROM doctors d INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s
+        """, (BENCH_SPEC,))
+    execute_query("DELETE FROM specializations WHERE spec_name = %s", (BENCH_SPEC,))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--appointments", type=int, default=5000)
+    parser.add_argument("--db", action="store_true", help="Also run optimize_day() against the database")
+    args = parser.parse_args()
+    print()
+    bench_plan(args.appointments)
+    if args.db:
+        bench_db(args.appointments)
@@ -0,0 +1,103 @@
+"""
+Benchmark: concurrent bookings for one doctor/day
+COUNT(*)-based slot generation (old create_appointment) vs the slot bitmap allocator
+Run from the project root:  python -m benchmarks.bench_slot_allocator --threads 8 --bookings 16
+Books on a date ten years out with a scratch patient; everything is deleted afterwards.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta, time as dtime
+
+from database.connection import ensure_pool, execute_query
+from services.appointment_service import create_appointment
+
+BENCH_PHONE = '0000000000'
+
+INSERT_SQL = """
+INSERT INTO appointments
+(patient_id, doctor_id, symptom_id, urgency_level,
+ appointment_date, appointment_time, status, mode)
+VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', 'Offline')
+"""
+
+
+def legacy_time_slot(urgency_level, existing_appointments_count):
+    """The removed generate_time_slot(): slot = count modulo band size"""
+    if urgency_level >= 8:
+        slot_offset = existing_appointments_count % 6
+    elif urgency_level >= 4:
+        slot_offset = 6 + (existing_appointments_count % 6)
+    else:
+        slot_offset = 12 + (existing_appointments_count % 4)
+    return dtime(9 + slot_offset // 2, 0 if slot_offset % 2 == 0 else 30)
+
+
+def legacy_book(patient_id, doctor_id, symptom_id, urgency, day):
+    result = execute_query(
+        "SELECT COUNT(*) as count FROM appointments WHERE doctor_id = %s AND appointment_date = %s",
+        (doctor_id, day), fetch=True, fetch_one=True
+    )
+    slot = legacy_time_slot(urgency, result['count'] if result else 0)
+    return execute_query(INSERT_SQL, (patient_id, doctor_id, symptom_id, urgency, day, slot))
+
+
+def bitmap_book(patient_id, doctor_id, symptom_id, urgency, day):
+    return create_appointment(patient_id, doctor_id, symptom_id, urgency, day)
+
+
+def setup():
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Bench', 'Bench Patient', 'Other', 30, BENCH_PHONE)
+    )
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'benchmark'))
+    doctor = execute_query("SELECT doctor_id FROM doctors ORDER BY doctor_id LIMIT 1",
+                           fetch=True, fetch_one=True)
+    return patient_id, symptom_id, doctor['doctor_id']
+
+
+def reset_day(doctor_id, day):
+    execute_query("DELETE FROM appointments WHERE doctor_id = %s AND appointment_date = %s", (doctor_id, day))
+    execute_query("DELETE FROM doctor_day_slots WHERE doctor_id = %s AND slot_date = %s", (doctor_id, day))
+
+
+def run(threads, bookings):
+    ensure_pool()
+    patient_id, symptom_id, doctor_id = setup()
+    day = date.today() + timedelta(days=3650)
+    # Mixed urgencies so every band is exercised
+    urgencies = [(9, 6, 2)[i % 3] for i in range(bookings)]
+
+    print(f"\n🗓️ {bookings} bookings for doctor {doctor_id} on {day} from {threads} threads")
+    print("-" * 78)
+    for label, book in [("COUNT(*) + modulo", legacy_book), ("slot bitmap", bitmap_book)]:
+        reset_day(doctor_id, day)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda u: book(patient_id, doctor_id, symptom_id, u, day), urgencies))
+        elapsed = time.perf_counter() - started
+
+        booked = sum(1 for r in results if r)
+        slots = execute_query(
+            "SELECT COUNT(DISTINCT appointment_time) AS n FROM appointments "
+            "WHERE doctor_id = %s AND appointment_date = %s",
+            (doctor_id, day), fetch=True, fetch_one=True
+        )['n']
+        print(f"{label:<18} | booked {booked:>3}/{bookings} | failed {bookings - booked:>3} "
+              f"| distinct slots {slots:>3} | wall {elapsed * 1000:8.1f} ms")
+
+    print("-" * 78)
+    reset_day(doctor_id, day)
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--bookings", type=int, default=16)
+    args = parser.parse_args()
+    run(args.threads, args.bookings)
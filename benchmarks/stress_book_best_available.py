@@ -0,0 +1,123 @@
+"""
+Stress test: N parallel bookers for one specialization/day
+find_available_doctor() + create_appointment() vs book_best_available()
+Run from the project root:  python -m benchmarks.stress_book_best_available --threads 12 --bookings 100
+Checks every doctor stays within 16 slots/day, no slot is double-booked and load is spread evenly.
+Books on a date ten years out with a scratch patient; everything is deleted afterwards.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from database.connection import ensure_pool, execute_query
+from mysql.connector import Error
+from services.appointment_service import find_available_doctor, create_appointment, book_best_available
+from services.slot_service import SLOT_COUNT
+
+BENCH_PHONE = '0000000001'
+
+
+def two_step_book(patient_id, symptom_id, spec, day, urgency):
+    doctor = find_available_doctor(spec, day)
+    if not doctor:
+        return None
+    return create_appointment(patient_id, doctor['doctor_id'], symptom_id, urgency, day)
+
+
+def atomic_book(patient_id, symptom_id, spec, day, urgency):
+    try:
+        booking = book_best_available(patient_id, symptom_id, spec, day, urgency)
+    except Error:  # BookingConflict after the retries: counted as a failed booking
+        return None
+    return booking['appointment_id'] if booking else None
+
+
+def setup(spec):
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))
+    patient_id = execute_query(
+        "INSERT INTO patients (first_name, full_name, gender, age, phone) VALUES (%s, %s, %s, %s, %s)",
+        ('Stress', 'Stress Patient', 'Other', 30, BENCH_PHONE)
+    )
+    symptom_id = execute_query("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                               (patient_id, 'stress test'))
+    doctors = execute_query("""
+        SELECT d.doctor_id FROM doctors d
+        INNER JOIN specializations s ON d.spec_id = s.spec_id
+        WHERE s.spec_name = %s AND d.available = TRUE
+        """, (spec,), fetch=True) or []
+    return patient_id, symptom_id, [d['doctor_id'] for d in doctors]
+
+
+def reset_day(doctor_ids, day):
+    for doctor_id in doctor_ids:
+        execute_query("DELETE FROM appointments WHERE doctor_id = %s AND appointment_date = %s", (doctor_id, day))
+        execute_query("DELETE FROM doctor_day_slots WHERE doctor_id = %s AND slot_date = %s", (doctor_id, day))
+
+
+def check(doctor_ids, day, booked, bookings):
+    """Return a list of correctness violations for the day"""
+    capacity = SLOT_COUNT * len(doctor_ids)
+    loads = execute_query("""
+        SELECT doctor_id, COUNT(*) AS n, COUNT(DISTINCT appointment_time) AS slots
+        FROM appointments
+        WHERE appointment_date = %s AND status != 'Cancelled'
+        GROUP BY doctor_id
+        """, (day,), fetch=True) or []
+    problems = []
+    for row in loads:
+        if row['n'] > SLOT_COUNT:
+            problems.append(f"doctor {row['doctor_id']} has {row['n']} > {SLOT_COUNT} appointments")
+        if row['slots'] != row['n']:
+            problems.append(f"doctor {row['doctor_id']} has {row['n'] - row['slots']} double-booked slot(s)")
+    if booked != min(bookings, capacity):
+        problems.append(f"booked {booked}, expected {min(bookings, capacity)} (capacity {capacity})")
+    counts = [row['n'] for row in loads] + [0] * (len(doctor_ids) - len(loads))
+    return problems, (max(counts) - min(counts)) if counts else 0
+
+
+def run(spec, threads, bookings):
+    ensure_pool()
+    patient_id, symptom_id, doctor_ids = setup(spec)
+    if not doctor_ids:
+        print(f"❌ No available {spec} doctors")
+        return 1
+    day = date.today() + timedelta(days=3650)
+    urgencies = [(9, 6, 2)[i % 3] for i in range(bookings)]
+
+    print(f"\n🏥 {bookings} bookings, {threads} threads, {len(doctor_ids)} {spec} doctor(s) "
+          f"(capacity {SLOT_COUNT * len(doctor_ids)}) on {day}")
+    print("-" * 84)
+    failures = 0
+    for label, book in [("find + create", two_step_book), ("book_best_available", atomic_book)]:
+        reset_day(doctor_ids, day)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda u: book(patient_id, symptom_id, spec, day, u), urgencies))
+        elapsed = time.perf_counter() - started
+
+        booked = sum(1 for r in results if r)
+        problems, spread = check(doctor_ids, day, booked, bookings)
+        flag = "✅" if not problems else "❌"
+        print(f"{flag} {label:<20} | booked {booked:>4} | {booked / elapsed:7.1f} bookings/s "
+              f"| load spread {spread:>2} | wall {elapsed * 1000:8.1f} ms")
+        for problem in problems:
+            print(f"     - {problem}")
+        if book is atomic_book:
+            failures += len(problems)
+
+    print("-" * 84)
+    reset_day(doctor_ids, day)
+    execute_query("DELETE FROM patients WHERE phone = %s", (BENCH_PHONE,))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spec", default="General Medicine")
+    parser.add_argument("--threads", type=int, default=12)
+    parser.add_argument("--bookings", type=int, default=100)
+    args = parser.parse_args()
+    sys.exit(1 if run(args.spec, args.threads, args.bookings) else 0)
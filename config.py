@@ -14,9 +14,52 @@ DB_CONFIG = {
     'autocommit': False
 }
 
+# Read Replica (optional): read-only queries are routed here when DB_REPLICA_HOST is set.
+# Point it at the primary's host to run the same instance under a second pool name.
+DB_REPLICA_CONFIG = dict(
+    DB_CONFIG,
+    host=os.getenv('DB_REPLICA_HOST'),
+    port=int(os.getenv('DB_REPLICA_PORT', DB_CONFIG['port'])),
+    user=os.getenv('DB_REPLICA_USER', DB_CONFIG['user']),
+    password=os.getenv('DB_REPLICA_PASSWORD', DB_CONFIG['password'])
+) if os.getenv('DB_REPLICA_HOST') else None
+READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 5))  # Stick to primary after a write
+
 # Gemini AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 # Application Settings
 SYMPTOM_MIN_LENGTH = 50
-MAX_APPOINTMENTS_PER_DAY = 16
+BOOKING_HORIZON_DAYS = int(os.getenv('BOOKING_HORIZON_DAYS', 14))  # Days searched for the earliest free slot
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 25))              # Rows per page in appointment listings
+
+# Connection Pool Settings
+DB_POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),             # Connections kept open
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),  # Extra connections under load
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),          # Seconds to wait for a free connection
+    'ping_after': float(os.getenv('DB_POOL_PING_AFTER', 30)),    # Idle seconds before pre-ping on checkout
+    'stmt_cache_size': int(os.getenv('DB_STMT_CACHE_SIZE', 32))  # Prepared statements cached per connection
+}
+DB_POOL_WARMUP = int(os.getenv('DB_POOL_WARMUP', 2))  # Connections pre-opened at startup
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 500))   # Rows per multi-row INSERT in execute_many
+
+# Query Instrumentation
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 200))  # Queries slower than this are logged
+DB_SLOW_LOG_SIZE = int(os.getenv('DB_SLOW_LOG_SIZE', 200))    # Slow-log entries kept in memory
+
+# Doctor Load Index (in-process least-loaded doctor lookup)
+LOAD_INDEX_CHECK_SECONDS = float(os.getenv('LOAD_INDEX_CHECK_SECONDS', 1))  # Max staleness vs other workers
+LOAD_INDEX_MAX_DAYS = int(os.getenv('LOAD_INDEX_MAX_DAYS', 256))           # (specialization, date) heaps kept
+
+# Appointment Queue Engine (shared in-process queue behind the dashboard)
+QUEUE_RELOAD_SECONDS = float(os.getenv('QUEUE_RELOAD_SECONDS', 60))  # Full reload (picks up other workers' writes)
+QUEUE_POLL_SECONDS = float(os.getenv('QUEUE_POLL_SECONDS', 2))       # Change-feed poll between reloads
+
+# Appointment Change Feed (incremental polling on updated_at)
+CHANGE_FEED_LAG_SECONDS = int(os.getenv('CHANGE_FEED_LAG_SECONDS', 5))  # Must exceed the longest write transaction
+CHANGE_FEED_BATCH = int(os.getenv('CHANGE_FEED_BATCH', 500))            # Max rows per poll
+
+# Dashboard Statistics Cache (shared by every session, dropped on local writes)
+STATS_CACHE_SECONDS = float(os.getenv('STATS_CACHE_SECONDS', 10))        # Max staleness vs other workers
+STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', 256))  # Distinct (function, arguments) kept
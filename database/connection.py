@@ -1,65 +1,860 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
 import mysql.connector
-from mysql.connector import Error, pooling
-from config import DB_CONFIG
-import streamlit as st
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from config import (
+    DB_CONFIG, DB_POOL_CONFIG, DB_POOL_WARMUP, DB_BATCH_SIZE,
+    DB_REPLICA_CONFIG, READ_YOUR_WRITES_SECONDS
+)
+from database.metrics import Histogram, RateMeter
+from database.instrumentation import QueryTimer
 
-connection_pool = None
+PRIMARY_POOL = "healthcare_pool"
+READ_POOL = "healthcare_read_pool"
 
-def initialize_pool():
-    """Initialize MySQL connection pool"""
-    global connection_pool
-    try:
-        connection_pool = pooling.MySQLConnectionPool(
-            pool_name="healthcare_pool",
-            pool_size=5,
-            **DB_CONFIG
-        )
-        print("✅ Connection pool created successfully")
-        return True
-    except Error as e:
-        print(f"❌ Error creating connection pool: {e}")
-        st.error(f"Database connection failed: {e}")
+# Client error codes meaning the server connection is gone
+# (2006 server gone away, 2013 lost during query, 2055 lost at handshake/read)
+CONNECTION_LOST_ERRNOS = {2006, 2013, 2055}
+
+# INSERT/REPLACE ... VALUES (<row>) [ON DUPLICATE KEY UPDATE ...]
+_VALUES_RE = re.compile(
+    r"^(?P<head>\s*(?:INSERT|REPLACE)\b.*?\bVALUES\s*)"
+    r"(?P<row>\(.*?\))"
+    r"(?P<tail>\s*(?:ON\s+DUPLICATE\s+KEY\s+UPDATE\b.*)?)\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Process-wide pool registry: each named pool is created exactly once
+_pools = {}
+_registry_lock = threading.Lock()
+
+# Error hooks: callables taking a message string (e.g. st.error, registered by the UI)
+_error_hooks = []
+
+# Per-thread state (the active transaction and the bound session, if any)
+_local = threading.local()
+
+# Read-your-writes: session key -> monotonic time of its last commit on the primary
+_last_write = {}
+_last_write_lock = threading.Lock()
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class PooledConnection:
+    """
+    Wrapper around a MySQL connection checked out from ConnectionPool.
+    Behaves like the underlying connection; close() returns it to the pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._checked_out = False
+        self._invalid = False
+        self.last_used = time.monotonic()
+        self._stmt_cache = OrderedDict()  # SQL text -> prepared cursor (LRU order)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Return the connection to the pool instead of closing it"""
+        if self._checked_out:
+            self._checked_out = False
+            self._pool._release(self)
+
+    def invalidate(self):
+        """Mark the connection broken so close() drops it instead of reusing it"""
+        self._invalid = True
+
+    def commit(self):
+        """Commit, and pin the current session to the primary for read-your-writes"""
+        self._raw.commit()
+        if self._pool.pool_name == PRIMARY_POOL:
+            _note_write()
+
+    def prepared_cursor(self, query):
+        """
+        Return this connection's prepared (server-side) statement for `query`.
+        Statements are cached per connection by SQL text with LRU eviction,
+        so repeated calls skip MySQL's parse/prepare step.
+        """
+        cursor = self._stmt_cache.get(query)
+        if cursor is not None:
+            self._stmt_cache.move_to_end(query)
+            self._pool._count_statement('hits')
+            return cursor
+
+        self._pool._count_statement('misses')
+        cursor = self._raw.cursor(prepared=True, dictionary=True)
+        self._stmt_cache[query] = cursor
+        if len(self._stmt_cache) > self._pool.stmt_cache_size:
+            _, evicted = self._stmt_cache.popitem(last=False)
+            self._pool._count_statement('evictions')
+            try:
+                evicted.close()  # deallocates the server-side statement
+            except Error:
+                pass
+        return cursor
+
+    def forget_statement(self, query):
+        """Drop a cached statement whose state is unknown (e.g. after an error)"""
+        cursor = self._stmt_cache.pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+    def clear_statements(self):
+        """Forget all cached statements (they died with the old server session)"""
+        self._stmt_cache.clear()
+
+
+class TransactionRolledBack(Error):
+    """Raised when a transaction() block ends after a joined statement failed"""
+
+
+class _TransactionHandle:
+    """
+    The transaction's connection as seen by code that joins it.
+    commit()/close() are deferred to transaction(); rollback() dooms the transaction.
+    """
+
+    def __init__(self, txn):
+        self._txn = txn
+
+    def __getattr__(self, name):
+        return getattr(self._txn.connection, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._txn.rollback_only = True
+
+    def close(self):
+        pass
+
+    def invalidate(self):
+        self._txn.rollback_only = True
+        self._txn.connection.invalidate()
+
+
+class _Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rollback_only = False
+        self.handle = _TransactionHandle(self)
+        self.commit_hooks = []
+
+
+class _Waiter:
+    """A thread queued for a connection (FIFO hand-out)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.conn = None
+        self.may_create = False
+
+
+class ConnectionPool:
+    """
+    Thread-safe MySQL connection pool
+
+    - Keeps up to `pool_size` idle connections open
+    - Opens up to `max_overflow` extra connections under load (closed on return)
+    - When everything is busy, callers queue FIFO and wait up to `timeout` seconds
+    - Connections idle longer than `ping_after` seconds are pinged (and
+      reconnected if dead) before being handed out
+    """
+
+    def __init__(self, pool_name, db_config, pool_size=5, max_overflow=10, timeout=10.0,
+                 ping_after=30.0, stmt_cache_size=32):
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.stmt_cache_size = stmt_cache_size
+        self._db_config = dict(db_config)
+
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._waiters = deque()
+        self._total = 0
+        self._in_use = 0
+
+        # Statistics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._overflow_opened = 0
+        self._peak_in_use = 0
+        self._stale_detected = 0
+        self._reconnects = 0
+        self._query_retries = 0
+        self._stmt_counts = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._wait_ms = Histogram()
+        self._checkout_rate = RateMeter()
+
+    @property
+    def max_connections(self):
+        return self.pool_size + self.max_overflow
+
+    def get_connection(self, timeout=None):
+        """
+        Check out a connection, waiting in line if the pool is exhausted
+
+        Raises:
+            PoolTimeoutError: no connection became free within the timeout
+            Error: a new connection could not be opened
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        conn, create, waiter = None, False, None
+
+        with self._lock:
+            if self._idle and not self._waiters:
+                conn = self._idle.pop()
+                self._mark_checked_out()
+            elif self._total < self.max_connections:
+                create = True
+                self._total += 1
+                if self._total > self.pool_size:
+                    self._overflow_opened += 1
+                self._mark_checked_out()
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            conn, create = self._wait_for_turn(waiter, started, timeout)
+
+        if create:
+            conn = self._open_connection()
+        elif time.monotonic() - conn.last_used > self.ping_after:
+            self._ensure_alive(conn)
+
+        conn._checked_out = True
+        self._record_checkout(started)
+        return conn
+
+    def warm_up(self, count=None):
+        """Pre-open idle connections so the first requests skip the handshake"""
+        count = self.pool_size if count is None else min(count, self.pool_size)
+        opened = 0
+        while opened < count:
+            with self._lock:
+                if self._total >= count:
+                    break
+                self._total += 1
+                self._in_use += 1
+            conn = self._open_connection()
+            with self._lock:
+                self._in_use -= 1
+                self._idle.append(conn)
+            opened += 1
+        return opened
+
+    def _wait_for_turn(self, waiter, started, timeout):
+        """Block until a releasing thread hands this waiter a connection"""
+        waiter.event.wait(max(0.0, timeout - (time.monotonic() - started)))
+        with self._lock:
+            if not waiter.event.is_set():
+                self._waiters.remove(waiter)
+                self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"Timed out after {timeout:.1f}s waiting for a connection "
+                    f"from '{self.pool_name}' ({self._in_use} in use)"
+                )
+        return waiter.conn, waiter.may_create
+
+    def _ensure_alive(self, conn):
+        """Pre-ping an idle connection; transparently reconnect if the server dropped it"""
+        try:
+            conn._raw.ping(reconnect=False)
+            return
+        except Error:
+            with self._lock:
+                self._stale_detected += 1
+
+        conn.clear_statements()
+        try:
+            conn._raw.reconnect(attempts=1, delay=0)
+        except Error:
+            self._discard(conn)
+            raise
+        with self._lock:
+            self._reconnects += 1
+        print(f"♻️ Reconnected stale connection in '{self.pool_name}'")
+
+    def _count_statement(self, outcome):
+        with self._lock:
+            self._stmt_counts[outcome] += 1
+
+    def record_retry(self):
+        """Count a query re-run after a lost connection"""
+        with self._lock:
+            self._query_retries += 1
+
+    def _open_connection(self):
+        """Open a new physical connection (a slot is already reserved)"""
+        try:
+            raw = mysql.connector.connect(**self._db_config)
+        except Error:
+            with self._lock:
+                self._total -= 1
+                self._in_use -= 1
+                self._hand_slot_to_waiter()
+            raise
+        return PooledConnection(self, raw)
+
+    def _release(self, conn):
+        """Return a connection: hand it to the next waiter, keep it, or close overflow"""
+        if conn._invalid:
+            self._discard(conn)
+            return
+        conn.last_used = time.monotonic()
+        try:
+            raw = conn._raw
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+        except Error:
+            self._discard(conn)
+            return
+
+        to_close = None
+        with self._lock:
+            self._in_use -= 1
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                self._in_use += 1
+                waiter.event.set()
+            elif self._total > self.pool_size:
+                self._total -= 1
+                to_close = conn
+            else:
+                self._idle.append(conn)
+
+        if to_close is not None:
+            self._close_raw(to_close)
+
+    def _discard(self, conn):
+        """Drop a broken connection and free its slot"""
+        with self._lock:
+            self._in_use -= 1
+            self._total -= 1
+            self._hand_slot_to_waiter()
+        self._close_raw(conn)
+
+    def _hand_slot_to_waiter(self):
+        """Let the first waiter open a fresh connection (caller holds the lock)"""
+        if self._waiters and self._total < self.max_connections:
+            waiter = self._waiters.popleft()
+            waiter.may_create = True
+            self._total += 1
+            self._in_use += 1
+            waiter.event.set()
+
+    def _mark_checked_out(self):
+        self._in_use += 1
+        if self._in_use > self._peak_in_use:
+            self._peak_in_use = self._in_use
+
+    def _record_checkout(self, started):
+        waited_ms = (time.monotonic() - started) * 1000
+        self._wait_ms.observe(waited_ms)
+        self._checkout_rate.mark()
+        with self._lock:
+            self._checkouts += 1
+
+    @staticmethod
+    def _close_raw(conn):
+        conn.clear_statements()
+        try:
+            conn._raw.close()
+        except Error:
+            pass
+
+    def stats(self):
+        """Live pool statistics for sizing and monitoring"""
+        with self._lock:
+            snapshot = {
+                'pool_name': self.pool_name,
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'timeout': self.timeout,
+                'open_connections': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiters': len(self._waiters),
+                'peak_in_use': self._peak_in_use,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'overflow_opened': self._overflow_opened,
+                'stale_detected': self._stale_detected,
+                'reconnects': self._reconnects,
+                'query_retries': self._query_retries,
+                'stmt_cache': dict(self._stmt_counts, size_per_connection=self.stmt_cache_size)
+            }
+        snapshot['checkouts_per_sec'] = self._checkout_rate.rate()
+        snapshot['wait_ms'] = self._wait_ms.snapshot()
+        return snapshot
+
+
+def register_error_hook(hook):
+    """
+    Register a callable(message) to surface connection errors to the user.
+    The data layer never imports a UI framework; pages pass st.error here.
+    Registering the same callable twice is a no-op.
+    """
+    if hook not in _error_hooks:
+        _error_hooks.append(hook)
+
+def unregister_error_hook(hook):
+    if hook in _error_hooks:
+        _error_hooks.remove(hook)
+
+def _report_error(message):
+    """Print the error and forward it to every registered hook"""
+    print(f"❌ {message}")
+    for hook in list(_error_hooks):
+        try:
+            hook(message)
+        except Exception as e:
+            print(f"⚠️ Error hook {hook!r} failed: {e}")
+
+def bind_session(session_key):
+    """
+    Associate the current thread with a user session (e.g. a Streamlit session id)
+    so read-your-writes stickiness follows the user rather than the thread.
+    """
+    _local.session_key = session_key
+
+def _session_key():
+    return getattr(_local, 'session_key', None) or threading.get_ident()
+
+def _note_write():
+    now = time.monotonic()
+    with _last_write_lock:
+        _last_write[_session_key()] = now
+        if len(_last_write) > 10000:
+            cutoff = now - READ_YOUR_WRITES_SECONDS
+            for key in [k for k, t in _last_write.items() if t < cutoff]:
+                del _last_write[key]
+
+def _recently_wrote():
+    written_at = _last_write.get(_session_key())
+    return written_at is not None and time.monotonic() - written_at < READ_YOUR_WRITES_SECONDS
+
+def _use_read_pool(query, read_only=None):
+    """
+    Route to the replica only for reads, outside transactions, and when this
+    session has not written within READ_YOUR_WRITES_SECONDS.
+    read_only=None auto-detects from the statement; True/False tags it explicitly.
+    """
+    if DB_REPLICA_CONFIG is None or in_transaction():
         return False
+    is_read = _is_idempotent_read(query) if read_only is None else read_only
+    return is_read and not _recently_wrote()
+
+def _checkout(use_read_pool):
+    """Check out from the read pool if requested, falling back to the primary"""
+    if use_read_pool:
+        try:
+            return ensure_pool(READ_POOL, DB_REPLICA_CONFIG).get_connection()
+        except Error as e:
+            print(f"⚠️ Read pool unavailable, using primary: {e}")
+    return _get_connection()
 
-def get_connection():
-    """Get connection from pool"""
+def get_pool(pool_name=PRIMARY_POOL):
+    """Return a registered pool, or None if it has not been created yet"""
+    return _pools.get(pool_name)
+
+def ensure_pool(pool_name=PRIMARY_POOL, db_config=None, warm=True):
+    """
+    Create the named pool once per process (thread-safe) and return it.
+    Every page calls this on load; only the first call opens connections.
+    """
+    pool = _pools.get(pool_name)
+    if pool is not None:
+        return pool
+
+    with _registry_lock:
+        pool = _pools.get(pool_name)
+        if pool is not None:
+            return pool
+        pool = ConnectionPool(
+            pool_name=pool_name,
+            db_config=db_config or DB_CONFIG,
+            **DB_POOL_CONFIG
+        )
+        _pools[pool_name] = pool
+
+    print(f"✅ Connection pool '{pool_name}' created")
+    if warm and DB_POOL_WARMUP:
+        try:
+            opened = pool.warm_up(DB_POOL_WARMUP)
+            print(f"✅ Pre-opened {opened} connection(s) for '{pool_name}'")
+        except Error as e:
+            _report_error(f"Database connection failed: {e}")
+    return pool
+
+def initialize_pool():
+    """Initialize MySQL connection pool (idempotent, kept for scripts)"""
+    ensure_pool()
+    return True
+
+def get_connection(pool_name=PRIMARY_POOL):
+    """
+    Get connection from pool (waits up to the configured pool timeout)
+    Inside transaction() this returns the transaction's shared connection.
+    The wait is recorded in the query stats under the calling service function.
+    """
+    timer = QueryTimer("get_connection()")
+    connection = _get_connection(pool_name)
+    timer.mark_wait()
+    timer.finish(error=connection is None)
+    return connection
+
+def _get_connection(pool_name=PRIMARY_POOL):
+    txn = getattr(_local, 'txn', None)
+    if txn is not None and pool_name == PRIMARY_POOL:
+        return txn.handle
     try:
-        if connection_pool is None:
-            initialize_pool()
-        return connection_pool.get_connection()
+        db_config = DB_REPLICA_CONFIG if pool_name == READ_POOL else None
+        return ensure_pool(pool_name, db_config).get_connection()
     except Error as e:
-        st.error(f"Failed to get database connection: {e}")
+        _report_error(f"Failed to get database connection: {e}")
         return None
 
-def execute_query(query, params=None, fetch=False, fetch_one=False):
+def in_transaction():
+    """True if the current thread is inside a transaction() block"""
+    return getattr(_local, 'txn', None) is not None
+
+def _rollback_quietly(connection):
+    try:
+        connection.rollback()
+    except Error:
+        connection.invalidate()
+
+@contextmanager
+def transaction():
+    """
+    Run several service calls on one connection with a single commit
+
+    Every execute_query / execute_many / get_connection call made inside the
+    block (on this thread) joins the transaction instead of checking out and
+    committing its own connection. Any exception rolls everything back; so
+    does a joined statement that failed and returned None, in which case
+    TransactionRolledBack is raised at the end of the block. Nested blocks
+    join the outer transaction.
+
+        with transaction():
+            patient_id = create_patient(...)
+            symptom_id = save_symptom(patient_id, text)
+
+    Yields:
+        The shared connection, for code that needs its own cursor
+    """
+    txn = getattr(_local, 'txn', None)
+    if txn is not None:
+        try:
+            yield txn.handle
+        except BaseException:
+            txn.rollback_only = True
+            raise
+        return
+
+    connection = _get_connection()
+    if not connection:
+        raise Error("Could not obtain a database connection for the transaction")
+
+    txn = _Transaction(connection)
+    _local.txn = txn
+    try:
+        yield txn.handle
+    except BaseException:
+        _rollback_quietly(connection)
+        raise
+    else:
+        if txn.rollback_only:
+            _rollback_quietly(connection)
+            raise TransactionRolledBack("A statement in the transaction failed; all changes were rolled back")
+        connection.commit()
+    finally:
+        _local.txn = None
+        connection.close()
+    # Only reached after a successful commit
+    for callback in txn.commit_hooks:
+        _run_commit_hook(callback)
+
+def on_commit(callback):
+    """
+    Run callback() once the current transaction() commits (immediately if there is none)
+    Callbacks of a rolled-back transaction are dropped. Used to publish changes
+    (e.g. to in-process caches) only after other connections can see them.
+    """
+    txn = getattr(_local, 'txn', None)
+    if txn is None:
+        _run_commit_hook(callback)
+    else:
+        txn.commit_hooks.append(callback)
+
+def _run_commit_hook(callback):
+    try:
+        callback()
+    except Exception as e:
+        print(f"⚠️ Commit hook failed: {e}")
+
+def get_pool_stats(pool_name=PRIMARY_POOL):
+    """Snapshot of pool usage: in-use, waiters, wait-time histogram, checkouts/sec"""
+    pool = _pools.get(pool_name)
+    return pool.stats() if pool else {}
+
+def get_all_pool_stats():
+    """Stats for every registered pool (primary and read replica)"""
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+def _is_idempotent_read(query):
+    """SELECT/SHOW statements can safely be re-run after a lost connection"""
+    return query.lstrip().upper().startswith(("SELECT", "SHOW", "WITH"))
+
+def _is_connection_lost(error):
+    return getattr(error, 'errno', None) in CONNECTION_LOST_ERRNOS
+
+def _close_quietly(cursor, connection):
+    """Close cursor and return connection to the pool, ignoring errors on dead links"""
+    if cursor:
+        try:
+            cursor.close()
+        except Error:
+            pass
+    if connection:
+        connection.close()
+
+def execute_query(query, params=None, fetch=False, fetch_one=False, prepared=False,
+                  read_only=None):
     """
     Execute SQL query with error handling
+    Read queries are retried once on a fresh connection if the server connection was lost
+    Joins the current transaction() if there is one (no separate commit)
+    prepared=True runs the query as a cached server-side prepared statement (hot paths)
+    read_only tags the query for read/write splitting (None = detect from the SQL)
+    Pool wait, execute and fetch times are recorded per statement fingerprint.
     """
-    connection = get_connection()
+    retryable = fetch and _is_idempotent_read(query) and not in_transaction()
+    use_read_pool = fetch and _use_read_pool(query, read_only)
+
+    for attempt in (1, 2):
+        timer = QueryTimer(query)
+        connection = _checkout(use_read_pool)
+        timer.mark_wait()
+        if not connection:
+            timer.finish(error=True)
+            return None
+
+        cursor = None
+        try:
+            if prepared:
+                cursor = connection.prepared_cursor(query)
+            else:
+                cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params or ())
+            timer.mark_execute()
+
+            if fetch:
+                if prepared:
+                    # Always drain a cached statement so it can be re-executed
+                    rows = cursor.fetchall()
+                    timer.mark_fetch(len(rows))
+                    return (rows[0] if rows else None) if fetch_one else rows
+                if fetch_one:
+                    result = cursor.fetchone()
+                    timer.mark_fetch(1 if result else 0)
+                else:
+                    result = cursor.fetchall()
+                    timer.mark_fetch(len(result))
+                return result
+            else:
+                connection.commit()
+                timer.mark_execute()
+                timer.rows = cursor.rowcount
+                return cursor.lastrowid
+
+        except Error as e:
+            timer.error = True
+            if prepared:
+                connection.forget_statement(query)
+            if _is_connection_lost(e):
+                connection.invalidate()
+                if retryable and attempt == 1:
+                    connection._pool.record_retry()
+                    print(f"⚠️ Connection lost, retrying query: {e}")
+                    continue
+            else:
+                connection.rollback()
+            print(f"Database error: {e}")
+            return None
+        finally:
+            # Cached prepared cursors stay open with their connection
+            _close_quietly(None if prepared else cursor, connection)
+            timer.finish()
+
+def _multi_row_statement(query, row_count):
+    """Expand a single-row INSERT into a `row_count`-row INSERT (None if not an INSERT ... VALUES)"""
+    match = _VALUES_RE.match(query)
+    if not match:
+        return None
+    rows = ", ".join([match.group('row')] * row_count)
+    return f"{match.group('head')}{rows}{match.group('tail')}"
+
+def execute_many(query, rows, chunk_size=None):
+    """
+    Execute one statement for many parameter rows with a single commit
+
+    INSERT/REPLACE ... VALUES (%s, ...) is sent as a multi-row INSERT, one round
+    trip per chunk of `chunk_size` rows (default DB_BATCH_SIZE). Other statements
+    fall back to executemany() inside the same transaction.
+
+    Args:
+        query (str): Single-row statement with %s placeholders
+        rows (iterable): Parameter tuples, one per row
+        chunk_size (int): Rows per round trip (optional)
+
+    Returns:
+        int: Total affected rows, or None on error (nothing is committed)
+    """
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+    chunk_size = chunk_size or DB_BATCH_SIZE
+
+    timer = QueryTimer(query)
+    connection = _get_connection()
+    timer.mark_wait()
     if not connection:
+        timer.finish(error=True)
         return None
-    
+
     cursor = None
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(query, params or ())
-        
-        if fetch:
-            result = cursor.fetchone() if fetch_one else cursor.fetchall()
-            return result
-        else:
-            connection.commit()
-            return cursor.lastrowid
-            
+        cursor = connection.cursor()
+        affected = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            statement = _multi_row_statement(query, len(chunk))
+            if statement:
+                cursor.execute(statement, [value for row in chunk for value in row])
+            else:
+                cursor.executemany(query, chunk)
+            affected += cursor.rowcount
+        connection.commit()
+        timer.mark_execute()
+        timer.rows = affected
+        return affected
+
     except Error as e:
-        connection.rollback()
-        print(f"Database error: {e}")
+        timer.error = True
+        if _is_connection_lost(e):
+            connection.invalidate()
+        else:
+            connection.rollback()
+        print(f"Database error (batch of {len(rows)} rows): {e}")
         return None
     finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
+        _close_quietly(cursor, connection)
+        timer.finish()
+
+def _abandon_stream(connection):
+    """Stop reading an unfinished result: drop the connection, or drain it if a transaction still needs it"""
+    if not in_transaction():
+        connection.invalidate()
+        return
+    try:
+        connection.consume_results()
+    except Error:
+        connection.invalidate()
+
+def stream_query(query, params=None, batch_size=1000, row_format='dict'):
+    """
+    Stream a large result set without loading it into memory
+
+    Rows are read from the server with an unbuffered cursor in batches of
+    `batch_size`; the pooled connection is held only while the iterator is
+    live and is returned when it is exhausted or closed. Abandoning the
+    iterator early drops the connection rather than draining remaining rows.
+
+    Args:
+        query (str): SELECT statement
+        params (tuple): Query parameters (optional)
+        batch_size (int): Rows fetched per round trip
+        row_format (str): 'dict' (one dict per row), 'tuple' (one tuple per row)
+                          or 'columns' (one {column: [values]} dict per batch)
+
+    Yields:
+        dict | tuple: Rows, or column arrays per batch
+
+    Raises:
+        ValueError: Unknown row_format (at the call, before any row is consumed)
+        Error: if the query fails part-way (so exports are never silently truncated)
+    """
+    if row_format not in ('dict', 'tuple', 'columns'):
+        raise ValueError(f"Unknown row_format: {row_format}")
+    return _stream_rows(query, params, batch_size, row_format)
+
+def _stream_rows(query, params, batch_size, row_format):
+    """Generator behind stream_query() (arguments already checked)"""
+    timer = QueryTimer(query)
+    connection = _checkout(_use_read_pool(query))
+    timer.mark_wait()
+    if not connection:
+        timer.finish(error=True)
+        return
+
+    cursor = None
+    finished = False
+    try:
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(query, params or ())
+        timer.mark_execute()
+        columns = cursor.column_names
+
+        while True:
+            timer.resume()  # don't bill the consumer's processing time as fetch time
+            batch = cursor.fetchmany(batch_size)
+            timer.mark_fetch(len(batch))
+            if not batch:
+                break
+            if row_format == 'tuple':
+                yield from batch
+            elif row_format == 'dict':
+                for row in batch:
+                    yield dict(zip(columns, row))
+            else:
+                yield {col: [row[i] for row in batch] for i, col in enumerate(columns)}
+        finished = True
+
+    except Error as e:
+        timer.error = True
+        print(f"Database error while streaming: {e}")
+        raise
+    finally:
+        if not finished:
+            _abandon_stream(connection)
+        _close_quietly(cursor, connection)
+        timer.finish()
 
 # Test function
 def test_connection():
@@ -0,0 +1,185 @@
+"""
+Query Instrumentation
+Per-statement timing (pool wait, execute, fetch), row counts and a slow-query log
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from config import DB_SLOW_QUERY_MS, DB_SLOW_LOG_SIZE
+from database.metrics import Histogram
+
+_COMMENT_RE = re.compile(r"(--[^\n]*|/\*.*?\*/)", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST_RE = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Normalize a statement so every execution of the same query shape groups together:
+    literals and placeholders become ?, IN lists and multi-row VALUES collapse.
+    """
+    text = _COMMENT_RE.sub(" ", sql)
+    text = _STRING_RE.sub("?", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("IN (?+)", text)
+    text = _VALUES_LIST_RE.sub(r"VALUES \1 /* x N */", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def calling_function():
+    """Name of the service function (or first caller outside the DB layer) issuing a query"""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('services.'):
+            return f"{module}.{frame.f_code.co_name}"
+        if fallback is None and not module.startswith(('database.', 'contextlib')):
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+class _StatementStats:
+    """Aggregates for one statement fingerprint"""
+
+    def __init__(self, fp):
+        self.fingerprint = fp
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.callers = set()
+        self.total_ms = Histogram()
+        self.wait_ms = Histogram()
+        self.execute_ms = Histogram()
+        self.fetch_ms = Histogram()
+
+
+_stats = {}
+_slow_log = deque(maxlen=DB_SLOW_LOG_SIZE)
+_lock = threading.Lock()
+
+
+class QueryTimer:
+    """
+    Stopwatch for one query: call mark_*() as each phase ends, then finish().
+
+        timer = QueryTimer(sql)
+        conn = checkout(); timer.mark_wait()
+        cursor.execute(...); timer.mark_execute()
+        rows = cursor.fetchall(); timer.mark_fetch(len(rows))
+        timer.finish()
+    """
+
+    def __init__(self, sql, caller=None):
+        self.sql = sql
+        self.caller = caller or calling_function()
+        self.wait_ms = self.execute_ms = self.fetch_ms = 0.0
+        self.rows = 0
+        self.error = False
+        self._last = time.perf_counter()
+
+    def _lap(self):
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000
+        self._last = now
+        return elapsed
+
+    def resume(self):
+        """Restart the lap clock without billing the elapsed time to any phase"""
+        self._last = time.perf_counter()
+
+    def mark_wait(self):
+        self.wait_ms += self._lap()
+
+    def mark_execute(self):
+        self.execute_ms += self._lap()
+
+    def mark_fetch(self, rows=0):
+        self.fetch_ms += self._lap()
+        self.rows += rows
+
+    def finish(self, error=False):
+        self.error = self.error or error
+        record_query(self)
+
+
+def record_query(timer):
+    """Fold a finished QueryTimer into the per-fingerprint stats and the slow log"""
+    fp = fingerprint(timer.sql)
+    total_ms = timer.wait_ms + timer.execute_ms + timer.fetch_ms
+
+    with _lock:
+        entry = _stats.get(fp)
+        if entry is None:
+            entry = _stats[fp] = _StatementStats(fp)
+        entry.calls += 1
+        entry.errors += 1 if timer.error else 0
+        entry.rows += timer.rows
+        entry.callers.add(timer.caller)
+
+    entry.total_ms.observe(total_ms)
+    entry.wait_ms.observe(timer.wait_ms)
+    entry.execute_ms.observe(timer.execute_ms)
+    entry.fetch_ms.observe(timer.fetch_ms)
+
+    if total_ms >= DB_SLOW_QUERY_MS:
+        _slow_log.append({
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'caller': timer.caller,
+            'total_ms': round(total_ms, 2),
+            'wait_ms': round(timer.wait_ms, 2),
+            'execute_ms': round(timer.execute_ms, 2),
+            'fetch_ms': round(timer.fetch_ms, 2),
+            'rows': timer.rows,
+            'fingerprint': fp
+        })
+        print(f"🐢 Slow query ({total_ms:.0f} ms) from {timer.caller}: {fp[:120]}")
+
+
+def get_query_stats():
+    """Per-statement summary rows, slowest total time first"""
+    with _lock:
+        entries = [(entry, sorted(entry.callers)) for entry in _stats.values()]
+
+    rows = []
+    for entry, callers in entries:
+        total = entry.total_ms.snapshot()
+        rows.append({
+            'fingerprint': entry.fingerprint,
+            'callers': ', '.join(callers),
+            'calls': entry.calls,
+            'errors': entry.errors,
+            'rows': entry.rows,
+            'total_ms': total['sum'],
+            'avg_ms': total['avg'],
+            'max_ms': total['max'],
+            'avg_wait_ms': entry.wait_ms.snapshot()['avg'],
+            'avg_execute_ms': entry.execute_ms.snapshot()['avg'],
+            'avg_fetch_ms': entry.fetch_ms.snapshot()['avg'],
+            'latency_buckets_ms': total['buckets']
+        })
+    rows.sort(key=lambda r: r['total_ms'], reverse=True)
+    return rows
+
+
+def get_slow_queries(limit=50):
+    """Most recent slow-query log entries, newest first"""
+    return list(_slow_log)[::-1][:limit]
+
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
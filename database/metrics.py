@@ -0,0 +1,77 @@
+"""
+Metrics Primitives
+Thread-safe histograms and rate meters used by the database layer
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Default latency buckets in milliseconds (upper bounds, last bucket is +Inf)
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record a single observation."""
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self):
+        """Return a point-in-time copy of the histogram."""
+        with self._lock:
+            counts = list(self._counts)
+            count, total, peak = self._count, self._sum, self._max
+
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            'count': count,
+            'sum': round(total, 3),
+            'avg': round(total / count, 3) if count else 0.0,
+            'max': round(peak, 3),
+            'buckets': dict(zip(labels, counts))
+        }
+
+
+class RateMeter:
+    """Events per second over a sliding time window."""
+
+    def __init__(self, window_seconds=60):
+        self.window = window_seconds
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def mark(self):
+        """Record one event now."""
+        now = time.monotonic()
+        with self._lock:
+            self._events.append(now)
+            self._trim(now)
+
+    def rate(self):
+        """Events per second over the window."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            return round(len(self._events) / self.window, 3)
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._events and self._events[0] < cutoff:
+            self._events.popleft()
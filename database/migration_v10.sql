@@ -0,0 +1,43 @@
+-- ============================================================
+-- Migration: Daily appointment rollup for analytics
+-- Run this AFTER migration_v9.sql
+-- ============================================================
+USE healthcare_db;
+
+-- Appointment counts per (day, doctor, urgency level, status). Days up to
+-- rollup_state.closed_through are aggregated once; later days (today and
+-- future bookings) are grouped live and merged in the same query
+-- (services/analytics_rollup.py). Service-layer writes to a closed day add
+-- their delta in the same transaction. Close finished days nightly and
+-- verify with:
+--   python -m services.analytics_rollup close
+--   python -m services.analytics_rollup check [--repair]
+CREATE TABLE IF NOT EXISTS appointment_daily_rollup (
+    rollup_date DATE NOT NULL,
+    doctor_id INT NOT NULL,
+    urgency_level INT NOT NULL,
+    status ENUM('Pending', 'Confirmed', 'Completed', 'Cancelled') NOT NULL,
+    appointments INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (rollup_date, doctor_id, urgency_level, status)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    rollup_name VARCHAR(40) PRIMARY KEY,
+    closed_through DATE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Backfill every day before today (re-running re-aggregates them)
+DELETE FROM appointment_daily_rollup WHERE rollup_date < CURDATE();
+
+INSERT INTO appointment_daily_rollup (rollup_date, doctor_id, urgency_level, status, appointments)
+SELECT appointment_date, doctor_id, urgency_level, status, COUNT(*)
+FROM appointments
+WHERE appointment_date < CURDATE()
+GROUP BY appointment_date, doctor_id, urgency_level, status;
+
+INSERT INTO rollup_state (rollup_name, closed_through)
+VALUES ('appointment_daily', CURDATE() - INTERVAL 1 DAY)
+ON DUPLICATE KEY UPDATE closed_through = VALUES(closed_through);
+
+SELECT 'Migration v10 completed successfully!' AS status;
@@ -0,0 +1,51 @@
+-- ============================================================
+-- Migration: Per-doctor-per-day slot bitmap
+-- Run this AFTER migration_v2.sql
+-- ============================================================
+USE healthcare_db;
+
+-- 12. Doctor Day Slots (one row per doctor per day)
+-- Bit i of taken_mask = 30-minute slot i of the 9:00-17:00 grid is booked
+-- (bit 0 = 09:00, bit 15 = 16:30). The row is locked while a slot is claimed,
+-- so concurrent bookings for the same doctor/day serialize on it.
+CREATE TABLE IF NOT EXISTS doctor_day_slots (
+    doctor_id INT NOT NULL,
+    slot_date DATE NOT NULL,
+    taken_mask SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (doctor_id, slot_date),
+    FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id) ON DELETE CASCADE
+);
+
+-- Cancelled appointments no longer hold their slot:
+-- the unique key moves to a generated column that is NULL once cancelled
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+                   WHERE TABLE_SCHEMA = 'healthcare_db'
+                   AND TABLE_NAME = 'appointments'
+                   AND COLUMN_NAME = 'active_slot');
+SET @sql = IF(@col_exists = 0,
+              'ALTER TABLE appointments
+                   ADD COLUMN active_slot TIME
+                       AS (IF(status = ''Cancelled'', NULL, appointment_time)) STORED,
+                   DROP INDEX unique_doctor_slot,
+                   ADD UNIQUE KEY unique_active_doctor_slot (doctor_id, appointment_date, active_slot)',
+              'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Backfill the bitmap from existing (non-cancelled, on-grid) appointments;
+-- "occupied" = status != 'Cancelled', as slot_service.OCCUPIES_SLOT and the load index
+INSERT INTO doctor_day_slots (doctor_id, slot_date, taken_mask)
+SELECT
+    doctor_id,
+    appointment_date,
+    BIT_OR(1 << ((TIME_TO_SEC(appointment_time) - 32400) DIV 1800))
+FROM appointments
+WHERE status != 'Cancelled'
+  AND appointment_time >= '09:00:00' AND appointment_time < '17:00:00'
+  AND MOD(TIME_TO_SEC(appointment_time) - 32400, 1800) = 0
+GROUP BY doctor_id, appointment_date
+ON DUPLICATE KEY UPDATE taken_mask = VALUES(taken_mask);
+
+SELECT 'Migration v3 completed successfully!' AS status;
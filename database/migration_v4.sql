@@ -0,0 +1,21 @@
+-- ============================================================
+-- Migration: Version counters for the in-process doctor load index
+-- Run this AFTER migration_v3.sql
+-- ============================================================
+USE healthcare_db;
+
+-- 13. Doctor Load Versions (one row per specialization per date)
+-- Every booking, cancellation and reschedule bumps the row for the doctor's
+-- specialization and date in the same transaction. Workers compare it with
+-- the version their cached heap was built from and rebuild when another
+-- worker has changed that day.
+CREATE TABLE IF NOT EXISTS doctor_load_versions (
+    spec_id INT NOT NULL,
+    slot_date DATE NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (spec_id, slot_date),
+    FOREIGN KEY (spec_id) REFERENCES specializations(spec_id) ON DELETE CASCADE
+);
+
+SELECT 'Migration v4 completed successfully!' AS status;
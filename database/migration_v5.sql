@@ -0,0 +1,20 @@
+-- ============================================================
+-- Migration: Index for the appointment change feed
+-- Run this AFTER migration_v4.sql
+-- ============================================================
+USE healthcare_db;
+
+-- get_appointment_changes() scans appointments by (updated_at, appointment_id)
+-- after a cursor; without this index every poll is a full table scan.
+SET @idx_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                   WHERE TABLE_SCHEMA = 'healthcare_db'
+                   AND TABLE_NAME = 'appointments'
+                   AND INDEX_NAME = 'idx_updated');
+SET @sql = IF(@idx_exists = 0,
+              'ALTER TABLE appointments ADD INDEX idx_updated (updated_at, appointment_id)',
+              'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration v5 completed successfully!' AS status;
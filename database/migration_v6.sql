@@ -0,0 +1,25 @@
+-- ============================================================
+-- Migration: Indexes for keyset pagination of appointment listings
+-- Run this AFTER migration_v5.sql
+-- ============================================================
+USE healthcare_db;
+
+-- Each listing seeks past the last row's sort key, so its full sort order
+-- must be an index: the page is then a short range read however deep it is.
+--   queue:   urgency DESC, date, time, id
+--   doctor:  doctor_id, then the queue order
+--   patient: patient_id, date DESC, time DESC, id DESC
+SET @has_queue = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                  WHERE TABLE_SCHEMA = 'healthcare_db' AND TABLE_NAME = 'appointments'
+                  AND INDEX_NAME = 'idx_queue_order');
+SET @sql = IF(@has_queue = 0,
+              'ALTER TABLE appointments
+                   ADD INDEX idx_queue_order (urgency_level DESC, appointment_date, appointment_time, appointment_id),
+                   ADD INDEX idx_doctor_queue (doctor_id, urgency_level DESC, appointment_date, appointment_time, appointment_id),
+                   ADD INDEX idx_patient_history (patient_id, appointment_date DESC, appointment_time DESC, appointment_id DESC)',
+              'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration v6 completed successfully!' AS status;
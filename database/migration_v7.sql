@@ -0,0 +1,32 @@
+-- ============================================================
+-- Migration: Indexes for [start, end) date-range filters
+-- Run this AFTER migration_v6.sql
+-- ============================================================
+USE healthcare_db;
+
+-- Range predicates only help when the column leads an index:
+--   appointments.appointment_date  (queue / analytics ranges without a doctor or patient)
+--   predictions.created_at         (disease distribution by period)
+-- symptoms.submitted_at (idx_submitted), audit_log.performed_at (idx_time) and the
+-- doctor/patient listings (idx_doctor_date, idx_patient_history) are already covered.
+SET @has_date = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                 WHERE TABLE_SCHEMA = 'healthcare_db' AND TABLE_NAME = 'appointments'
+                 AND INDEX_NAME = 'idx_appointment_date');
+SET @sql = IF(@has_date = 0,
+              'ALTER TABLE appointments ADD INDEX idx_appointment_date (appointment_date)',
+              'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_created = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+                    WHERE TABLE_SCHEMA = 'healthcare_db' AND TABLE_NAME = 'predictions'
+                    AND INDEX_NAME = 'idx_created');
+SET @sql = IF(@has_created = 0,
+              'ALTER TABLE predictions ADD INDEX idx_created (created_at)',
+              'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration v7 completed successfully!' AS status;
@@ -0,0 +1,71 @@
+-- ============================================================
+-- Migration: Denormalized appointment queue read model
+-- Run this AFTER migration_v7.sql
+-- ============================================================
+USE healthcare_db;
+
+-- One flattened row per appointment (every status), written by the service
+-- layer in the same transaction as the appointment (services/queue_view.py).
+-- The queue and doctor listings read it as a single-table range scan
+-- instead of the six-table JOIN. Rebuild / verify at any time with:
+--   python -m services.queue_view rebuild
+--   python -m services.queue_view check [--repair]
+CREATE TABLE IF NOT EXISTS appointment_queue_view (
+    appointment_id INT PRIMARY KEY,
+    patient_id INT NOT NULL,
+    doctor_id INT NOT NULL,
+    symptom_id INT NOT NULL,
+    spec_id INT NOT NULL,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    status ENUM('Pending', 'Confirmed', 'Completed', 'Cancelled') NOT NULL,
+    mode ENUM('Online', 'Offline') NOT NULL,
+    urgency_level INT NOT NULL,
+    patient_name VARCHAR(100),
+    age INT,
+    gender ENUM('Male', 'Female', 'Other') NOT NULL,
+    phone VARCHAR(15),
+    allergies TEXT,
+    symptom_text TEXT NOT NULL,
+    predicted_disease VARCHAR(100) NOT NULL,
+    probability DECIMAL(5,2),
+    urgency_reason TEXT,
+    doctor_name VARCHAR(100) NOT NULL,
+    qualification VARCHAR(100),
+    specialization VARCHAR(50) NOT NULL,
+    appointment_code VARCHAR(20) NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    -- Deleted appointments (patient removal cascades) leave the view too
+    FOREIGN KEY (appointment_id) REFERENCES appointments(appointment_id) ON DELETE CASCADE,
+    -- Queue: status IN (...) AND date range, most urgent first
+    INDEX idx_status_date (status, appointment_date, urgency_level DESC),
+    -- Doctor portal: same keyset order as appointments.idx_doctor_queue / idx_doctor_date
+    INDEX idx_doctor_queue (doctor_id, urgency_level DESC, appointment_date, appointment_time, appointment_id),
+    INDEX idx_doctor_date (doctor_id, appointment_date),
+    -- Refresh after a patient or prediction change
+    INDEX idx_patient (patient_id),
+    INDEX idx_symptom (symptom_id)
+);
+
+-- Backfill (same SELECT as services/queue_view.py; a symptom's latest prediction wins)
+INSERT IGNORE INTO appointment_queue_view
+(appointment_id, patient_id, doctor_id, symptom_id, spec_id, appointment_date, appointment_time,
+ status, mode, urgency_level, patient_name, age, gender, phone, allergies, symptom_text,
+ predicted_disease, probability, urgency_reason, doctor_name, qualification, specialization,
+ appointment_code)
+SELECT
+    a.appointment_id, a.patient_id, a.doctor_id, a.symptom_id, d.spec_id,
+    a.appointment_date, a.appointment_time, a.status, a.mode, a.urgency_level,
+    p.full_name, p.age, p.gender, p.phone, p.allergies, s.symptom_text,
+    pred.predicted_disease, pred.probability, pred.urgency_reason,
+    d.name, d.qualification, spec.spec_name,
+    CONCAT('APT-', LPAD(a.appointment_id, 3, '0'))
+FROM appointments a
+INNER JOIN patients p ON a.patient_id = p.patient_id
+INNER JOIN symptoms s ON a.symptom_id = s.symptom_id
+INNER JOIN predictions pred ON pred.prediction_id =
+    (SELECT MAX(prediction_id) FROM predictions WHERE symptom_id = a.symptom_id)
+INNER JOIN doctors d ON a.doctor_id = d.doctor_id
+INNER JOIN specializations spec ON d.spec_id = spec.spec_id;
+
+SELECT 'Migration v8 completed successfully!' AS status;
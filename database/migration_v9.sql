@@ -0,0 +1,40 @@
+-- ============================================================
+-- Migration: Incrementally maintained dashboard counters
+-- Run this AFTER migration_v8.sql
+-- ============================================================
+USE healthcare_db;
+
+-- One row per (metric, bucket). All-time totals use bucket '1000-01-01';
+-- per-day counters use the day. The service layer adds deltas in the same
+-- transaction as each write (services/metric_counters.py), so the dashboard
+-- cards are primary-key reads. Recount nightly:
+--   python -m services.metric_counters reconcile --days 2
+CREATE TABLE IF NOT EXISTS metric_counters (
+    metric VARCHAR(40) NOT NULL,
+    bucket DATE NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (metric, bucket)
+);
+
+-- Backfill (same recounts as reconcile(); re-running the migration resets to the recount)
+INSERT INTO metric_counters (metric, bucket, value)
+SELECT 'patients', '1000-01-01', COUNT(*) FROM patients
+UNION ALL
+SELECT 'appointments', '1000-01-01', COUNT(*) FROM appointments
+UNION ALL
+SELECT 'medical_records', '1000-01-01', COUNT(*) FROM medical_records
+UNION ALL
+SELECT 'feedback', '1000-01-01', COUNT(*) FROM feedback
+UNION ALL
+SELECT 'confirmed', appointment_date, COUNT(*) FROM appointments
+WHERE status = 'Confirmed' GROUP BY appointment_date
+UNION ALL
+SELECT 'confirmed_high', appointment_date, COUNT(*) FROM appointments
+WHERE status = 'Confirmed' AND urgency_level >= 8 GROUP BY appointment_date
+UNION ALL
+SELECT 'symptoms', DATE(submitted_at), COUNT(*) FROM symptoms
+GROUP BY DATE(submitted_at)
+ON DUPLICATE KEY UPDATE value = VALUES(value);
+
+SELECT 'Migration v9 completed successfully!' AS status;
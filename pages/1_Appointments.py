@@ -3,14 +3,18 @@ Appointment Queue Dashboard
 Real-time appointment management with urgency-based sorting
 """
 
+import uuid
 import streamlit as st
 from datetime import date, timedelta
-from database.connection import initialize_pool
+from database.connection import ensure_pool, bind_session, register_error_hook
 from services.appointment_service import (
-    get_appointment_queue, get_appointment_statistics,
+    get_appointment_queue_page, get_appointment_details, get_appointment_statistics,
     get_all_specializations
 )
 from services.gemini_service import get_urgency_label, get_urgency_color
+from services.metric_counters import get_metrics
+from services.queue_engine import get_queue_engine
+from config import LIST_PAGE_SIZE
 import time
 
 # Page config
@@ -20,13 +24,11 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize database
-@st.cache_resource
-def init_database():
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # Custom CSS
 st.markdown("""
@@ -73,6 +75,9 @@ with col_refresh1:
 
 with col_refresh2:
     if st.button("🔃 Refresh Now", use_container_width=True):
+        # Pull pending changes only: the engine is shared, so a full reload would hit every session
+        get_queue_engine().poll_now()
+        st.session_state.pop("queue_details", None)
         st.rerun()
 
 # Auto-refresh logic
@@ -86,21 +91,22 @@ if auto_refresh:
 # Statistics
 st.markdown("### 📈 Today's Statistics")
 
-stats = get_appointment_statistics()
+stats = get_appointment_statistics() or {}
+counters = get_metrics()  # today's cards: counter rows, not a scan of today's appointments
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     st.metric(
         label="Total Appointments",
-        value=stats.get('today_total', 0),
+        value=counters['confirmed'],
         delta="Today"
     )
 
 with col2:
     st.metric(
         label="High Priority",
-        value=stats.get('today_high_priority', 0),
+        value=counters['confirmed_high'],
         delta="Urgent cases",
         delta_color="inverse"
     )
@@ -152,15 +158,53 @@ with col_f4:
 
 st.divider()
 
-# Fetch appointments
-appointments = get_appointment_queue(
+# Pagination state: back to page 1 whenever the filters change
+filters = (date_filter, urgency_filter_value, spec_filter_value)
+pager = st.session_state.setdefault("queue_pager", {'filters': filters, 'token': None, 'page': 1})
+if pager['filters'] != filters:
+    pager.update(filters=filters, token=None, page=1)
+
+
+def render_pager(page_result, key):
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=not page_result['prev_token'],
+                     use_container_width=True):
+            pager.update(token=page_result['prev_token'], page=pager['page'] - 1)
+            st.rerun()
+    with col_page:
+        st.markdown(f"<div style='text-align: center;'>Page {pager['page']}</div>", unsafe_allow_html=True)
+    with col_next:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=not page_result['next_token'],
+                     use_container_width=True):
+            pager.update(token=page_result['next_token'], page=pager['page'] + 1)
+            st.rerun()
+
+
+# Fetch one page of the queue (summary rows: no symptom / reason TEXT)
+page_result = get_appointment_queue_page(
     date_filter=date_filter,
     urgency_filter=urgency_filter_value,
-    specialization_filter=spec_filter_value
-)
+    specialization_filter=spec_filter_value,
+    token=pager['token'],
+    columns='summary'
+) or {'rows': [], 'next_token': None, 'prev_token': None}
+appointments = page_result['rows']
+offset = (pager['page'] - 1) * LIST_PAGE_SIZE
+
+# Symptom / reason text for the cards that show it, fetched once per appointment and
+# kept in the session across auto-refreshes (only for the rows on this page)
+cached_details = st.session_state.get("queue_details", {})
+details = {}
+if view_mode == "Cards":
+    detail_ids = [a['appointment_id'] for a in appointments if a['urgency_level'] >= 4]
+    details = {i: cached_details[i] for i in detail_ids if i in cached_details}
+    details.update(get_appointment_details([i for i in detail_ids if i not in details]))
+st.session_state.queue_details = details
 
 # Display count
-st.markdown(f"### 📋 Appointment Queue ({len(appointments)} appointments)")
+st.markdown(f"### 📋 Appointment Queue (page {pager['page']}, {len(appointments)} appointments)")
+render_pager(page_result, "top")
 
 if not appointments:
     st.info("ℹ️ No appointments found with the selected filters.")
@@ -184,7 +228,7 @@ else:
                     col_a, col_b = st.columns([3, 1])
                     
                     with col_a:
-                        st.markdown(f"### #{i} - {apt['appointment_code']}")
+                        st.markdown(f"### #{offset + i} - {apt['appointment_code']}")
                         st.markdown(f"**👤 Patient:** {apt['patient_name']} ({apt['age']}, {apt['gender']})")
                         st.markdown(f"**📱 Phone:** {apt['phone']}")
                     
@@ -193,9 +237,10 @@ else:
                         st.markdown(f"**Status:** {apt['status']}")
                     
                     with st.expander("🩺 View Details"):
-                        st.markdown(f"**Symptoms:**  \n{apt['symptom_text'][:200]}...")
+                        detail = details.get(apt['appointment_id'], {})
+                        st.markdown(f"**Symptoms:**  \n{(detail.get('symptom_text') or '')[:200]}...")
                         st.markdown(f"**🤖 AI Diagnosis:** {apt['predicted_disease']} ({apt['probability']}%)")
-                        st.markdown(f"**Urgency Reason:** {apt['urgency_reason']}")
+                        st.markdown(f"**Urgency Reason:** {detail.get('urgency_reason')}")
                         st.markdown(f"**👨‍⚕️ Doctor:** Dr. {apt['doctor_name']} ({apt['specialization']})")
                         st.markdown(f"**📅 Scheduled:** {apt['appointment_date']} at {apt['appointment_time']}")
                         st.markdown(f"**💻 Mode:** {apt['mode']}")
@@ -215,14 +260,15 @@ else:
                     col_a, col_b = st.columns([3, 1])
                     
                     with col_a:
-                        st.markdown(f"### #{len(high_priority) + i} - {apt['appointment_code']}")
+                        st.markdown(f"### #{offset + len(high_priority) + i} - {apt['appointment_code']}")
                         st.markdown(f"**👤 Patient:** {apt['patient_name']} ({apt['age']}, {apt['gender']})")
                     
                     with col_b:
                         st.markdown(f"### 🟡 {apt['urgency_level']}/10")
                     
                     with st.expander("🩺 View Details"):
-                        st.markdown(f"**Symptoms:** {apt['symptom_text'][:150]}...")
+                        detail = details.get(apt['appointment_id'], {})
+                        st.markdown(f"**Symptoms:** {(detail.get('symptom_text') or '')[:150]}...")
                         st.markdown(f"**🤖 AI Diagnosis:** {apt['predicted_disease']} ({apt['probability']}%)")
                         st.markdown(f"**👨‍⚕️ Doctor:** Dr. {apt['doctor_name']} ({apt['specialization']})")
                         st.markdown(f"**📅 Scheduled:** {apt['appointment_date']} at {apt['appointment_time']}")
@@ -242,7 +288,7 @@ else:
                     col_a, col_b = st.columns([3, 1])
                     
                     with col_a:
-                        st.markdown(f"### #{len(high_priority) + len(medium_priority) + i} - {apt['appointment_code']}")
+                        st.markdown(f"### #{offset + len(high_priority) + len(medium_priority) + i} - {apt['appointment_code']}")
                         st.markdown(f"**👤 Patient:** {apt['patient_name']} | **🤖 Diagnosis:** {apt['predicted_disease']}")
                     
                     with col_b:
@@ -284,12 +330,16 @@ else:
         styled_df = display_df.style.applymap(color_urgency, subset=['Urgency'])
         
         st.dataframe(styled_df, use_container_width=True, height=600)
+    
+    render_pager(page_result, "bottom")
 
 # SQL Query Display (for DBMS demonstration)
 st.divider()
 
 with st.expander("💾 View Database Query (DBMS Demonstration)"):
     st.markdown("### Complex JOIN Query Used")
+    st.caption("Materialized per appointment into appointment_queue_view on every write; "
+               "the queue reads that one table.")
     st.code("""
 SELECT 
     a.appointment_id,
@@ -322,6 +372,7 @@ ORDER BY a.urgency_level DESC, a.appointment_date ASC;
     - ✅ Indexing on urgency_level (DESC) for performance
     - ✅ WHERE clause filtering
     - ✅ ORDER BY with multiple columns
+    - ✅ Denormalized read model kept in step with each write transaction
     - ✅ Aggregate data retrieval
     """)
 
@@ -3,11 +3,13 @@ Doctor Portal
 Login and view appointments assigned to the logged-in doctor
 """
 
+import uuid
 import streamlit as st
 from datetime import date, timedelta
-from database.connection import initialize_pool
+from database.connection import ensure_pool, bind_session, register_error_hook
 from services.appointment_service import (
-    get_appointments_by_doctor, get_doctor_by_name, update_appointment_status
+    get_appointments_by_doctor_page, get_appointment_details, get_doctor_appointment_counts, get_doctor_by_name,
+    update_appointment_status
 )
 from services.medical_service import (
     create_medical_record, add_prescriptions_bulk,
@@ -15,6 +17,8 @@ from services.medical_service import (
     get_doctor_avg_rating
 )
 from services.audit_service import log_action
+from services.change_feed import get_appointment_changes, get_change_token
+from services.query_helpers import day_range, week_range
 from services.gemini_service import get_urgency_label, get_urgency_color
 
 # Page config
@@ -24,13 +28,11 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize database
-@st.cache_resource
-def init_database():
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # ── Doctor credentials (lab project – hardcoded) ──
 DOCTOR_CREDENTIALS = {
@@ -152,6 +154,46 @@ def do_logout():
     st.session_state.doctor_logged_in = False
     st.session_state.doctor_name = None
     st.session_state.doctor_info = None
+    st.session_state.pop("doctor_appts", None)
+    st.session_state.pop("doctor_pager", None)
+
+
+def load_doctor_page(doctor_id, date_from, date_to, status_filter, token):
+    """
+    One page of the doctor's appointments, cached in the session
+    Each rerun polls the change feed (usually an empty result) and only
+    re-queries the page when one of its rows, or a row of this doctor,
+    changed. Own actions drop the cache so they show immediately.
+    Rows are 'summary' rows; page['details'] holds the symptom / reason /
+    allergy text, re-fetched only for appointments that are new or changed.
+    """
+    key = (doctor_id, date_from, date_to, status_filter, token)
+    cache = st.session_state.get("doctor_appts")
+    stale = cache is None or cache['key'] != key or not cache['feed_token']
+    changed = set()
+    if not stale:
+        feed = get_appointment_changes(cache['feed_token'])
+        while feed and not stale:
+            changed.update(row['appointment_id'] for row in feed['changes'])
+            stale = any(row['doctor_id'] == doctor_id or row['appointment_id'] in cache['ids']
+                        for row in feed['changes'])
+            cache['feed_token'] = feed['token']
+            feed = get_appointment_changes(feed['token']) if feed['has_more'] else None
+    if stale:
+        feed_token = get_change_token()
+        page = get_appointments_by_doctor_page(doctor_id, status_filter=status_filter, token=token,
+                                               date_from=date_from, date_to=date_to, columns='summary') \
+            or {'rows': [], 'next_token': None, 'prev_token': None}
+        page['counts'] = get_doctor_appointment_counts(doctor_id, status_filter=status_filter,
+                                                       date_from=date_from, date_to=date_to)
+        ids = [r['appointment_id'] for r in page['rows']]
+        old = cache['page']['details'] if cache else {}
+        details = {i: old[i] for i in ids if i in old and i not in changed}
+        details.update(get_appointment_details([i for i in ids if i not in details]))
+        page['details'] = details
+        cache = {'key': key, 'feed_token': feed_token, 'page': page, 'ids': set(ids)}
+        st.session_state.doctor_appts = cache
+    return cache['page']
 
 
 # ╭───────────────────────────────────────────────╮
@@ -219,13 +261,14 @@ st.markdown("### 🔍 Filter Your Appointments")
 col_f1, col_f2, col_f3 = st.columns(3)
 
 with col_f1:
+    # [start, end) ranges: compiled to index-friendly appointment_date predicates
     date_options = {
-        "Today": date.today(),
-        "Tomorrow": date.today() + timedelta(days=1),
-        "This Week": None,          # None = no date filter
+        "Today": day_range(date.today()),
+        "Tomorrow": day_range(date.today() + timedelta(days=1)),
+        "This Week": week_range(date.today()),
     }
     sel_date_label = st.selectbox("📅 Date", list(date_options.keys()))
-    date_filter = date_options[sel_date_label]
+    date_from, date_to = date_options[sel_date_label]
 
 with col_f2:
     status_filter = st.selectbox("📌 Status", ["All", "Confirmed", "Pending", "Completed", "Cancelled"])
@@ -234,22 +277,30 @@ with col_f3:
     view_mode = st.selectbox("👁️ View", ["Cards", "Table"])
 
 if st.button("🔃 Refresh", use_container_width=False):
+    st.session_state.pop("doctor_appts", None)
     st.rerun()
 
 st.divider()
 
-# ── Fetch appointments ──
-appointments = get_appointments_by_doctor(
+# ── Pagination: back to page 1 whenever the filters change ──
+filters = (date_from, date_to, status_filter)
+pager = st.session_state.setdefault("doctor_pager", {'filters': filters, 'token': None, 'page': 1})
+if pager['filters'] != filters:
+    pager.update(filters=filters, token=None, page=1)
+
+# ── Fetch one page of appointments (re-queried only when the change feed touches it) ──
+page_result = load_doctor_page(
     doctor_id=doctor['doctor_id'],
-    date_filter=date_filter,
+    date_from=date_from,
+    date_to=date_to,
     status_filter=status_filter,
+    token=pager['token'],
 )
+appointments = page_result['rows']
 
-# ── Quick stats ──
-total = len(appointments)
-high = sum(1 for a in appointments if a['urgency_level'] >= 8)
-medium = sum(1 for a in appointments if 4 <= a['urgency_level'] < 8)
-low = sum(1 for a in appointments if a['urgency_level'] < 4)
+# ── Quick stats (whole filtered list, not just this page) ──
+counts = page_result['counts']
+total, high, medium, low = counts['total'], counts['high'], counts['medium'], counts['low']
 
 st.markdown(f"""
 <div class="stat-row">
@@ -273,7 +324,26 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 st.divider()
-st.markdown(f"### 📋 Your Appointments ({total})")
+st.markdown(f"### 📋 Your Appointments ({total}, page {pager['page']})")
+
+
+def render_pager(key):
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=not page_result['prev_token'],
+                     use_container_width=True):
+            pager.update(token=page_result['prev_token'], page=pager['page'] - 1)
+            st.rerun()
+    with col_page:
+        st.markdown(f"<div style='text-align: center;'>Page {pager['page']}</div>", unsafe_allow_html=True)
+    with col_next:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=not page_result['next_token'],
+                     use_container_width=True):
+            pager.update(token=page_result['next_token'], page=pager['page'] + 1)
+            st.rerun()
+
+
+render_pager("top")
 
 if not appointments:
     st.info("ℹ️ No appointments found for the selected filters.")
@@ -306,14 +376,15 @@ else:
                     st.markdown(f"**Mode:** {apt['mode']}")
 
                 with st.expander("🩺 Full Details"):
+                    detail = page_result['details'].get(apt['appointment_id'], {})
                     det1, det2 = st.columns(2)
                     with det1:
-                        st.markdown(f"**Symptoms:**\n\n{apt['symptom_text']}")
-                        if apt.get('allergies') and apt['allergies'] != 'None':
-                            st.markdown(f"**⚠️ Allergies:** {apt['allergies']}")
+                        st.markdown(f"**Symptoms:**\n\n{detail.get('symptom_text')}")
+                        if detail.get('allergies') and detail['allergies'] != 'None':
+                            st.markdown(f"**⚠️ Allergies:** {detail['allergies']}")
                     with det2:
                         st.markdown(f"**🤖 AI Diagnosis:** {apt['predicted_disease']} ({apt['probability']}%)")
-                        st.markdown(f"**Urgency Reason:** {apt['urgency_reason']}")
+                        st.markdown(f"**Urgency Reason:** {detail.get('urgency_reason')}")
                         st.markdown(f"**📅 Date:** {apt['appointment_date']}")
                         st.markdown(f"**🕐 Time:** {apt['appointment_time']}")
 
@@ -328,6 +399,7 @@ else:
                                        st.session_state.doctor_name,
                                        f'status={apt["status"]}', 'status=Completed',
                                        f'{apt["appointment_code"]} marked Completed')
+                            st.session_state.pop("doctor_appts", None)
                             st.rerun()
                     with act2:
                         if st.button("❌ Cancel", key=f"cancel_{aid}", use_container_width=True):
@@ -336,6 +408,7 @@ else:
                                        st.session_state.doctor_name,
                                        f'status={apt["status"]}', 'status=Cancelled',
                                        f'{apt["appointment_code"]} cancelled by doctor')
+                            st.session_state.pop("doctor_appts", None)
                             st.rerun()
                     with act3:
                         if st.button("🚫 No-show", key=f"noshow_{aid}", use_container_width=True):
@@ -344,6 +417,7 @@ else:
                                        st.session_state.doctor_name,
                                        f'status={apt["status"]}', 'status=Cancelled',
                                        f'{apt["appointment_code"]} marked No-show')
+                            st.session_state.pop("doctor_appts", None)
                             st.rerun()
 
                 # ── Post-Consultation (only for Completed) ──
@@ -397,6 +471,7 @@ else:
                                                    st.session_state.doctor_name,
                                                    description=f'Medical record created for {apt["appointment_code"]}')
                                         st.success("✅ Medical record saved!")
+                                        st.session_state.pop("doctor_appts", None)
                                         st.rerun()
                                     else:
                                         st.error("❌ Failed to save medical record.")
@@ -429,6 +504,8 @@ else:
         styled = display_df.style.applymap(color_urgency, subset=['Urgency'])
         st.dataframe(styled, use_container_width=True, height=500)
 
+    render_pager("bottom")
+
 # ── Footer ──
 st.markdown("---")
 st.markdown(f"""
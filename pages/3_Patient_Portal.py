@@ -3,15 +3,17 @@ Patient Portal
 Login, view appointment history, cancel/reschedule, view prescriptions, give feedback
 """
 
+import uuid
 import streamlit as st
 from datetime import date, timedelta
-from database.connection import initialize_pool
+from database.connection import ensure_pool, bind_session, register_error_hook
 from services.patient_service import (
     get_patient_by_phone, verify_patient_login,
     patient_has_password, set_patient_password
 )
 from services.appointment_service import (
-    get_patient_appointments, cancel_appointment, reschedule_appointment
+    get_patient_appointments_page, get_patient_appointment_counts,
+    cancel_appointment, reschedule_appointment
 )
 from services.medical_service import (
     get_prescriptions_by_appointment, get_medical_record_by_appointment,
@@ -22,12 +24,11 @@ from services.audit_service import log_action
 # Page config
 st.set_page_config(page_title="Patient Portal", page_icon="👤", layout="wide")
 
-@st.cache_resource
-def init_database():
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # ── CSS ──
 st.markdown("""
@@ -164,13 +165,13 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# ── Fetch appointments ──
-appointments = get_patient_appointments(patient['patient_id'])
+# ── Appointment counts (the tabs below load one page at a time) ──
+counts = get_patient_appointment_counts(patient['patient_id'])
 
-total = len(appointments)
-active = sum(1 for a in appointments if a['status'] in ('Confirmed', 'Pending'))
-completed = sum(1 for a in appointments if a['status'] == 'Completed')
-cancelled = sum(1 for a in appointments if a['status'] == 'Cancelled')
+active = counts.get('Confirmed', 0) + counts.get('Pending', 0)
+completed = counts.get('Completed', 0)
+cancelled = counts.get('Cancelled', 0)
+total = sum(counts.values())
 
 st.markdown(f"""
 <div class="stat-row">
@@ -195,9 +196,36 @@ def _status_icon(status):
     return {"Confirmed": "🔵", "Pending": "🟠",
             "Completed": "✅", "Cancelled": "⛔"}.get(status, "")
 
+def _load_tab(tab, statuses):
+    """Current page of a tab; each tab keeps its own keyset token"""
+    pagers = st.session_state.setdefault("patient_pagers", {})
+    pager = pagers.get(tab)
+    if pager is None or pager['patient_id'] != patient['patient_id']:
+        pager = pagers[tab] = {'patient_id': patient['patient_id'], 'token': None, 'page': 1}
+    page = get_patient_appointments_page(patient['patient_id'], statuses, token=pager['token'])
+    return pager, page or {'rows': [], 'next_token': None, 'prev_token': None}
+
+def _render_pager(tab, pager, page):
+    if not (page['prev_token'] or page['next_token']):
+        return
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Previous", key=f"{tab}_prev", disabled=not page['prev_token'],
+                     use_container_width=True):
+            pager.update(token=page['prev_token'], page=pager['page'] - 1)
+            st.rerun()
+    with col_page:
+        st.markdown(f"<div style='text-align:center;'>Page {pager['page']}</div>", unsafe_allow_html=True)
+    with col_next:
+        if st.button("Next ➡️", key=f"{tab}_next", disabled=not page['next_token'],
+                     use_container_width=True):
+            pager.update(token=page['next_token'], page=pager['page'] + 1)
+            st.rerun()
+
 
 with tab_upcoming:
-    upcoming = [a for a in appointments if a['status'] in ('Confirmed', 'Pending')]
+    upcoming_pager, upcoming_page = _load_tab("upcoming", ('Confirmed', 'Pending'))
+    upcoming = upcoming_page['rows']
     if not upcoming:
         st.info("No upcoming appointments.")
     for apt in upcoming:
@@ -243,9 +271,12 @@ with tab_upcoming:
 
             st.markdown('</div>', unsafe_allow_html=True)
 
+    _render_pager("upcoming", upcoming_pager, upcoming_page)
+
 
 with tab_history:
-    past = [a for a in appointments if a['status'] in ('Completed', 'Cancelled')]
+    history_pager, history_page = _load_tab("history", ('Completed', 'Cancelled'))
+    past = history_page['rows']
     if not past:
         st.info("No past appointments yet.")
     for apt in past:
@@ -292,6 +323,8 @@ with tab_history:
 
             st.markdown('</div>', unsafe_allow_html=True)
 
+    _render_pager("history", history_pager, history_page)
+
 
 # ── Footer ──
 st.markdown("---")
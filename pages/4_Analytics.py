@@ -4,25 +4,26 @@ Visual charts and insights across the entire system
 Demonstrates: GROUP BY, COUNT, AVG, HAVING, DATE functions, VIEWs, Subqueries
 """
 
+import io
+import uuid
 import streamlit as st
 import pandas as pd
 from datetime import date
-from database.connection import initialize_pool
+from database.connection import ensure_pool, bind_session, register_error_hook
 from services.analytics_service import (
     get_overview_counts, get_disease_distribution, get_doctor_workload,
     get_daily_trends, get_urgency_distribution, get_specialization_demand,
-    get_gender_age_stats, get_feedback_summary
+    get_gender_age_stats, get_feedback_summary, export_appointments_csv
 )
 
 # Page config
 st.set_page_config(page_title="Analytics", page_icon="📊", layout="wide")
 
-@st.cache_resource
-def init_database():
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # ── CSS ──
 st.markdown("""
@@ -178,6 +179,17 @@ with col6:
 
 st.divider()
 
+# ── Export (rows fetched from MySQL in batches; the CSV file itself is buffered for the download) ──
+with st.expander("⬇️ Export Appointments (CSV)"):
+    if st.button("Prepare CSV export"):
+        buffer = io.StringIO()
+        rows = export_appointments_csv(buffer)
+        st.caption(f"{rows} appointments exported")
+        st.download_button("💾 Download CSV", buffer.getvalue(),
+                           file_name=f"appointments_{date.today()}.csv", mime="text/csv")
+
+st.divider()
+
 # ── DBMS Showcase ──
 with st.expander("💾 DBMS Concepts Demonstrated"):
     st.markdown("""
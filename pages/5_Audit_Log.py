@@ -4,24 +4,30 @@ View all system activity tracked by database triggers
 Demonstrates: TRIGGER, TIMESTAMP, INSERT logging, filtering, ORDER BY DESC
 """
 
+import csv
+import io
+import uuid
 import streamlit as st
 import pandas as pd
-from datetime import date
-from database.connection import initialize_pool
+from datetime import date, timedelta
+from database.connection import ensure_pool, bind_session, register_error_hook, get_all_pool_stats
+from database.instrumentation import get_query_stats, get_slow_queries
+from services.cache import get_stats_cache
+from services.queue_engine import get_queue_engine
+from services.query_helpers import day_range
 from services.audit_service import (
     get_audit_logs, get_audit_action_types,
-    get_audit_table_names, get_audit_summary
+    get_audit_table_names, get_audit_summary, iter_audit_logs
 )
 
 # Page config
 st.set_page_config(page_title="Audit Log", page_icon="📝", layout="wide")
 
-@st.cache_resource
-def init_database():
-    initialize_pool()
-    return True
-
-init_database()
+# Initialize database (shared process-wide pool, created once)
+register_error_hook(st.error)
+ensure_pool()
+# Tie read-your-writes routing to this browser session
+bind_session(st.session_state.setdefault("db_session_id", uuid.uuid4().hex))
 
 # ── CSS ──
 st.markdown("""
@@ -91,7 +97,7 @@ st.divider()
 # │  FILTERS                             │
 # ╰─────────────────────────────────────╯
 st.markdown("### 🔍 Filter Logs")
-fc1, fc2, fc3 = st.columns(3)
+fc1, fc2, fc3, fc4 = st.columns(4)
 
 with fc1:
     action_types = ["All"] + get_audit_action_types()
@@ -102,6 +108,15 @@ with fc2:
     table_filter = st.selectbox("Table", table_names)
 
 with fc3:
+    period_options = {
+        "All Time": (None, None),
+        "Today": day_range(date.today()),
+        "Last 7 Days": (date.today() - timedelta(days=6), date.today() + timedelta(days=1)),
+    }
+    period = st.selectbox("Period", list(period_options.keys()))
+    date_from, date_to = period_options[period]
+
+with fc4:
     limit = st.selectbox("Show", [50, 100, 200, 500], index=0)
 
 st.divider()
@@ -112,7 +127,9 @@ st.divider()
 logs = get_audit_logs(
     limit=limit,
     action_filter=action_filter if action_filter != "All" else None,
-    table_filter=table_filter if table_filter != "All" else None
+    table_filter=table_filter if table_filter != "All" else None,
+    date_from=date_from,
+    date_to=date_to
 )
 
 st.markdown(f"### 📋 Activity Log ({len(logs)} entries)")
@@ -170,6 +187,60 @@ with tab_table:
     else:
         st.info("No logs to display.")
 
+# ── Full export (rows fetched from MySQL in batches; the CSV file itself is buffered for the download) ──
+with st.expander("⬇️ Export Audit Log (CSV)"):
+    st.caption("Exports every entry matching the filters, not just the rows shown above.")
+    if st.button("Prepare CSV export"):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in iter_audit_logs(
+            action_filter=action_filter if action_filter != "All" else None,
+            table_filter=table_filter if table_filter != "All" else None,
+            date_from=date_from,
+            date_to=date_to
+        ):
+            writer.writerow(row)
+        st.download_button("💾 Download CSV", buffer.getvalue(),
+                           file_name=f"audit_log_{date.today()}.csv", mime="text/csv")
+
+st.divider()
+
+# ╭─────────────────────────────────────╮
+# │  QUERY PERFORMANCE (this process)    │
+# ╰─────────────────────────────────────╯
+with st.expander("⚙️ Query Performance & Slow-Query Log"):
+    st.caption("Timings collected in-process since server start: pool wait, execute and fetch per statement.")
+
+    query_stats = get_query_stats()
+    if query_stats:
+        df_q = pd.DataFrame(query_stats).drop(columns=['latency_buckets_ms'])
+        st.dataframe(df_q, use_container_width=True, height=300)
+    else:
+        st.info("No queries recorded yet.")
+
+    st.markdown("**🐢 Slow queries**")
+    slow = get_slow_queries()
+    if slow:
+        st.dataframe(pd.DataFrame(slow), use_container_width=True)
+    else:
+        st.caption("No queries over the slow-query threshold.")
+
+    st.markdown("**🔌 Connection pools**")
+    for name, pool_stats in get_all_pool_stats().items():
+        wait = pool_stats.pop('wait_ms')
+        stmt_cache = pool_stats.pop('stmt_cache')
+        st.markdown(f"`{name}`")
+        st.json({**pool_stats, 'stmt_cache': stmt_cache,
+                 'wait_ms': {k: v for k, v in wait.items() if k != 'buckets'}}, expanded=False)
+
+    st.markdown("**📋 Appointment queue engine**")
+    st.json(get_queue_engine().stats(), expanded=False)
+    if st.button("Force full queue reload", help="Reloads the shared queue for every session"):
+        get_queue_engine().invalidate()
+
+    st.markdown("**🧮 Dashboard statistics cache**")
+    st.json(get_stats_cache().stats(), expanded=False)
+
 st.divider()
 
 # ── DBMS Showcase ──
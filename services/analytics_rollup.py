@@ -0,0 +1,257 @@
+"""
+Analytics Rollup
+Appointment counts per (day, doctor, urgency level, status) for the Analytics page
+Demonstrates: Pre-aggregated rollups, Closed-day watermark, Live merge of open days
+Run from the project root:  python -m services.analytics_rollup close | check [--repair]
+"""
+
+import argparse
+from collections import Counter
+from datetime import timedelta
+
+from database.connection import execute_query, transaction
+from mysql.connector import Error
+from services.query_helpers import date_range_condition
+
+ROLLUP_TABLE = 'appointment_daily_rollup'
+STATE_NAME = 'appointment_daily'
+CLOSE_BATCH_DAYS = 31  # Days aggregated per transaction when closing a backlog of days
+
+# Last closed day: rollup rows cover every appointment date up to and including it
+_CLOSED_THROUGH = ("COALESCE((SELECT closed_through FROM rollup_state WHERE rollup_name = 'appointment_daily'), "
+                   "DATE('1000-01-01'))")
+
+_AGGREGATE = """
+    SELECT appointment_date, doctor_id, urgency_level, status, COUNT(*)
+    FROM appointments
+    WHERE {where}
+    GROUP BY appointment_date, doctor_id, urgency_level, status
+    """
+
+_INSERT = f"""
+    INSERT INTO {ROLLUP_TABLE} (rollup_date, doctor_id, urgency_level, status, appointments)
+    """ + _AGGREGATE
+
+
+def fact_source(date_from=None, date_to=None, days=None):
+    """
+    Derived table of appointment counts per (day, doctor, urgency level, status)
+
+    Closed days come from the rollup, later days (today and future bookings)
+    are grouped live from appointments. Both halves read the watermark in
+    the same statement, so every date is counted exactly once. Columns:
+    appointment_date, doctor_id, urgency_level, status, n.
+
+    Args:
+        date_from, date_to (date): [date_from, date_to) on the appointment date
+        days (int): Only dates from CURDATE() - days on
+
+    Returns:
+        tuple: (sql, params) - wrap as FROM ({sql}) f
+    """
+    halves, params = [], []
+    for column, select in (
+            ('r.rollup_date', f"""
+                SELECT r.rollup_date AS appointment_date, r.doctor_id, r.urgency_level, r.status,
+                       r.appointments AS n
+                FROM {ROLLUP_TABLE} r
+                WHERE r.rollup_date <= {_CLOSED_THROUGH}"""),
+            ('a.appointment_date', f"""
+                SELECT a.appointment_date, a.doctor_id, a.urgency_level, a.status, COUNT(*) AS n
+                FROM appointments a
+                WHERE a.appointment_date > {_CLOSED_THROUGH}""")):
+        condition, condition_params = date_range_condition(column, date_from, date_to)
+        if condition:
+            select += " AND " + condition
+        if days is not None:
+            select += f" AND {column} >= CURDATE() - INTERVAL %s DAY"
+            condition_params.append(days)
+        halves.append(select)
+        params += condition_params
+    halves[1] += " GROUP BY a.appointment_date, a.doctor_id, a.urgency_level, a.status"
+    return "\n                UNION ALL".join(halves), params
+
+
+def appointment_rollup_changes(before, after):
+    """
+    Rollup deltas for one appointment going from `before` to `after`
+
+    Args:
+        before, after (dict): appointment_date, doctor_id, urgency_level, status;
+                              None for "did not exist" / "no longer exists"
+
+    Returns:
+        Counter: (day, doctor_id, urgency_level, status) -> delta
+    """
+    changes = Counter()
+    for state, delta in ((after, 1), (before, -1)):
+        if state:
+            changes[(state['appointment_date'], state['doctor_id'],
+                     state['urgency_level'], state['status'])] += delta
+    return changes
+
+
+def record_rollup_changes(changes, cursor=None):
+    """
+    Apply appointment deltas to rollup rows of days that are already closed
+    Run it in the write's transaction, like metric_counters.record_changes().
+    Later days are read live, so their deltas are dropped. The shared lock
+    on the watermark makes close_days() wait for this transaction (or this
+    one wait for the close), so no change is counted twice or lost.
+
+    Args:
+        changes (dict): (day, doctor_id, urgency_level, status) -> delta
+        cursor: Cursor of a connection-managed transaction (default: execute_query)
+
+    Returns:
+        bool: False if a statement failed
+    """
+    items = sorted((key, delta) for key, delta in changes.items() if delta)
+    if not items:
+        return True
+    # Locking read: a snapshot could miss a close_days() that committed after this transaction began
+    lock = "SELECT closed_through FROM rollup_state WHERE rollup_name = %s LOCK IN SHARE MODE"
+    if cursor is not None:
+        cursor.execute(lock, (STATE_NAME,))
+        rows = cursor.fetchall()
+    else:
+        rows = execute_query(lock, (STATE_NAME,), fetch=True, read_only=False)
+        if rows is None:
+            return False
+    if not rows:
+        return True  # Nothing closed yet
+    closed_through = rows[0]['closed_through']
+
+    items = [(key, delta) for key, delta in items if key[0] <= closed_through]
+    if not items:
+        return True
+    query = f"""
+        INSERT INTO {ROLLUP_TABLE} (rollup_date, doctor_id, urgency_level, status, appointments)
+        VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(items))}
+        ON DUPLICATE KEY UPDATE appointments = appointments + VALUES(appointments)
+        """
+    params = tuple(v for key, delta in items for v in (*key, delta))
+    if cursor is not None:
+        cursor.execute(query, params)
+        return True
+    return execute_query(query, params) is not None
+
+
+def close_days(through=None, batch_days=CLOSE_BATCH_DAYS):
+    """
+    Aggregate every day after the watermark up to `through` into the rollup, once
+
+    Runs in batches of `batch_days`, one transaction each, so a long backlog
+    (the first run after the migration on a restored dump) does not hold
+    locks for long. The aggregate's INSERT ... SELECT share-locks the day's
+    appointments, so writes to those days wait for the batch and then apply
+    their deltas against the moved watermark.
+
+    Args:
+        through (date): Last day to close (default: yesterday by the server's
+                        clock); never later than yesterday, since today is still changing
+        batch_days (int): Days per transaction
+
+    Returns:
+        date: The new watermark; None on error
+    """
+    try:
+        row = execute_query(f"SELECT {_CLOSED_THROUGH} AS closed_through, CURDATE() - INTERVAL 1 DAY AS yesterday, "
+                            "(SELECT MIN(appointment_date) FROM appointments) AS first_day",
+                            fetch=True, fetch_one=True, read_only=False)
+        if row is None:
+            raise Error("Could not read the rollup watermark")
+        closed_through = row['closed_through']
+        through = min(through or row['yesterday'], row['yesterday'])
+        # Nothing to aggregate before the first appointment
+        closed_through = max(closed_through, (row['first_day'] or through) - timedelta(days=1))
+
+        while closed_through < through:
+            batch_end = min(closed_through + timedelta(days=batch_days), through)
+            with transaction():
+                execute_query(f"DELETE FROM {ROLLUP_TABLE} WHERE rollup_date > %s AND rollup_date <= %s",
+                              (closed_through, batch_end))
+                execute_query(_INSERT.format(where="appointment_date > %s AND appointment_date <= %s"),
+                              (closed_through, batch_end))
+                execute_query("""
+                    INSERT INTO rollup_state (rollup_name, closed_through) VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE closed_through = VALUES(closed_through)
+                    """, (STATE_NAME, batch_end))
+            closed_through = batch_end
+    except Error as e:
+        print(f"❌ Closing rollup days failed: {e}")
+        return None
+    return closed_through
+
+
+# Closed-day grain rows whose rollup count differs from appointments (rollup minus actual)
+_DIFF = f"""
+SELECT d AS rollup_date, doctor_id, urgency_level, status, SUM(n) AS drift
+FROM (
+    SELECT rollup_date AS d, doctor_id, urgency_level, status, appointments AS n
+    FROM {ROLLUP_TABLE} WHERE rollup_date <= {_CLOSED_THROUGH}
+    UNION ALL
+    SELECT appointment_date, doctor_id, urgency_level, status, -COUNT(*)
+    FROM appointments WHERE appointment_date <= {_CLOSED_THROUGH}
+    GROUP BY appointment_date, doctor_id, urgency_level, status
+) x
+GROUP BY d, doctor_id, urgency_level, status
+HAVING drift <> 0
+ORDER BY d, doctor_id, urgency_level, status
+"""
+
+
+def check_rollup(repair=False):
+    """
+    Diff the closed days' rollup rows against a GROUP BY over appointments
+
+    Drift comes from writes made outside the service layer (manual SQL,
+    patient deletions cascading to appointments). repair=True re-aggregates
+    each drifted day in its own transaction.
+
+    Returns:
+        dict: rows (drifted grain rows), days (sorted dates), repaired (days); None on error
+    """
+    rows = execute_query(_DIFF, fetch=True, read_only=False)
+    if rows is None:
+        return None
+    days = sorted({row['rollup_date'] for row in rows})
+    repaired = []
+    if repair:
+        try:
+            for day in days:
+                with transaction():
+                    execute_query(f"DELETE FROM {ROLLUP_TABLE} WHERE rollup_date = %s", (day,))
+                    execute_query(_INSERT.format(where="appointment_date = %s"), (day,))
+                repaired.append(day)
+        except Error as e:
+            print(f"❌ Rollup repair failed: {e}")
+    return {'rows': rows, 'days': days, 'repaired': repaired}
+
+
+if __name__ == "__main__":
+    from datetime import date
+
+    from database.connection import ensure_pool
+
+    parser = argparse.ArgumentParser(description="Maintain the appointment analytics rollup")
+    commands = parser.add_subparsers(dest="command", required=True)
+    close_cmd = commands.add_parser("close", help="Aggregate finished days (schedule nightly)")
+    close_cmd.add_argument("--through", type=date.fromisoformat, help="Last day to close (default: yesterday)")
+    check_cmd = commands.add_parser("check", help="Diff closed days against appointments")
+    check_cmd.add_argument("--repair", action="store_true", help="Re-aggregate drifted days")
+    args = parser.parse_args()
+
+    ensure_pool()
+    if args.command == "close":
+        closed_through = close_days(args.through)
+        if closed_through is not None:
+            print(f"✅ Rollup closed through {closed_through}")
+    else:
+        result = check_rollup(repair=args.repair)
+        if result is not None:
+            print(f"{'✅' if not result['rows'] else '⚠️'} {len(result['rows'])} drifted rows "
+                  f"over {len(result['days'])} days" + (f", {len(result['repaired'])} repaired" if args.repair else ""))
+            for row in result['rows'][:20]:
+                print(f"   {row['rollup_date']} doctor {row['doctor_id']} urgency {row['urgency_level']} "
+                      f"{row['status']}: {int(row['drift']):+d}")
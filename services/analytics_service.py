@@ -1,93 +1,116 @@
 """
 Analytics Service
 Provides data for charts and dashboards
+Appointment aggregates read the daily rollup for closed days and merge later days live
 Demonstrates: GROUP BY, COUNT, AVG, HAVING, DATE functions, VIEWs, Subqueries
 """
 
-from database.connection import execute_query
+import csv
 
+from database.connection import execute_query, stream_query
+from services.analytics_rollup import fact_source
+from services.cache import cached
+from services.query_helpers import date_range_condition
 
-def get_disease_distribution(limit=10):
-    """Top predicted diseases by frequency."""
-    query = """
+
+def _where_range(column, date_from, date_to, keyword="WHERE"):
+    """Optional [date_from, date_to) filter as a WHERE (or AND) fragment -> (sql, params); "" without bounds"""
+    condition, params = date_range_condition(column, date_from, date_to)
+    return (f"{keyword} {condition}" if condition else ""), params
+
+
+def get_disease_distribution(limit=10, date_from=None, date_to=None):
+    """Top predicted diseases by frequency (predictions made in [date_from, date_to))."""
+    where, params = _where_range('created_at', date_from, date_to)
+    query = f"""
     SELECT 
         predicted_disease,
         COUNT(*) AS occurrence_count,
         ROUND(AVG(urgency_level), 1) AS avg_urgency,
         ROUND(AVG(probability), 1) AS avg_confidence
     FROM predictions
+    {where}
     GROUP BY predicted_disease
     ORDER BY occurrence_count DESC
     LIMIT %s
     """
-    return execute_query(query, (limit,), fetch=True) or []
+    return execute_query(query, tuple(params) + (limit,), fetch=True) or []
 
 
-def get_doctor_workload():
-    """Appointment count per doctor with status breakdown."""
-    query = """
+def get_doctor_workload(date_from=None, date_to=None):
+    """Appointment count per doctor with status breakdown (appointment dates in [date_from, date_to))."""
+    facts, params = fact_source(date_from, date_to)
+    # LEFT JOIN so doctors without appointments in the range still show up
+    query = f"""
     SELECT 
         d.name AS doctor_name,
         s.spec_name AS specialization,
-        COUNT(a.appointment_id) AS total_appointments,
-        SUM(CASE WHEN a.status = 'Confirmed' THEN 1 ELSE 0 END) AS confirmed,
-        SUM(CASE WHEN a.status = 'Completed' THEN 1 ELSE 0 END) AS completed,
-        SUM(CASE WHEN a.status = 'Cancelled' THEN 1 ELSE 0 END) AS cancelled,
-        ROUND(AVG(a.urgency_level), 1) AS avg_urgency
+        CAST(COALESCE(SUM(f.n), 0) AS SIGNED) AS total_appointments,
+        SUM(CASE WHEN f.status = 'Confirmed' THEN f.n ELSE 0 END) AS confirmed,
+        SUM(CASE WHEN f.status = 'Completed' THEN f.n ELSE 0 END) AS completed,
+        SUM(CASE WHEN f.status = 'Cancelled' THEN f.n ELSE 0 END) AS cancelled,
+        ROUND(SUM(f.urgency_level * f.n) / NULLIF(SUM(f.n), 0), 1) AS avg_urgency
     FROM doctors d
-    LEFT JOIN appointments a ON d.doctor_id = a.doctor_id
+    LEFT JOIN ({facts}) f ON d.doctor_id = f.doctor_id
     INNER JOIN specializations s ON d.spec_id = s.spec_id
     GROUP BY d.doctor_id, d.name, s.spec_name
     ORDER BY total_appointments DESC
     """
-    return execute_query(query, fetch=True) or []
+    return execute_query(query, tuple(params), fetch=True) or []
 
 
-def get_daily_trends(days=14):
-    """Appointment counts per day for trend chart."""
-    query = """
+def get_daily_trends(days=14, date_from=None, date_to=None):
+    """Appointment counts per day for trend chart (last `days` days, or [date_from, date_to))."""
+    if date_from is not None or date_to is not None:
+        facts, params = fact_source(date_from, date_to)
+    else:
+        facts, params = fact_source(days=days)
+    query = f"""
     SELECT 
-        a.appointment_date AS apt_date,
-        COUNT(*) AS total,
-        SUM(CASE WHEN a.urgency_level >= 8 THEN 1 ELSE 0 END) AS high,
-        SUM(CASE WHEN a.urgency_level BETWEEN 4 AND 7 THEN 1 ELSE 0 END) AS medium,
-        SUM(CASE WHEN a.urgency_level < 4 THEN 1 ELSE 0 END) AS low
-    FROM appointments a
-    WHERE a.appointment_date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-    GROUP BY a.appointment_date
-    ORDER BY a.appointment_date
+        f.appointment_date AS apt_date,
+        CAST(SUM(f.n) AS SIGNED) AS total,
+        SUM(CASE WHEN f.urgency_level >= 8 THEN f.n ELSE 0 END) AS high,
+        SUM(CASE WHEN f.urgency_level BETWEEN 4 AND 7 THEN f.n ELSE 0 END) AS medium,
+        SUM(CASE WHEN f.urgency_level < 4 THEN f.n ELSE 0 END) AS low
+    FROM ({facts}) f
+    GROUP BY f.appointment_date
+    HAVING total > 0
+    ORDER BY f.appointment_date
     """
-    return execute_query(query, (days,), fetch=True) or []
+    return execute_query(query, tuple(params), fetch=True) or []
 
 
-def get_urgency_distribution():
-    """Count of appointments per urgency level."""
-    query = """
+def get_urgency_distribution(date_from=None, date_to=None):
+    """Count of appointments per urgency level (appointment dates in [date_from, date_to))."""
+    facts, params = fact_source(date_from, date_to)
+    query = f"""
     SELECT 
-        urgency_level,
-        COUNT(*) AS count
-    FROM appointments
-    GROUP BY urgency_level
-    ORDER BY urgency_level
+        f.urgency_level,
+        CAST(SUM(f.n) AS SIGNED) AS count
+    FROM ({facts}) f
+    GROUP BY f.urgency_level
+    HAVING count > 0
+    ORDER BY f.urgency_level
     """
-    return execute_query(query, fetch=True) or []
+    return execute_query(query, tuple(params), fetch=True) or []
 
 
-def get_specialization_demand():
-    """Appointments per specialization."""
-    query = """
+def get_specialization_demand(date_from=None, date_to=None):
+    """Appointments per specialization (appointment dates in [date_from, date_to))."""
+    facts, params = fact_source(date_from, date_to)
+    query = f"""
     SELECT 
         s.spec_name AS specialization,
-        COUNT(a.appointment_id) AS appointment_count,
-        ROUND(AVG(a.urgency_level), 1) AS avg_urgency
+        CAST(COALESCE(SUM(f.n), 0) AS SIGNED) AS appointment_count,
+        ROUND(SUM(f.urgency_level * f.n) / NULLIF(SUM(f.n), 0), 1) AS avg_urgency
     FROM specializations s
     LEFT JOIN doctors d ON s.spec_id = d.spec_id
-    LEFT JOIN appointments a ON d.doctor_id = a.doctor_id
+    LEFT JOIN ({facts}) f ON d.doctor_id = f.doctor_id
     GROUP BY s.spec_id, s.spec_name
     HAVING appointment_count > 0
     ORDER BY appointment_count DESC
     """
-    return execute_query(query, fetch=True) or []
+    return execute_query(query, tuple(params), fetch=True) or []
 
 
 def get_gender_age_stats():
@@ -118,32 +141,61 @@ def get_feedback_summary():
     return execute_query(query, fetch=True, fetch_one=True)
 
 
-def get_overview_counts():
-    """Quick counts for the top metric cards."""
-    result = {}
+# Table totals come from metric_counters (primary-key reads); doctors is a small table and
+# distinct diseases cannot be kept as a delta, so those two are still counted
+_OVERVIEW_QUERY = """
+SELECT
+    (SELECT value FROM metric_counters WHERE metric = 'patients' AND bucket = '1000-01-01') AS total_patients,
+    (SELECT value FROM metric_counters WHERE metric = 'appointments' AND bucket = '1000-01-01') AS total_appointments,
+    (SELECT COUNT(*) FROM doctors) AS total_doctors,
+    (SELECT value FROM metric_counters WHERE metric = 'medical_records' AND bucket = '1000-01-01') AS total_records,
+    (SELECT value FROM metric_counters WHERE metric = 'feedback' AND bucket = '1000-01-01') AS total_feedback,
+    (SELECT COUNT(DISTINCT predicted_disease) FROM predictions) AS unique_diseases
+"""
 
-    q = "SELECT COUNT(*) AS c FROM patients"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['total_patients'] = r['c'] if r else 0
 
-    q = "SELECT COUNT(*) AS c FROM appointments"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['total_appointments'] = r['c'] if r else 0
+@cached('patients', 'appointments', 'doctors', 'medical_records', 'feedback', 'predictions')
+def _overview_row():
+    return execute_query(_OVERVIEW_QUERY, fetch=True, fetch_one=True, prepared=True)
 
-    q = "SELECT COUNT(*) AS c FROM doctors"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['total_doctors'] = r['c'] if r else 0
 
-    q = "SELECT COUNT(*) AS c FROM medical_records"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['total_records'] = r['c'] if r else 0
+def get_overview_counts():
+    """Quick counts for the top metric cards (one query per STATS_CACHE_SECONDS, zeros on error)."""
+    row = _overview_row()
+    return {key: int(row[key] or 0) if row else 0
+            for key in ('total_patients', 'total_appointments', 'total_doctors',
+                        'total_records', 'total_feedback', 'unique_diseases')}
 
-    q = "SELECT COUNT(*) AS c FROM feedback"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['total_feedback'] = r['c'] if r else 0
 
-    q = "SELECT COUNT(DISTINCT predicted_disease) AS c FROM predictions"
-    r = execute_query(q, fetch=True, fetch_one=True)
-    result['unique_diseases'] = r['c'] if r else 0
+def export_appointments_csv(file_obj, date_from=None, date_to=None):
+    """
+    Write appointments (optionally limited to [date_from, date_to)) as CSV.
+    Rows are streamed from MySQL, so memory stays flat for any table size.
 
-    return result
+    Returns:
+        int: Number of rows written
+    """
+    query = """
+    SELECT 
+        a.appointment_id, a.appointment_date, a.appointment_time,
+        a.status, a.mode, a.urgency_level,
+        a.patient_id, a.doctor_id, d.name AS doctor_name,
+        s.spec_name AS specialization, a.created_at
+    FROM appointments a
+    INNER JOIN doctors d ON a.doctor_id = d.doctor_id
+    INNER JOIN specializations s ON d.spec_id = s.spec_id
+    WHERE 1=1
+    """
+    condition, params = date_range_condition('a.appointment_date', date_from, date_to)
+    if condition:
+        query += " AND " + condition
+    query += " ORDER BY a.appointment_date, a.appointment_time"
+
+    writer = csv.writer(file_obj)
+    written = 0
+    for batch in stream_query(query, tuple(params), row_format='columns'):
+        if written == 0:
+            writer.writerow(batch.keys())
+        writer.writerows(zip(*batch.values()))
+        written += len(next(iter(batch.values())))
+    return written
@@ -4,11 +4,36 @@ Handles appointment creation, scheduling, and queue management
 Demonstrates: JOINs, Transactions, Sorting, Indexing
 """
 
-from database.connection import execute_query, get_connection
+from database.connection import execute_query, get_connection, transaction, in_transaction
+from services.analytics_rollup import appointment_rollup_changes, record_rollup_changes
+from services.cache import cached, invalidate_on_commit
+from services.doctor_load_index import get_load_index, record_load_change
+from services.metric_counters import appointment_changes, record_changes
+from services.queue_engine import get_queue_engine, notify_appointments_changed
+from services.queue_view import (
+    VIEW_TABLE, DETAIL_COLUMNS, view_select, refresh_queue_view, refresh_for_symptom
+)
+from services.slot_service import (
+    claim_slot, take_slot, release_slot, lock_day, rebuild_slot_masks,
+    pick_slot, slot_to_time, band_mask, occupies_slot, FULL_MASK
+)
+from services.query_helpers import (
+    keyset_condition, order_by, build_page, decode_page_token, date_range_condition
+)
+from config import BOOKING_HORIZON_DAYS, LIST_PAGE_SIZE
 from mysql.connector import Error
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
+from time import sleep
 import random
 
+class BookingConflict(Error):
+    """A booking kept losing lock races (deadlock / lock wait timeout); the slots may still be free"""
+
+
+# Deadlock / lock wait timeout: the transaction can simply be re-run
+RETRYABLE_ERRNOS = {1213, 1205}
+DUPLICATE_KEY_ERRNO = 1062
+
 def save_prediction(symptom_id, diagnosis_result):
     """
     Store AI prediction in database
@@ -34,7 +59,12 @@ def save_prediction(symptom_id, diagnosis_result):
     )
     
     try:
-        prediction_id = execute_query(query, params)
+        with transaction():
+            prediction_id = execute_query(query, params)
+            if prediction_id:
+                # Usually saved before booking; a re-diagnosis updates booked appointments
+                refresh_for_symptom(symptom_id)
+                invalidate_on_commit('predictions')
         if prediction_id:
             print(f"✅ Prediction saved. ID: {prediction_id}")
         return prediction_id
@@ -46,6 +76,8 @@ def find_available_doctor(specialization_name, appointment_date):
     """
     Find available doctor for given specialization and date
     Selects doctor with least appointments that day
+    Served from the in-process load index (one aggregate query per
+    specialization/date, then heap lookups)
     
     Args:
         specialization_name (str): Specialization (e.g., 'Cardiology')
@@ -54,26 +86,7 @@ def find_available_doctor(specialization_name, appointment_date):
     Returns:
         dict: Doctor info or None
     """
-    query = """
-    SELECT 
-        d.doctor_id, 
-        d.name, 
-        d.qualification,
-        COUNT(a.appointment_id) as appointment_count
-    FROM doctors d
-    INNER JOIN specializations s ON d.spec_id = s.spec_id
-    LEFT JOIN appointments a ON d.doctor_id = a.doctor_id 
-        AND a.appointment_date = %s
-        AND a.status IN ('Confirmed', 'Pending')
-    WHERE s.spec_name = %s AND d.available = TRUE
-    GROUP BY d.doctor_id
-    HAVING appointment_count < 16
-    ORDER BY appointment_count ASC
-    LIMIT 1
-    """
-    
-    result = execute_query(query, (appointment_date, specialization_name), 
-                          fetch=True, fetch_one=True)
+    result = get_load_index().least_loaded(specialization_name, appointment_date)
     
     if result:
         print(f"✅ Doctor assigned: {result['name']} ({result['appointment_count']} appointments)")
@@ -82,33 +95,6 @@ def find_available_doctor(specialization_name, appointment_date):
     
     return result
 
-def generate_time_slot(urgency_level, existing_appointments_count):
-    """
-    Generate appointment time based on urgency
-    High urgency gets earlier slots
-    
-    Args:
-        urgency_level (int): 1-10
-        existing_appointments_count (int): Number of appointments already scheduled
-    
-    Returns:
-        time: Appointment time
-    """
-    # Time slots: 9 AM to 5 PM, 30-minute intervals
-    base_hour = 9
-    
-    if urgency_level >= 8:  # High priority - morning slots
-        slot_offset = existing_appointments_count % 6  # 9 AM - 12 PM
-    elif urgency_level >= 4:  # Medium - afternoon
-        slot_offset = 6 + (existing_appointments_count % 6)  # 12 PM - 3 PM
-    else:  # Low - evening
-        slot_offset = 12 + (existing_appointments_count % 4)  # 3 PM - 5 PM
-    
-    hour = base_hour + (slot_offset // 2)
-    minute = 0 if slot_offset % 2 == 0 else 30
-    
-    return time(hour, minute)
-
 def create_appointment(patient_id, doctor_id, symptom_id, urgency_level, 
                       appointment_date, appointment_time=None, mode='Offline'):
     """
@@ -126,29 +112,38 @@ def create_appointment(patient_id, doctor_id, symptom_id, urgency_level,
     Returns:
         int: appointment_id or None
     """
-    # Auto-generate time if not provided
-    if appointment_time is None:
-        # Count existing appointments for this doctor on this date
-        count_query = """
-        SELECT COUNT(*) as count FROM appointments 
-        WHERE doctor_id = %s AND appointment_date = %s
-        """
-        result = execute_query(count_query, (doctor_id, appointment_date), 
-                             fetch=True, fetch_one=True)
-        appointment_count = result['count'] if result else 0
-        appointment_time = generate_time_slot(urgency_level, appointment_count)
-    
     query = """
     INSERT INTO appointments 
     (patient_id, doctor_id, symptom_id, urgency_level, 
      appointment_date, appointment_time, status, mode)
     VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', %s)
     """
-    params = (patient_id, doctor_id, symptom_id, urgency_level,
-              appointment_date, appointment_time, mode)
     
     try:
-        appointment_id = execute_query(query, params)
+        # Slot claim and INSERT commit together (the doctor's day row stays locked until then)
+        with transaction():
+            if appointment_time is None:
+                # Auto-generate time: first free slot in the urgency band
+                appointment_time = claim_slot(doctor_id, appointment_date, urgency_level)
+                if appointment_time is None:
+                    print(f"⚠️ No free slot for doctor {doctor_id} on {appointment_date}")
+                    return None
+            elif not take_slot(doctor_id, appointment_date, appointment_time):
+                print(f"⚠️ Slot {appointment_time} already booked for doctor {doctor_id}")
+                return None
+            
+            params = (patient_id, doctor_id, symptom_id, urgency_level,
+                      appointment_date, appointment_time, mode)
+            appointment_id = execute_query(query, params)
+            if appointment_id:
+                record_load_change(doctor_id, appointment_date, 1)
+                booked = {'status': 'Confirmed', 'urgency_level': urgency_level,
+                          'appointment_date': appointment_date, 'doctor_id': doctor_id}
+                record_changes(appointment_changes(None, booked))
+                record_rollup_changes(appointment_rollup_changes(None, booked))
+                refresh_queue_view([appointment_id])
+                notify_appointments_changed([appointment_id])
+        
         if appointment_id:
             print(f"✅ Appointment created. ID: APT-{appointment_id:03d}")
         return appointment_id
@@ -156,7 +151,246 @@ def create_appointment(patient_id, doctor_id, symptom_id, urgency_level,
         print(f"❌ Error creating appointment: {e}")
         return None
 
-def get_appointment_queue(date_filter=None, urgency_filter=None, specialization_filter=None):
+# Upsert locks every candidate doctor's day row, in doctor_id order so concurrent bookers never deadlock on each other
+_LOCK_SPEC_DAY = """
+INSERT INTO doctor_day_slots (doctor_id, slot_date, taken_mask)
+SELECT d.doctor_id, %s, 0
+FROM doctors d
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+WHERE s.spec_name = %s AND d.available = TRUE
+ORDER BY d.doctor_id
+ON DUPLICATE KEY UPDATE taken_mask = taken_mask
+"""
+
+_SPEC_DAY_LOADS = """
+SELECT ds.doctor_id, ds.taken_mask, d.name, d.qualification
+FROM doctor_day_slots ds
+INNER JOIN doctors d ON ds.doctor_id = d.doctor_id
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+WHERE s.spec_name = %s AND d.available = TRUE AND ds.slot_date = %s
+ORDER BY ds.doctor_id
+FOR UPDATE
+"""
+
+
+def lock_spec_day(cursor, specialization_name, appointment_date):
+    """
+    Row-lock the slot bitmaps of every available doctor in a specialization for one date
+    Must run inside transaction() on its connection's cursor (dictionary=True).
+    
+    Returns:
+        list: dicts with doctor_id, taken_mask, name, qualification (doctor_id order)
+    """
+    cursor.execute(_LOCK_SPEC_DAY, (appointment_date, specialization_name))
+    cursor.execute(_SPEC_DAY_LOADS, (specialization_name, appointment_date))
+    return cursor.fetchall()
+
+def _book_locked(conn, patient_id, symptom_id, specialization_name, appointment_date,
+                 urgency_level, mode):
+    """One booking attempt on the transaction connection (raises on lock errors)"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        days = lock_spec_day(cursor, specialization_name, appointment_date)
+        
+        # Least-loaded doctor with a free slot (load = booked bits); ties go to the lowest id
+        open_days = [d for d in days if d['taken_mask'] != FULL_MASK]
+        if not open_days:
+            return None
+        day = min(open_days, key=lambda d: (bin(d['taken_mask']).count('1'), d['doctor_id']))
+        
+        slot_index = pick_slot(day['taken_mask'], urgency_level)
+        appointment_time = slot_to_time(slot_index)
+        cursor.execute(
+            "UPDATE doctor_day_slots SET taken_mask = taken_mask | %s WHERE doctor_id = %s AND slot_date = %s",
+            (1 << slot_index, day['doctor_id'], appointment_date)
+        )
+        cursor.execute("""
+            INSERT INTO appointments 
+            (patient_id, doctor_id, symptom_id, urgency_level, 
+             appointment_date, appointment_time, status, mode)
+            VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', %s)
+            """, (patient_id, day['doctor_id'], symptom_id, urgency_level,
+                  appointment_date, appointment_time, mode))
+        
+        appointment_id = cursor.lastrowid
+        record_load_change(day['doctor_id'], appointment_date, 1)
+        booked = {'status': 'Confirmed', 'urgency_level': urgency_level,
+                  'appointment_date': appointment_date, 'doctor_id': day['doctor_id']}
+        record_changes(appointment_changes(None, booked))
+        record_rollup_changes(appointment_rollup_changes(None, booked))
+        refresh_queue_view([appointment_id])
+        notify_appointments_changed([appointment_id])
+        
+        return {
+            'appointment_id': appointment_id,
+            'doctor_id': day['doctor_id'],
+            'name': day['name'],
+            'qualification': day['qualification'],
+            'specialization': specialization_name,
+            'appointment_date': appointment_date,
+            'appointment_time': appointment_time,
+            'appointment_count': bin(day['taken_mask']).count('1')
+        }
+    finally:
+        cursor.close()
+
+def book_best_available(patient_id, symptom_id, specialization_name, appointment_date,
+                        urgency_level, mode='Offline', max_attempts=3):
+    """
+    Assign the least-loaded doctor and book a slot in ONE transaction
+    Replaces find_available_doctor() + create_appointment(): the specialization's
+    day rows are locked first, so parallel bookers cannot overfill a doctor
+    or collide on a slot. Deadlocks and lock wait timeouts are retried with
+    backoff; a duplicate-key error rebuilds the day's slot map and retries.
+    Call it outside transaction(): inside one no retry is possible (a
+    deadlock rolls back the outer work too), so the first conflict is raised.
+    
+    Args:
+        patient_id (int): Patient ID
+        symptom_id (int): Symptom ID
+        specialization_name (str): Specialization (e.g., 'Cardiology')
+        appointment_date (date): Appointment date
+        urgency_level (int): 1-10
+        mode (str): 'Online' or 'Offline'
+        max_attempts (int): Attempts before giving up
+    
+    Returns:
+        dict: appointment_id, doctor_id, name, qualification, specialization,
+              appointment_date, appointment_time; None if no doctor has a free slot
+    
+    Raises:
+        BookingConflict: Lock conflicts outlasted the retries (try again later)
+        Error: Any other database error
+    """
+    nested = in_transaction()
+    
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with transaction() as conn:
+                booking = _book_locked(conn, patient_id, symptom_id, specialization_name,
+                                       appointment_date, urgency_level, mode)
+        except Error as e:
+            errno = getattr(e, 'errno', None)
+            retryable = errno in RETRYABLE_ERRNOS or errno == DUPLICATE_KEY_ERRNO
+            if nested or not retryable or attempt == max_attempts:
+                print(f"❌ Error booking appointment: {e}")
+                if retryable:
+                    raise BookingConflict(f"Booking conflict after {attempt} attempt(s): {e}") from e
+                raise
+            print(f"⚠️ Booking attempt {attempt} failed ({e}), retrying...")
+            if errno == DUPLICATE_KEY_ERRNO:
+                rebuild_slot_masks(appointment_date)
+            sleep(0.02 * (2 ** attempt) + random.uniform(0, 0.02))
+            continue
+        
+        if booking:
+            print(f"✅ Appointment created. ID: APT-{booking['appointment_id']:03d} "
+                  f"with {booking['name']} at {booking['appointment_time']}")
+        else:
+            print(f"⚠️ No available doctor for {specialization_name} on {appointment_date}")
+        return booking
+    return None
+
+# Every (date, doctor) pair in the horizon for the candidate specializations, best first.
+# Days without a doctor_day_slots row are completely free.
+_EARLIEST_SLOT_QUERY = """
+WITH RECURSIVE horizon (slot_date, day_no) AS (
+    SELECT CAST(%s AS DATE), 0
+    UNION ALL
+    SELECT slot_date + INTERVAL 1 DAY, day_no + 1 FROM horizon WHERE day_no + 1 < %s
+)
+SELECT
+    h.slot_date,
+    d.doctor_id,
+    d.name,
+    d.qualification,
+    s.spec_name,
+    COALESCE(ds.taken_mask, 0) AS taken_mask
+FROM horizon h
+CROSS JOIN doctors d
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+LEFT JOIN doctor_day_slots ds ON ds.doctor_id = d.doctor_id AND ds.slot_date = h.slot_date
+WHERE s.spec_name IN ({specs}) AND d.available = TRUE
+  AND COALESCE(ds.taken_mask, 0) != %s
+ORDER BY
+    h.slot_date,
+    FIELD(s.spec_name, {specs}),
+    (COALESCE(ds.taken_mask, 0) & %s) = %s,
+    BIT_COUNT(COALESCE(ds.taken_mask, 0)),
+    d.doctor_id
+LIMIT 1
+"""
+
+
+def find_earliest_slot(specialization_name, start_date, horizon_days=BOOKING_HORIZON_DAYS,
+                       urgency_level=5, fallbacks=('General Medicine',)):
+    """
+    Earliest free (doctor, date, time) across a date horizon, in ONE query
+    Dates are tried in order; within a date the preferred specialization beats
+    the fallbacks (in the order given), then doctors with a free slot in the
+    urgency band, then the least-loaded doctor.
+    
+    Args:
+        specialization_name (str): Preferred specialization
+        start_date (date): First date to consider
+        horizon_days (int): Number of days searched (start_date included)
+        urgency_level (int): 1-10, picks the slot band
+        fallbacks (tuple): Specializations to use when the preferred one is full
+    
+    Returns:
+        dict: doctor_id, name, qualification, specialization, appointment_date,
+              appointment_time, appointment_count; None if nothing is free.
+              A hint: book it with book_best_available() / book_earliest_available().
+    """
+    specs = [specialization_name] + [f for f in fallbacks if f != specialization_name]
+    placeholders = ", ".join(["%s"] * len(specs))
+    query = _EARLIEST_SLOT_QUERY.format(specs=placeholders)
+    band = band_mask(urgency_level)
+    params = (start_date, horizon_days, *specs, FULL_MASK, *specs, band, band)
+    
+    row = execute_query(query, params, fetch=True, fetch_one=True)
+    if not row:
+        print(f"⚠️ No free slot for {', '.join(specs)} within {horizon_days} days of {start_date}")
+        return None
+    
+    return {
+        'doctor_id': row['doctor_id'],
+        'name': row['name'],
+        'qualification': row['qualification'],
+        'specialization': row['spec_name'],
+        'appointment_date': row['slot_date'],
+        'appointment_time': slot_to_time(pick_slot(row['taken_mask'], urgency_level)),
+        'appointment_count': bin(row['taken_mask']).count('1')
+    }
+
+def book_earliest_available(patient_id, symptom_id, specialization_name, start_date, urgency_level,
+                            mode='Offline', horizon_days=BOOKING_HORIZON_DAYS,
+                            fallbacks=('General Medicine',), max_attempts=3):
+    """
+    Book the earliest free slot within the horizon (preferred specialization first)
+    find_earliest_slot() picks the date and specialization; book_best_available()
+    then claims it under lock. If another booker took the last slot in between,
+    the search is repeated from start_date, so later days are still tried.
+    
+    Returns:
+        dict: Same shape as book_best_available(); None if nothing is free
+    
+    Raises:
+        BookingConflict, Error: As book_best_available()
+    """
+    for _ in range(max_attempts):
+        candidate = find_earliest_slot(specialization_name, start_date, horizon_days,
+                                       urgency_level, fallbacks)
+        if not candidate:
+            return None
+        booking = book_best_available(patient_id, symptom_id, candidate['specialization'],
+                                      candidate['appointment_date'], urgency_level, mode=mode)
+        if booking:
+            return booking
+    return None
+
+def get_appointment_queue(date_filter=None, urgency_filter=None, specialization_filter=None,
+                          live=False, date_from=None, date_to=None, columns='full'):
     """
     Fetch sorted appointment queue
     **MAIN DBMS SHOWCASE QUERY** - Demonstrates:
@@ -165,52 +399,59 @@ def get_appointment_queue(date_filter=None, urgency_filter=None, specialization_
     - Sorting by urgency (using index)
     - Aggregate data retrieval
     
+    The JOIN is denormalized into appointment_queue_view on every write, so
+    the live query is a range scan of that one table (idx_status_date).
+    By default the queue is served from the shared in-memory QueueEngine,
+    which loads the view once and then applies committed changes as deltas.
+    
     Args:
         date_filter (date): Filter by specific date
         urgency_filter (str): 'High', 'Medium', 'Low', or None
         specialization_filter (str): Specialization name or None
+        live (bool): Run the JOIN against the database instead of the engine
+        date_from, date_to (date): Appointment dates in [date_from, date_to) (optional)
+        columns (str): 'full', or 'summary' to leave out symptom_text, urgency_reason
+                       and allergies (fetch them with get_appointment_details())
     
     Returns:
         list: Sorted appointment records
+    
+    Raises:
+        ValueError: columns is not 'summary' or 'full'
     """
-    query = """
-    SELECT 
-        a.appointment_id,
-        a.appointment_date,
-        a.appointment_time,
-        a.status,
-        a.mode,
-        a.urgency_level,
-        p.patient_id,
-        p.full_name AS patient_name,
-        p.age,
-        p.gender,
-        p.phone,
-        s.symptom_text,
-        pred.predicted_disease,
-        pred.probability,
-        pred.urgency_reason,
-        d.doctor_id,
-        d.name AS doctor_name,
-        d.qualification,
-        spec.spec_name AS specialization,
-        CONCAT('APT-', LPAD(a.appointment_id, 3, '0')) AS appointment_code
-    FROM appointments a
-    INNER JOIN patients p ON a.patient_id = p.patient_id
-    INNER JOIN symptoms s ON a.symptom_id = s.symptom_id
-    INNER JOIN predictions pred ON s.symptom_id = pred.symptom_id
-    INNER JOIN doctors d ON a.doctor_id = d.doctor_id
-    INNER JOIN specializations spec ON d.spec_id = spec.spec_id
-    WHERE a.status IN ('Confirmed', 'Pending')
-    """
+    if not live:
+        return get_queue_engine().get_queue(date_filter, urgency_filter, specialization_filter,
+                                            date_from=date_from, date_to=date_to, columns=columns)
     
-    params = []
+    query, params = _queue_filters(date_filter, urgency_filter, specialization_filter, date_from, date_to,
+                                   columns)
     
-    # Apply filters
+    # Critical sorting: urgency DESC, then date, then time
+    query += " ORDER BY a.urgency_level DESC, a.appointment_date ASC, a.appointment_time ASC"
+    
+    results = execute_query(query, tuple(params) if params else None, fetch=True, prepared=True)
+    return results or []
+
+
+def _date_filters(query, params, date_filter, date_from, date_to):
+    """Append the single-day and [date_from, date_to) filters on a.appointment_date"""
     if date_filter:
         query += " AND a.appointment_date = %s"
         params.append(date_filter)
     
+    condition, range_params = date_range_condition('a.appointment_date', date_from, date_to)
+    if condition:
+        query += " AND " + condition
+        params += range_params
+    return query, params
+
+
+def _queue_filters(date_filter, urgency_filter, specialization_filter, date_from=None, date_to=None,
+                   columns='full'):
+    """Queue SELECT with the dashboard filters applied -> (query, params)"""
+    select = view_select(columns) + " WHERE a.status IN ('Confirmed', 'Pending')"
+    query, params = _date_filters(select, [], date_filter, date_from, date_to)
+    
     if urgency_filter:
         if urgency_filter == 'High':
             query += " AND a.urgency_level >= 8"
@@ -220,14 +461,90 @@ def get_appointment_queue(date_filter=None, urgency_filter=None, specialization_
             query += " AND a.urgency_level <= 3"
     
     if specialization_filter and specialization_filter != 'All':
-        query += " AND spec.spec_name = %s"
+        query += " AND a.specialization = %s"
         params.append(specialization_filter)
+    return query, params
+
+
+# Keyset pagination: sort columns, DESC flags, and the matching key of a result row
+_QUEUE_SORT = (['a.urgency_level', 'a.appointment_date', 'a.appointment_time', 'a.appointment_id'],
+               [True, False, False, False])
+_HISTORY_SORT = (['a.appointment_date', 'a.appointment_time', 'a.appointment_id'], [True, True, True])
+
+
+def _queue_key(row):
+    return [row['urgency_level'], row['appointment_date'], row['appointment_time'], row['appointment_id']]
+
+
+def _history_key(row):
+    return [row['appointment_date'], row['appointment_time'], row['appointment_id']]
+
+
+def _fetch_page(query, params, sort, sort_key, page_size, token):
+    """Run `query` (ending in a WHERE clause) one keyset page at a time"""
+    direction, forward = None, True
+    if token:
+        direction, key = decode_page_token(token)
+        forward = direction == 'next'
+        condition, key_params = keyset_condition(*sort, key, forward)
+        query += " AND " + condition
+        params = list(params) + key_params
+    query += order_by(*sort, forward) + " LIMIT %s"
+    rows = execute_query(query, tuple(params) + (page_size + 1,), fetch=True, prepared=True)
+    if rows is None:
+        return None
+    return build_page(rows, page_size, sort_key, direction)
+
+
+def get_appointment_queue_page(date_filter=None, urgency_filter=None, specialization_filter=None,
+                               page_size=LIST_PAGE_SIZE, token=None, live=False,
+                               date_from=None, date_to=None, columns='full'):
+    """
+    One page of the sorted appointment queue (keyset pagination)
+    Pages seek past the last row's (urgency, date, time, id) instead of
+    using OFFSET, so every page costs the same however deep it is.
     
-    # Critical sorting: urgency DESC, then date, then time
-    query += " ORDER BY a.urgency_level DESC, a.appointment_date ASC, a.appointment_time ASC"
+    Args:
+        date_filter, urgency_filter, specialization_filter, date_from, date_to, columns:
+            As get_appointment_queue()
+        page_size (int): Rows per page
+        token (str): next_token / prev_token from the previous page; None for the first page
+        live (bool): Query the database instead of the QueueEngine
     
-    results = execute_query(query, tuple(params) if params else None, fetch=True)
-    return results or []
+    Returns:
+        dict: rows, next_token, prev_token; None on error
+    
+    Raises:
+        ValueError: token is malformed, or columns is not 'summary' or 'full'
+    """
+    if not live:
+        return get_queue_engine().get_queue_page(date_filter, urgency_filter, specialization_filter,
+                                                 page_size, token, date_from=date_from, date_to=date_to,
+                                                 columns=columns)
+    query, params = _queue_filters(date_filter, urgency_filter, specialization_filter, date_from, date_to,
+                                   columns)
+    return _fetch_page(query, params, _QUEUE_SORT, _queue_key, page_size, token)
+
+
+def get_appointment_details(appointment_ids):
+    """
+    The TEXT columns a 'summary' listing leaves out, for a batch of appointments
+    One primary-key lookup on appointment_queue_view for the whole batch.
+    
+    Args:
+        appointment_ids (iterable): Appointment IDs (e.g. the rows of one page)
+    
+    Returns:
+        dict: appointment_id -> {symptom_text, urgency_reason, allergies}
+    """
+    ids = sorted(set(appointment_ids))
+    if not ids:
+        return {}
+    rows = execute_query(f"""
+        SELECT appointment_id, {', '.join(DETAIL_COLUMNS)} FROM {VIEW_TABLE}
+        WHERE appointment_id IN ({', '.join(['%s'] * len(ids))})
+        """, tuple(ids), fetch=True)
+    return {row.pop('appointment_id'): row for row in rows or []}
 
 def get_appointment_by_id(appointment_id):
     """
@@ -259,48 +576,68 @@ def get_appointment_by_id(appointment_id):
     """
     return execute_query(query, (appointment_id,), fetch=True, fetch_one=True)
 
-def get_appointment_statistics():
+@cached('appointments')
+def get_appointment_statistics(date_from=None, date_to=None):
     """
     Get appointment statistics for dashboard
+    One GROUP BY specialization pass; the Confirmed / high-priority totals are
+    conditional aggregates of the same rows. Cached for STATS_CACHE_SECONDS.
     
-    Returns:
-        dict: Various statistics
-    """
-    stats = {}
-    
-    # Total appointments today
-    query_today = """
-    SELECT COUNT(*) as count FROM appointments 
-    WHERE appointment_date = CURDATE() AND status = 'Confirmed'
-    """
-    result = execute_query(query_today, fetch=True, fetch_one=True)
-    stats['today_total'] = result['count'] if result else 0
+    Args:
+        date_from, date_to (date): Count appointment dates in [date_from, date_to)
+                                   instead of today (the keys keep their today_ names)
     
-    # High priority count today
-    query_high = """
-    SELECT COUNT(*) as count FROM appointments 
-    WHERE appointment_date = CURDATE() 
-    AND urgency_level >= 8 
-    AND status = 'Confirmed'
+    Returns:
+        dict: Various statistics; None on error
     """
-    result = execute_query(query_high, fetch=True, fetch_one=True)
-    stats['today_high_priority'] = result['count'] if result else 0
-    
-    # Specialization distribution
-    query_spec = """
-    SELECT spec.spec_name, COUNT(a.appointment_id) as count
+    if date_from is None and date_to is None:
+        day_condition, day_params = "a.appointment_date = CURDATE()", ()
+    else:
+        day_condition, day_params = date_range_condition('a.appointment_date', date_from, date_to)
+        day_params = tuple(day_params)
+    
+    query = f"""
+    SELECT spec.spec_name,
+           COUNT(*) AS count,
+           SUM(a.status = 'Confirmed') AS confirmed,
+           SUM(a.status = 'Confirmed' AND a.urgency_level >= 8) AS high_priority
     FROM appointments a
     INNER JOIN doctors d ON a.doctor_id = d.doctor_id
     INNER JOIN specializations spec ON d.spec_id = spec.spec_id
-    WHERE a.appointment_date = CURDATE()
+    WHERE {day_condition}
     GROUP BY spec.spec_name
     ORDER BY count DESC
     """
-    stats['specialization_distribution'] = execute_query(query_spec, fetch=True) or []
+    rows = execute_query(query, day_params, fetch=True)
+    if rows is None:
+        return None
+    
+    return {
+        'today_total': sum(int(r['confirmed']) for r in rows),
+        'today_high_priority': sum(int(r['high_priority']) for r in rows),
+        'specialization_distribution': [{'spec_name': r['spec_name'], 'count': r['count']} for r in rows]
+    }
+
+# Doctor's appointment list, read from the queue view (filters/ORDER BY appended per call)
+def _doctor_select(columns='full'):
+    return view_select(columns) + " WHERE a.doctor_id = %s"
+
+
+_DOCTOR_SELECT = _doctor_select()
+
+
+def _doctor_filters(doctor_id, date_filter, status_filter, date_from=None, date_to=None,
+                    select=_DOCTOR_SELECT):
+    query, params = _date_filters(select, [doctor_id], date_filter, date_from, date_to)
     
-    return stats
+    if status_filter and status_filter != 'All':
+        query += " AND a.status = %s"
+        params.append(status_filter)
+    return query, params
+
 
-def get_appointments_by_doctor(doctor_id, date_filter=None, status_filter=None):
+def get_appointments_by_doctor(doctor_id, date_filter=None, status_filter=None,
+                               date_from=None, date_to=None, columns='full'):
     """
     Fetch appointments assigned to a specific doctor
     
@@ -308,57 +645,55 @@ def get_appointments_by_doctor(doctor_id, date_filter=None, status_filter=None):
         doctor_id (int): Doctor ID
         date_filter (date): Filter by specific date (optional)
         status_filter (str): Filter by status (optional)
+        date_from, date_to (date): Appointment dates in [date_from, date_to) (optional)
+        columns (str): 'full' or 'summary' (see get_appointment_queue())
     
     Returns:
         list: Appointment records for the doctor
     """
-    query = """
-    SELECT 
-        a.appointment_id,
-        a.appointment_date,
-        a.appointment_time,
-        a.status,
-        a.mode,
-        a.urgency_level,
-        p.patient_id,
-        p.full_name AS patient_name,
-        p.age,
-        p.gender,
-        p.phone,
-        p.allergies,
-        s.symptom_text,
-        pred.predicted_disease,
-        pred.probability,
-        pred.urgency_reason,
-        d.name AS doctor_name,
-        d.qualification,
-        spec.spec_name AS specialization,
-        CONCAT('APT-', LPAD(a.appointment_id, 3, '0')) AS appointment_code
-    FROM appointments a
-    INNER JOIN patients p ON a.patient_id = p.patient_id
-    INNER JOIN symptoms s ON a.symptom_id = s.symptom_id
-    INNER JOIN predictions pred ON s.symptom_id = pred.symptom_id
-    INNER JOIN doctors d ON a.doctor_id = d.doctor_id
-    INNER JOIN specializations spec ON d.spec_id = spec.spec_id
-    WHERE a.doctor_id = %s
-    """
-    
-    params = [doctor_id]
-    
-    if date_filter:
-        query += " AND a.appointment_date = %s"
-        params.append(date_filter)
-    
-    if status_filter and status_filter != 'All':
-        query += " AND a.status = %s"
-        params.append(status_filter)
-    
+    query, params = _doctor_filters(doctor_id, date_filter, status_filter, date_from, date_to,
+                                    select=_doctor_select(columns))
     query += " ORDER BY a.urgency_level DESC, a.appointment_date ASC, a.appointment_time ASC"
     
-    results = execute_query(query, tuple(params), fetch=True)
+    results = execute_query(query, tuple(params), fetch=True, prepared=True)
     return results or []
 
 
+def get_appointments_by_doctor_page(doctor_id, date_filter=None, status_filter=None,
+                                    page_size=LIST_PAGE_SIZE, token=None, date_from=None, date_to=None,
+                                    columns='full'):
+    """
+    One page of a doctor's appointments, most urgent first (keyset pagination)
+    
+    Returns:
+        dict: rows, next_token, prev_token; None on error
+    
+    Raises:
+        ValueError: token is malformed, or columns is not 'summary' or 'full'
+    """
+    query, params = _doctor_filters(doctor_id, date_filter, status_filter, date_from, date_to,
+                                    select=_doctor_select(columns))
+    return _fetch_page(query, params, _QUEUE_SORT, _queue_key, page_size, token)
+
+
+_DOCTOR_COUNTS = """
+    SELECT COUNT(*) AS total,
+           COALESCE(SUM(a.urgency_level >= 8), 0) AS high,
+           COALESCE(SUM(a.urgency_level BETWEEN 4 AND 7), 0) AS medium,
+           COALESCE(SUM(a.urgency_level <= 3), 0) AS low
+    FROM appointments a
+    WHERE a.doctor_id = %s
+    """
+
+
+def get_doctor_appointment_counts(doctor_id, date_filter=None, status_filter=None,
+                                  date_from=None, date_to=None):
+    """Totals by urgency band for a doctor's filtered list (the paged view only holds one page)"""
+    query, params = _doctor_filters(doctor_id, date_filter, status_filter, date_from, date_to,
+                                    select=_DOCTOR_COUNTS)
+    row = execute_query(query, tuple(params), fetch=True, fetch_one=True)
+    return {k: int(v) for k, v in row.items()} if row else {'total': 0, 'high': 0, 'medium': 0, 'low': 0}
+
 def get_doctor_by_name(doctor_name):
     """
     Fetch doctor details by name
@@ -376,14 +711,77 @@ def get_doctor_by_name(doctor_name):
     INNER JOIN specializations s ON d.spec_id = s.spec_id
     WHERE d.name = %s
     """
-    return execute_query(query, (doctor_name,), fetch=True, fetch_one=True)
+    return execute_query(query, (doctor_name,), fetch=True, fetch_one=True, prepared=True)
+
+
+_LOCK_APPOINTMENT = """
+SELECT doctor_id, appointment_date, appointment_time, status, urgency_level
+FROM appointments WHERE appointment_id = %s
+FOR UPDATE
+"""
+
+_PEEK_APPOINTMENT = "SELECT doctor_id, appointment_date FROM appointments WHERE appointment_id = %s"
+
+
+def lock_appointment(appointment_id, new_date=None, max_attempts=3):
+    """
+    Lock an appointment's day row(s), then the appointment row
+    Same order as the booking path and optimize_day() (day rows first), so a
+    day re-plan running alongside cannot deadlock a status change, reschedule
+    or medical record, nor move the appointment while it is being changed.
+    Must run inside transaction().
+
+    Args:
+        new_date (date): Reschedule target; its day row is locked too (date order)
+
+    Returns:
+        dict: The locked appointment, or None if it does not exist
+    """
+    seen = execute_query(_PEEK_APPOINTMENT, (appointment_id,), fetch=True, fetch_one=True)
+    for _ in range(max_attempts):
+        if not seen:
+            return None
+        for day in sorted({seen['appointment_date'], new_date or seen['appointment_date']}):
+            if lock_day(seen['doctor_id'], day) is None:
+                raise Error("Could not lock the appointment's day")
+        current = execute_query(_LOCK_APPOINTMENT, (appointment_id,), fetch=True, fetch_one=True)
+        if not current or (current['doctor_id'], current['appointment_date']) == \
+                (seen['doctor_id'], seen['appointment_date']):
+            return current
+        # Re-planned onto another doctor/day between the two reads: lock that day as well
+        seen = current
+    raise Error(f"APT-{appointment_id:03d} kept moving while being locked")
 
 
 def update_appointment_status(appointment_id, new_status):
     """Update appointment status (Confirmed → Completed / Cancelled / No-show)."""
     query = "UPDATE appointments SET status = %s WHERE appointment_id = %s"
-    result = execute_query(query, (new_status, appointment_id))
-    return result is not None
+    try:
+        with transaction():
+            current = lock_appointment(appointment_id)
+            if current and current['status'] != new_status:
+                slot = (current['doctor_id'], current['appointment_date'], current['appointment_time'])
+                if new_status == 'Cancelled':
+                    # Cancelled slots go back to the pool
+                    release_slot(*slot)
+                elif current['status'] == 'Cancelled' and not take_slot(*slot):
+                    print(f"⚠️ Slot for APT-{appointment_id:03d} was rebooked; cannot reactivate")
+                    return False
+            result = execute_query(query, (new_status, appointment_id))
+            if current and result is not None:
+                was_occupied = occupies_slot(current['status'])
+                if was_occupied != occupies_slot(new_status):
+                    record_load_change(current['doctor_id'], current['appointment_date'],
+                                       -1 if was_occupied else 1)
+                updated = {**current, 'status': new_status}
+                record_changes(appointment_changes(current, updated))
+                record_rollup_changes(appointment_rollup_changes(current, updated))
+                refresh_queue_view([appointment_id])
+                notify_appointments_changed([appointment_id])
+        return result is not None
+    except Error as e:
+        print(f"❌ Error updating appointment status: {e}")
+        return False
 
 
 def cancel_appointment(appointment_id):
@@ -391,12 +789,8 @@ def cancel_appointment(appointment_id):
     return update_appointment_status(appointment_id, 'Cancelled')
 
 
-def get_patient_appointments(patient_id):
-    """
-    Fetch all appointments for a patient with full details.
-    Demonstrates multi-table JOIN from patient perspective.
-    """
-    query = """
+# Patient's appointment history (filters/ORDER BY appended per call)
+_PATIENT_SELECT = """
     SELECT 
         a.appointment_id,
         a.appointment_date,
@@ -423,28 +817,89 @@ def get_patient_appointments(patient_id):
     INNER JOIN predictions pred ON s.symptom_id = pred.symptom_id
     LEFT JOIN medical_records mr ON a.appointment_id = mr.appointment_id
     WHERE a.patient_id = %s
-    ORDER BY a.appointment_date DESC, a.appointment_time DESC
     """
+
+
+def get_patient_appointments(patient_id):
+    """
+    Fetch all appointments for a patient with full details.
+    Demonstrates multi-table JOIN from patient perspective.
+    """
+    query = _PATIENT_SELECT + " ORDER BY a.appointment_date DESC, a.appointment_time DESC"
     return execute_query(query, (patient_id,), fetch=True) or []
 
 
+def get_patient_appointments_page(patient_id, statuses=None, page_size=LIST_PAGE_SIZE, token=None,
+                                  date_from=None, date_to=None):
+    """
+    One page of a patient's appointments, newest first (keyset pagination)
+    statuses limits the page to e.g. ('Confirmed', 'Pending') for the upcoming tab;
+    date_from/date_to to appointment dates in [date_from, date_to).
+    
+    Returns:
+        dict: rows, next_token, prev_token; None on error
+    
+    Raises:
+        ValueError: token is malformed
+    """
+    query, params = _date_filters(_PATIENT_SELECT, [patient_id], None, date_from, date_to)
+    if statuses:
+        query += f" AND a.status IN ({', '.join(['%s'] * len(statuses))})"
+        params += list(statuses)
+    return _fetch_page(query, params, _HISTORY_SORT, _history_key, page_size, token)
+
+
+def get_patient_appointment_counts(patient_id):
+    """Appointments per status for a patient -> {'Confirmed': n, ...}"""
+    rows = execute_query("""
+        SELECT status, COUNT(*) AS n FROM appointments
+        WHERE patient_id = %s GROUP BY status
+        """, (patient_id,), fetch=True)
+    return {row['status']: row['n'] for row in rows or []}
+
+
 def reschedule_appointment(appointment_id, new_date, new_time=None):
-    """Reschedule an appointment to a new date/time."""
-    if new_time:
-        query = """
-        UPDATE appointments 
-        SET appointment_date = %s, appointment_time = %s
-        WHERE appointment_id = %s AND status IN ('Confirmed', 'Pending')
-        """
-        result = execute_query(query, (new_date, new_time, appointment_id))
-    else:
-        query = """
-        UPDATE appointments 
-        SET appointment_date = %s
-        WHERE appointment_id = %s AND status IN ('Confirmed', 'Pending')
-        """
-        result = execute_query(query, (new_date, appointment_id))
-    return result is not None
+    """Reschedule an appointment to a new date/time (moves its slot in the same transaction)."""
+    try:
+        with transaction():
+            current = lock_appointment(appointment_id, new_date)
+            if not current or current['status'] not in ('Confirmed', 'Pending'):
+                return False
+            
+            target_time = new_time or current['appointment_time']
+            release_slot(current['doctor_id'], current['appointment_date'], current['appointment_time'])
+            if not take_slot(current['doctor_id'], new_date, target_time):
+                print(f"⚠️ Slot {target_time} on {new_date} is already booked")
+                # Undo the release above
+                raise Error("Requested slot is not free")
+            
+            if new_time:
+                query = """
+                UPDATE appointments 
+                SET appointment_date = %s, appointment_time = %s
+                WHERE appointment_id = %s AND status IN ('Confirmed', 'Pending')
+                """
+                result = execute_query(query, (new_date, new_time, appointment_id))
+            else:
+                query = """
+                UPDATE appointments 
+                SET appointment_date = %s
+                WHERE appointment_id = %s AND status IN ('Confirmed', 'Pending')
+                """
+                result = execute_query(query, (new_date, appointment_id))
+            if result is not None and new_date != current['appointment_date']:
+                record_load_change(current['doctor_id'], current['appointment_date'], -1)
+                record_load_change(current['doctor_id'], new_date, 1)
+            if result is not None:
+                moved = {**current, 'appointment_date': new_date}
+                record_changes(appointment_changes(current, moved))
+                record_rollup_changes(appointment_rollup_changes(current, moved))
+                refresh_queue_view([appointment_id])
+                notify_appointments_changed([appointment_id])
+        return result is not None
+    except Error as e:
+        print(f"❌ Error rescheduling appointment: {e}")
+        return False
 
 
 def get_all_specializations():
@@ -455,5 +910,5 @@ def get_all_specializations():
         list: Specialization names
     """
     query = "SELECT spec_name FROM specializations ORDER BY spec_name"
-    results = execute_query(query, fetch=True)
+    results = execute_query(query, fetch=True, prepared=True)
     return [r['spec_name'] for r in results] if results else []
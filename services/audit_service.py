@@ -4,7 +4,10 @@ Handles audit log retrieval and manual log entries
 Demonstrates: INSERT with TIMESTAMP, filtering, ORDER BY DESC
 """
 
-from database.connection import execute_query
+from itertools import chain
+
+from database.connection import execute_query, execute_many, stream_query
+from services.query_helpers import date_range_condition
 
 
 def log_action(action_type, table_name, record_id=None,
@@ -23,8 +26,27 @@ def log_action(action_type, table_name, record_id=None,
     ))
 
 
-def get_audit_logs(limit=100, action_filter=None, table_filter=None):
-    """Fetch recent audit log entries with optional filters."""
+def log_actions_bulk(entries):
+    """
+    Write many audit entries with one multi-row INSERT.
+    entries: list of dicts with the same keys as log_action's arguments
+    """
+    query = """
+    INSERT INTO audit_log
+        (action_type, table_name, record_id, performed_by,
+         old_values, new_values, description)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    rows = [(
+        e['action_type'], e['table_name'], e.get('record_id'),
+        e.get('performed_by', 'system'), e.get('old_values'),
+        e.get('new_values'), e.get('description')
+    ) for e in entries]
+    return execute_many(query, rows)
+
+
+def get_audit_logs(limit=100, action_filter=None, table_filter=None, date_from=None, date_to=None):
+    """Fetch recent audit log entries with optional filters (performed_at in [date_from, date_to))."""
     query = """
     SELECT log_id, action_type, table_name, record_id,
            performed_by, old_values, new_values,
@@ -42,12 +64,48 @@ def get_audit_logs(limit=100, action_filter=None, table_filter=None):
         query += " AND table_name = %s"
         params.append(table_filter)
 
+    condition, range_params = date_range_condition('performed_at', date_from, date_to)
+    if condition:
+        query += " AND " + condition
+        params += range_params
+
     query += " ORDER BY performed_at DESC LIMIT %s"
     params.append(limit)
 
     return execute_query(query, tuple(params), fetch=True) or []
 
 
+def iter_audit_logs(action_filter=None, table_filter=None, row_format='tuple',
+                    date_from=None, date_to=None):
+    """
+    Stream the full audit log (newest first), fetched from MySQL in batches, e.g. for exports.
+    The first item yielded is the list of column names. A bad row_format
+    raises ValueError here, before anything is yielded.
+    """
+    columns = ['log_id', 'action_type', 'table_name', 'record_id',
+               'performed_by', 'old_values', 'new_values',
+               'description', 'performed_at']
+    query = f"SELECT {', '.join(columns)} FROM audit_log WHERE 1=1"
+    params = []
+
+    if action_filter and action_filter != "All":
+        query += " AND action_type = %s"
+        params.append(action_filter)
+
+    if table_filter and table_filter != "All":
+        query += " AND table_name = %s"
+        params.append(table_filter)
+
+    condition, range_params = date_range_condition('performed_at', date_from, date_to)
+    if condition:
+        query += " AND " + condition
+        params += range_params
+
+    query += " ORDER BY performed_at DESC"
+
+    return chain([columns], stream_query(query, tuple(params), row_format=row_format))
+
+
 def get_audit_action_types():
     """Distinct action types in the log."""
     query = "SELECT DISTINCT action_type FROM audit_log ORDER BY action_type"
@@ -62,14 +120,16 @@ def get_audit_table_names():
     return [r['table_name'] for r in rows]
 
 
-def get_audit_summary():
-    """Aggregated audit stats."""
-    query = """
+def get_audit_summary(date_from=None, date_to=None):
+    """Aggregated audit stats (performed_at in [date_from, date_to))."""
+    condition, params = date_range_condition('performed_at', date_from, date_to)
+    query = f"""
     SELECT 
         action_type,
         COUNT(*) AS count
     FROM audit_log
+    {'WHERE ' + condition if condition else ''}
     GROUP BY action_type
     ORDER BY count DESC
     """
-    return execute_query(query, fetch=True) or []
+    return execute_query(query, tuple(params), fetch=True) or []
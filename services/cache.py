@@ -0,0 +1,133 @@
+"""
+Stats Cache
+Process-wide TTL cache for dashboard aggregates, shared by every session
+Demonstrates: Time-based expiry, Tag invalidation on commit, Single-flight loading
+"""
+
+import functools
+import threading
+import time
+
+from config import STATS_CACHE_SECONDS, STATS_CACHE_MAX_ENTRIES
+from database.connection import on_commit
+
+
+class TTLCache:
+    """
+    Results of expensive read-only calls, kept for `ttl` seconds.
+
+    Entries carry tags (the tables they read); invalidate(tag) drops every
+    entry with that tag, so a write made through the service layer shows
+    up on the next read instead of after the TTL. Writes from other
+    processes are picked up when the entry expires. Concurrent misses on
+    one key wait for a single load, so a dashboard costs one query per TTL
+    window however many sessions are watching. Cached values are shared:
+    treat them as read-only.
+    """
+
+    def __init__(self, ttl=STATS_CACHE_SECONDS, max_entries=STATS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}   # key -> (expires_at, tags, value)
+        self._loading = {}   # key -> lock held by the session loading it
+        self._version = 0    # bumped by invalidate(); a load that raced one is not stored
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader, tags=(), ttl=None):
+        """Cached value for key, else loader() (None results are returned but not cached)"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:
+                    return value
+                version = self._version
+            try:
+                value = loader()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            with self._lock:
+                self.loads += 1
+                if value is not None and version == self._version:
+                    self._store(key, value, frozenset(tags), ttl if ttl is not None else self.ttl)
+            return value
+
+    def invalidate(self, *tags):
+        """Drop entries carrying any of these tags (every entry when called without tags)"""
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            if not tags:
+                self._entries.clear()
+                return
+            for key in [k for k, (_, entry_tags, _) in self._entries.items() if entry_tags.intersection(tags)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'loads': self.loads,
+                    'invalidations': self.invalidations}
+
+    def _lookup(self, key):
+        """Fresh value or None (caller holds _lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def _store(self, key, value, tags, ttl):
+        """Insert, evicting expired then soonest-to-expire entries past max_entries (caller holds _lock)"""
+        now = time.monotonic()
+        if len(self._entries) >= self.max_entries:
+            for k in [k for k, entry in self._entries.items() if entry[0] <= now]:
+                del self._entries[k]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+        self._entries[key] = (now + ttl, tags, value)
+
+
+_cache = TTLCache()
+
+
+def get_stats_cache():
+    """Process-wide cache shared by every session/thread"""
+    return _cache
+
+
+def cached(*tags, ttl=None):
+    """
+    Cache a read-only function's result per argument list
+
+        @cached('appointments', 'patients')
+        def get_overview_counts(): ...
+
+    The undecorated function stays available as fn.__wrapped__.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            return _cache.get_or_load(key, lambda: fn(*args, **kwargs), tags, ttl)
+        return wrapper
+    return decorate
+
+
+def invalidate_on_commit(*tags):
+    """
+    Drop cached results that read these tables once the current transaction commits
+    Runs immediately outside a transaction(); dropped with a rolled-back one.
+    """
+    on_commit(lambda: _cache.invalidate(*tags))
@@ -0,0 +1,213 @@
+"""
+Doctor Load Index
+In-process min-heap of doctor loads per (specialization, date) for least-loaded doctor selection
+Demonstrates: Heaps with lazy deletion, Versioned cache invalidation
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from config import LOAD_INDEX_CHECK_SECONDS, LOAD_INDEX_MAX_DAYS
+from database.connection import execute_query, on_commit
+from services.slot_service import OCCUPIES_SLOT, SLOT_COUNT
+
+# One aggregate query builds a (specialization, date) heap; load = occupied slots
+_LOAD_QUERY = f"""
+SELECT
+    d.doctor_id,
+    d.name,
+    d.qualification,
+    COUNT(a.appointment_id) as appointment_count
+FROM doctors d
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+LEFT JOIN appointments a ON d.doctor_id = a.doctor_id
+    AND a.appointment_date = %s
+    AND {OCCUPIES_SLOT}
+WHERE s.spec_name = %s AND d.available = TRUE
+GROUP BY d.doctor_id, d.name, d.qualification
+"""
+
+_VERSION_QUERY = """
+SELECT v.version
+FROM doctor_load_versions v
+INNER JOIN specializations s ON v.spec_id = s.spec_id
+WHERE s.spec_name = %s AND v.slot_date = %s
+"""
+
+# Bumps the doctor's (specialization, date) row;
+# LAST_INSERT_ID(expr) hands the new version back through cursor.lastrowid
+_BUMP_VERSION = """
+INSERT INTO doctor_load_versions (spec_id, slot_date, version)
+SELECT spec_id, %s, 1 FROM doctors WHERE doctor_id = %s
+ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)
+"""
+
+
+class _SpecDay:
+    """Loads of every doctor in one specialization on one date"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.loads = {}
+        self.doctors = {}
+        for row in rows:
+            self.loads[row['doctor_id']] = row['appointment_count']
+            self.doctors[row['doctor_id']] = (row['name'], row['qualification'])
+        # (load, doctor_id) entries; stale ones are skipped on read (lazy deletion)
+        self.heap = [(load, doctor_id) for doctor_id, load in self.loads.items()]
+        heapq.heapify(self.heap)
+
+    def adjust(self, doctor_id, delta):
+        if doctor_id not in self.loads:
+            return
+        self.loads[doctor_id] = max(0, self.loads[doctor_id] + delta)
+        heapq.heappush(self.heap, (self.loads[doctor_id], doctor_id))
+        if len(self.heap) > 4 * len(self.loads) + 16:
+            # Too many stale entries: compact
+            self.heap = [(load, doctor_id) for doctor_id, load in self.loads.items()]
+            heapq.heapify(self.heap)
+
+    def peek(self):
+        """(load, doctor_id) of the least-loaded doctor, or None"""
+        heap = self.heap
+        while heap and self.loads.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+
+class DoctorLoadIndex:
+    """
+    Least-loaded doctor lookups served from memory.
+
+    A (specialization, date) heap is built lazily from one aggregate query.
+    This process's bookings, cancellations and reschedules bump the
+    (specialization, date) row in doctor_load_versions inside the writing
+    transaction (record_change) and adjust the heap in place once it commits. At most every
+    `check_interval` seconds a lookup reads that version; if another worker
+    (or a rolled-back write) moved it, the heap is rebuilt. The locked booking
+    path stays authoritative, so a lookup is a hint that can be up to
+    `check_interval` seconds stale.
+    """
+
+    def __init__(self, capacity=SLOT_COUNT, check_interval=LOAD_INDEX_CHECK_SECONDS,
+                 max_days=LOAD_INDEX_MAX_DAYS):
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self.max_days = max_days
+        self._days = OrderedDict()  # (spec_name, date) -> _SpecDay
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def least_loaded(self, specialization_name, appointment_date):
+        """
+        Least-loaded available doctor with spare capacity
+
+        Returns:
+            dict: doctor_id, name, qualification, appointment_count; or None
+        """
+        day = self._get_day(specialization_name, appointment_date)
+        with self._lock:
+            top = day.peek()
+            if top is None or top[0] >= self.capacity:
+                return None
+            load, doctor_id = top
+            name, qualification = day.doctors[doctor_id]
+        return {
+            'doctor_id': doctor_id,
+            'name': name,
+            'qualification': qualification,
+            'appointment_count': load
+        }
+
+    def record_change(self, doctor_id, appointment_date, delta):
+        """
+        Apply a load change from this process (+1 booked, -1 cancelled/moved away)
+        Call inside the writing transaction so the version bump commits with it;
+        the cached heaps are adjusted only after that transaction commits.
+        """
+        new_version = execute_query(_BUMP_VERSION, (appointment_date, doctor_id))
+        if new_version is None:
+            self.invalidate(appointment_date)
+            return
+        new_version = new_version or 1  # first bump inserts the row; LAST_INSERT_ID is not set
+        # Publish only once the bump is visible: a rolled-back write leaves the heaps (and versions) alone
+        on_commit(lambda: self._apply_change(doctor_id, appointment_date, delta, new_version))
+
+    def _apply_change(self, doctor_id, appointment_date, delta, new_version):
+        with self._lock:
+            for key in [k for k in self._days if k[1] == appointment_date]:
+                day = self._days[key]
+                if doctor_id not in day.loads:
+                    continue
+                if new_version == day.version + 1:
+                    day.version = new_version
+                    day.adjust(doctor_id, delta)
+                else:
+                    # Someone else changed this day since we built it
+                    del self._days[key]
+
+    def invalidate(self, appointment_date=None):
+        """Drop cached heaps for a date (or all of them)"""
+        with self._lock:
+            if appointment_date is None:
+                self._days.clear()
+            else:
+                for key in [k for k in self._days if k[1] == appointment_date]:
+                    del self._days[key]
+
+    def stats(self):
+        with self._lock:
+            return {'cached_days': len(self._days), 'hits': self.hits, 'builds': self.builds}
+
+    def _get_day(self, specialization_name, appointment_date):
+        key = (specialization_name, appointment_date)
+        with self._lock:
+            day = self._days.get(key)
+            if day is not None and time.monotonic() - day.checked_at < self.check_interval:
+                self._days.move_to_end(key)
+                self.hits += 1
+                return day
+
+        if day is not None:
+            version = self._read_version(specialization_name, appointment_date)
+            with self._lock:
+                if version == day.version:
+                    day.checked_at = time.monotonic()
+                    self.hits += 1
+                    return day
+
+        # Read the version first: any write after it shows up as a mismatch later
+        version = self._read_version(specialization_name, appointment_date)
+        rows = execute_query(_LOAD_QUERY, (appointment_date, specialization_name),
+                             fetch=True, read_only=False) or []
+        day = _SpecDay(version, rows)
+        with self._lock:
+            self._days[key] = day
+            self._days.move_to_end(key)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+            self.builds += 1
+        return day
+
+    @staticmethod
+    def _read_version(specialization_name, appointment_date):
+        row = execute_query(_VERSION_QUERY, (specialization_name, appointment_date),
+                            fetch=True, fetch_one=True, prepared=True, read_only=False)
+        return row['version'] if row else 0
+
+
+_index = DoctorLoadIndex()
+
+
+def get_load_index():
+    """Process-wide load index shared by every session/thread"""
+    return _index
+
+
+def record_load_change(doctor_id, appointment_date, delta):
+    """Shortcut for get_load_index().record_change(...)"""
+    _index.record_change(doctor_id, appointment_date, delta)
@@ -3,14 +3,23 @@ Gemini AI Service
 Handles symptom analysis using Google Gemini API
 """
 
-import google.generativeai as genai
 from config import GEMINI_API_KEY
 import json
 import re
 
-# Initialize Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
+_model = None
+
+def _get_model():
+    """
+    Configure Gemini on first use
+    The SDK is imported lazily so importing this module stays cheap for headless jobs
+    """
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _model = genai.GenerativeModel('gemini-2.5-flash')
+    return _model
 
 def analyze_symptoms(symptom_text):
     """
@@ -62,7 +71,7 @@ Consider severity, duration, and potential complications when assigning urgency.
     
     try:
         print("🤖 Calling Gemini API for diagnosis...")
-        response = model.generate_content(prompt)
+        response = _get_model().generate_content(prompt)
         result_text = response.text.strip()
         
         # Clean the response (remove markdown code blocks if present)
@@ -0,0 +1,351 @@
+"""
+Intake Service
+Bulk registration and booking for mass-intake events (vaccination drives, health camps)
+Demonstrates: Multi-row INSERTs, Set-based ID lookups, Batch slot assignment in one transaction
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+from collections import Counter
+from datetime import date, timedelta
+
+from config import BOOKING_HORIZON_DAYS, SYMPTOM_MIN_LENGTH
+from database.connection import execute_query, execute_many, transaction
+from mysql.connector import Error
+from services.appointment_service import lock_spec_day
+from services.audit_service import log_actions_bulk
+from services.analytics_rollup import appointment_rollup_changes, record_rollup_changes
+from services.cache import invalidate_on_commit
+from services.doctor_load_index import record_load_change
+from services.gemini_service import analyze_symptoms, create_fallback_response
+from services.metric_counters import ALL_TIME, PATIENTS, SYMPTOMS, appointment_changes, record_changes
+from services.queue_engine import notify_appointments_changed
+from services.queue_view import refresh_queue_view
+from services.slot_service import FULL_MASK, pick_slot, slot_to_time
+
+DEFAULT_SPECIALIZATION = 'General Medicine'
+VALID_GENDERS = ('Male', 'Female', 'Other')
+VALID_MODES = ('Online', 'Offline')
+IN_CHUNK = 1000  # values per IN (...) lookup
+
+# Column limits of the patients table (schema.sql); longer values would fail the whole multi-row INSERT
+NAME_MAX_LENGTH = 50        # first_name, last_name VARCHAR(50)
+FULL_NAME_MAX_LENGTH = 100  # full_name VARCHAR(100)
+PHONE_DIGITS = (10, 15)     # phone VARCHAR(15)
+
+
+def load_intake_file(path):
+    """
+    Read intake rows from a CSV (with header row) or JSONL file
+
+    Expected fields: first_name, last_name, gender, age, phone, allergies,
+    symptom_text, specialization (optional), mode (optional)
+
+    Returns:
+        list: One dict per row
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() == '.jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+def _validate(record):
+    """Normalize one intake row; returns (clean_row, None) or (None, error message)"""
+    first_name = (record.get('first_name') or '').strip()
+    last_name = (record.get('last_name') or '').strip()
+    phone = str(record.get('phone') or '').strip()
+    symptom_text = (record.get('symptom_text') or '').strip()
+    gender = (record.get('gender') or '').strip().capitalize()
+    mode = (record.get('mode') or 'Offline').strip().capitalize()
+
+    if not first_name:
+        return None, "first_name is required"
+    if len(first_name) > NAME_MAX_LENGTH or len(last_name) > NAME_MAX_LENGTH:
+        return None, f"first_name and last_name must be at most {NAME_MAX_LENGTH} characters"
+    if len(f"{first_name} {last_name}".strip()) > FULL_NAME_MAX_LENGTH:
+        return None, f"full name must be at most {FULL_NAME_MAX_LENGTH} characters"
+    if gender not in VALID_GENDERS:
+        return None, f"gender must be one of {', '.join(VALID_GENDERS)}"
+    try:
+        age = int(record.get('age'))
+    except (TypeError, ValueError):
+        return None, "age must be a number"
+    if not 0 < age < 150:
+        return None, "age must be between 1 and 149"
+    if not phone.isdigit() or not PHONE_DIGITS[0] <= len(phone) <= PHONE_DIGITS[1]:
+        return None, f"phone must be a {PHONE_DIGITS[0]}-{PHONE_DIGITS[1]} digit number"
+    # Same minimum as the registration form (on the stripped text)
+    if len(symptom_text) < SYMPTOM_MIN_LENGTH:
+        return None, f"symptom_text is too short (minimum {SYMPTOM_MIN_LENGTH} characters)"
+    if mode not in VALID_MODES:
+        return None, "mode must be Online or Offline"
+
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'full_name': f"{first_name} {last_name}".strip(),
+        'gender': gender,
+        'age': age,
+        'phone': phone,
+        'allergies': (record.get('allergies') or '').strip() or 'None',
+        'symptom_text': symptom_text,
+        'specialization': (record.get('specialization') or '').strip() or DEFAULT_SPECIALIZATION,
+        'mode': mode
+    }, None
+
+
+def _select_in(query, values, column):
+    """Run `query` (with one {ids} IN-list placeholder) over `values` in chunks; map column -> row"""
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), IN_CHUNK):
+        chunk = values[start:start + IN_CHUNK]
+        rows = execute_query(query.format(ids=", ".join(["%s"] * len(chunk))), tuple(chunk), fetch=True)
+        if rows is None:
+            raise Error("Lookup failed during bulk intake")
+        for row in rows:
+            found[row[column]] = row
+    return found
+
+
+def _save_records(rows):
+    """Insert patients (reusing existing phones), symptoms and predictions; fills patient_id/symptom_id"""
+    phones = [r['phone'] for r in rows]
+    existing = _select_in("SELECT patient_id, phone FROM patients WHERE phone IN ({ids})", phones, 'phone')
+
+    new_patients = [r for r in rows if r['phone'] not in existing]
+    if execute_many("""
+        INSERT INTO patients (first_name, last_name, full_name, gender, age, phone, allergies)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, [(r['first_name'], r['last_name'], r['full_name'], r['gender'], r['age'],
+               r['phone'], r['allergies']) for r in new_patients]) is None:
+        raise Error("Patient insert failed")
+
+    # Auto-increment ids of a multi-row INSERT are not guaranteed consecutive: look them up by phone
+    patients = _select_in("SELECT patient_id, phone FROM patients WHERE phone IN ({ids})", phones, 'phone')
+    for r in rows:
+        r['patient_id'] = patients[r['phone']]['patient_id']
+        r['entry']['patient_id'] = r['patient_id']
+        r['is_new'] = r['phone'] not in existing
+
+    if execute_many("INSERT INTO symptoms (patient_id, symptom_text) VALUES (%s, %s)",
+                    [(r['patient_id'], r['symptom_text']) for r in rows]) is None:
+        raise Error("Symptom insert failed")
+
+    # Phones are unique within the batch, so each patient's newest symptom is the one just inserted
+    symptoms = _select_in("""
+        SELECT patient_id, MAX(symptom_id) AS symptom_id FROM symptoms
+        WHERE patient_id IN ({ids}) GROUP BY patient_id
+        """, [r['patient_id'] for r in rows], 'patient_id')
+    for r in rows:
+        r['symptom_id'] = symptoms[r['patient_id']]['symptom_id']
+
+    if execute_many("""
+        INSERT INTO predictions
+        (symptom_id, predicted_disease, probability, urgency_level, urgency_reason)
+        VALUES (%s, %s, %s, %s, %s)
+        """, [(r['symptom_id'], r['diagnosis']['predicted_disease'], r['diagnosis']['probability'],
+               r['urgency_level'], r['diagnosis'].get('urgency_reason', '')) for r in rows]) is None:
+        raise Error("Prediction insert failed")
+
+
+def _assign_slots(conn, rows, start_date, horizon_days):
+    """
+    Give every row a doctor and slot in one pass
+    Rows are taken most-urgent first; each specialization's days are locked in
+    date order and filled least-loaded-doctor first. Returns the assigned rows.
+    """
+    staffed = {r['spec_name'] for r in execute_query("""
+        SELECT DISTINCT s.spec_name FROM specializations s
+        INNER JOIN doctors d ON d.spec_id = s.spec_id
+        WHERE d.available = TRUE
+        """, fetch=True) or []}
+
+    by_spec = {}
+    for r in sorted(rows, key=lambda r: -r['urgency_level']):
+        spec = r['specialization'] if r['specialization'] in staffed else DEFAULT_SPECIALIZATION
+        by_spec.setdefault(spec, []).append(r)
+
+    assigned = []
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for spec in sorted(by_spec):  # fixed lock order across specializations
+            waiting = by_spec[spec]
+            for day_no in range(horizon_days):
+                if not waiting:
+                    break
+                day = start_date + timedelta(days=day_no)
+                doctors = {d['doctor_id']: d for d in lock_spec_day(cursor, spec, day)}
+                masks = {doctor_id: d['taken_mask'] for doctor_id, d in doctors.items()}
+                heap = [(bin(mask).count('1'), doctor_id)
+                        for doctor_id, mask in masks.items() if mask != FULL_MASK]
+                heapq.heapify(heap)
+
+                booked_today = Counter()
+                still_waiting = []
+                for r in waiting:
+                    if not heap:
+                        still_waiting.append(r)
+                        continue
+                    load, doctor_id = heapq.heappop(heap)
+                    slot_index = pick_slot(masks[doctor_id], r['urgency_level'])
+                    masks[doctor_id] |= 1 << slot_index
+                    if masks[doctor_id] != FULL_MASK:
+                        heapq.heappush(heap, (load + 1, doctor_id))
+                    booked_today[doctor_id] += 1
+                    r.update(doctor_id=doctor_id, doctor_name=doctors[doctor_id]['name'],
+                             assigned_spec=spec, appointment_date=day,
+                             appointment_time=slot_to_time(slot_index))
+                    assigned.append(r)
+                waiting = still_waiting
+
+                for doctor_id, count in booked_today.items():
+                    cursor.execute(
+                        "UPDATE doctor_day_slots SET taken_mask = %s WHERE doctor_id = %s AND slot_date = %s",
+                        (masks[doctor_id], doctor_id, day)
+                    )
+                    record_load_change(doctor_id, day, count)
+    finally:
+        cursor.close()
+    return assigned
+
+
+def bulk_intake(records, start_date=None, horizon_days=BOOKING_HORIZON_DAYS, use_ai=False,
+                performed_by='intake'):
+    """
+    Register and book a batch of patients in one transaction
+
+    Valid rows get a patient (an existing phone number reuses its patient),
+    a symptom, a prediction and, capacity permitting, an appointment.
+    Triage uses the keyword fallback unless use_ai=True (one Gemini call per row).
+
+    Args:
+        records (list): Intake dicts (see load_intake_file)
+        start_date (date): First appointment date (default today)
+        horizon_days (int): Days to spread bookings over
+        use_ai (bool): Run Gemini triage per row (slow for large batches)
+        performed_by (str): Audit log actor
+
+    Returns:
+        list: One result dict per input row, in input order:
+              row, phone, status ('booked' / 'waitlisted' / 'invalid' / 'duplicate' / 'error'),
+              message, patient_id, appointment_id, doctor, specialization,
+              appointment_date, appointment_time, urgency_level
+    """
+    start_date = start_date or date.today()
+    report, rows, seen = [], [], set()
+
+    for i, record in enumerate(records, 1):
+        entry = {'row': i, 'phone': record.get('phone'), 'status': None, 'message': '',
+                 'patient_id': None, 'appointment_id': None, 'doctor': None, 'specialization': None,
+                 'appointment_date': None, 'appointment_time': None, 'urgency_level': None}
+        report.append(entry)
+        clean, error = _validate(record)
+        if error:
+            entry.update(status='invalid', message=error)
+        elif clean['phone'] in seen:
+            entry.update(status='duplicate', message="phone appears earlier in this batch")
+        else:
+            seen.add(clean['phone'])
+            diagnosis = analyze_symptoms(clean['symptom_text']) if use_ai else None
+            clean['diagnosis'] = diagnosis or create_fallback_response(clean['symptom_text'])
+            clean['urgency_level'] = clean['diagnosis']['urgency_level']
+            clean['entry'] = entry
+            entry['urgency_level'] = clean['urgency_level']
+            rows.append(clean)
+
+    if not rows:
+        return report
+
+    try:
+        with transaction() as conn:
+            _save_records(rows)
+            assigned = _assign_slots(conn, rows, start_date, horizon_days)
+
+            if execute_many("""
+                INSERT INTO appointments
+                (patient_id, doctor_id, symptom_id, urgency_level,
+                 appointment_date, appointment_time, status, mode)
+                VALUES (%s, %s, %s, %s, %s, %s, 'Confirmed', %s)
+                """, [(r['patient_id'], r['doctor_id'], r['symptom_id'], r['urgency_level'],
+                       r['appointment_date'], r['appointment_time'], r['mode']) for r in assigned]) is None:
+                raise Error("Appointment insert failed")
+
+            appointments = _select_in(
+                "SELECT appointment_id, symptom_id FROM appointments WHERE symptom_id IN ({ids})",
+                [r['symptom_id'] for r in assigned], 'symptom_id')
+            for r in assigned:
+                r['appointment_id'] = appointments[r['symptom_id']]['appointment_id']
+            counters = Counter({(PATIENTS, ALL_TIME): sum(r['is_new'] for r in rows), (SYMPTOMS, None): len(rows)})
+            rollup = Counter()
+            for r in assigned:
+                booked = {'status': 'Confirmed', 'urgency_level': r['urgency_level'],
+                          'appointment_date': r['appointment_date'], 'doctor_id': r['doctor_id']}
+                counters.update(appointment_changes(None, booked))
+                rollup.update(appointment_rollup_changes(None, booked))
+            if not record_changes(counters) or not record_rollup_changes(rollup):
+                raise Error("Counter or rollup update failed")
+            refresh_queue_view([r['appointment_id'] for r in assigned])
+            notify_appointments_changed([r['appointment_id'] for r in assigned])
+            invalidate_on_commit('patients', 'predictions')
+
+            audit = [{'action_type': 'INSERT', 'table_name': 'patients', 'record_id': r['patient_id'],
+                      'performed_by': performed_by, 'new_values': f"name={r['full_name']}, phone={r['phone']}",
+                      'description': f"New patient registered (bulk intake): {r['full_name']}"}
+                     for r in rows if r['is_new']]
+            audit += [{'action_type': 'INSERT', 'table_name': 'appointments', 'record_id': r['appointment_id'],
+                       'performed_by': performed_by,
+                       'new_values': f"patient_id={r['patient_id']}, doctor={r['doctor_name']}, "
+                                     f"urgency={r['urgency_level']}",
+                       'description': f"Appointment APT-{r['appointment_id']:03d} booked (bulk intake)"}
+                      for r in assigned]
+            if log_actions_bulk(audit) is None:
+                raise Error("Audit log insert failed")
+    except Error as e:
+        print(f"❌ Bulk intake rolled back: {e}")
+        for r in rows:
+            r['entry'].update(status='error', message=str(e), patient_id=None)
+        return report
+
+    for r in rows:
+        if 'appointment_id' in r:
+            r['entry'].update(status='booked', appointment_id=r['appointment_id'], doctor=r['doctor_name'],
+                              specialization=r['assigned_spec'], appointment_date=r['appointment_date'],
+                              appointment_time=r['appointment_time'])
+        else:
+            r['entry'].update(status='waitlisted',
+                              message=f"No free {r['specialization']} slot within {horizon_days} days")
+
+    counts = Counter(entry['status'] for entry in report)
+    print(f"✅ Bulk intake: {counts['booked']} booked, {counts['waitlisted']} waitlisted, "
+          f"{counts['invalid'] + counts['duplicate']} rejected")
+    return report
+
+
+def write_report(report, path):
+    """Save a bulk_intake() report as CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(report[0].keys()) if report else ['row'])
+        writer.writeheader()
+        writer.writerows(report)
+
+
+if __name__ == "__main__":
+    from database.connection import ensure_pool
+
+    parser = argparse.ArgumentParser(description="Register and book patients from a CSV/JSONL file")
+    parser.add_argument("file")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="First appointment date")
+    parser.add_argument("--horizon", type=int, default=BOOKING_HORIZON_DAYS)
+    parser.add_argument("--ai", action="store_true", help="Use Gemini triage (one call per row)")
+    parser.add_argument("--report", default="intake_report.csv")
+    args = parser.parse_args()
+
+    ensure_pool()
+    result = bulk_intake(load_intake_file(args.file), args.date, args.horizon, use_ai=args.ai)
+    write_report(result, args.report)
+    print(f"📄 Report written to {args.report}")
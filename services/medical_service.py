@@ -4,7 +4,15 @@ Handles medical records, prescriptions, and feedback
 Demonstrates: Multi-table INSERT, Foreign Keys, Transactions, Aggregation
 """
 
-from database.connection import execute_query, get_connection
+from database.connection import execute_query, execute_many, transaction
+from services.appointment_service import lock_appointment
+from services.analytics_rollup import appointment_rollup_changes, record_rollup_changes
+from services.cache import invalidate_on_commit
+from services.doctor_load_index import record_load_change
+from services.metric_counters import ALL_TIME, FEEDBACK, MEDICAL_RECORDS, appointment_changes, bump, record_changes
+from services.queue_engine import notify_appointments_changed
+from services.queue_view import refresh_queue_view
+from services.slot_service import occupies_slot
 from mysql.connector import Error
 from datetime import date
 
@@ -16,39 +24,42 @@ def create_medical_record(appointment_id, diagnosis, notes=""):
     Create a medical record for a completed appointment.
     Uses transaction to also mark appointment as Completed.
     """
-    conn = get_connection()
-    if not conn:
-        return None
-    cursor = None
     try:
-        cursor = conn.cursor(dictionary=True)
-
-        # Insert medical record
-        cursor.execute("""
-            INSERT INTO medical_records (appointment_id, diagnosis, notes, record_date)
-            VALUES (%s, %s, %s, %s)
-        """, (appointment_id, diagnosis, notes, date.today()))
-
-        record_id = cursor.lastrowid
-
-        # Mark appointment as Completed
-        cursor.execute("""
-            UPDATE appointments SET status = 'Completed' WHERE appointment_id = %s
-        """, (appointment_id,))
-
-        conn.commit()
+        with transaction():
+            # Day row first, then the appointment (same lock order as optimize_day)
+            current = lock_appointment(appointment_id)
+            if not current:
+                print(f"❌ Appointment {appointment_id} not found")
+                return None
+
+            # Insert medical record
+            record_id = execute_query("""
+                INSERT INTO medical_records (appointment_id, diagnosis, notes, record_date)
+                VALUES (%s, %s, %s, %s)
+            """, (appointment_id, diagnosis, notes, date.today()))
+
+            # Mark appointment as Completed
+            execute_query("""
+                UPDATE appointments SET status = 'Completed' WHERE appointment_id = %s
+            """, (appointment_id,))
+
+            # Completed still occupies its slot; only completing a Cancelled row changes the day load
+            if not occupies_slot(current['status']):
+                record_load_change(current['doctor_id'], current['appointment_date'], 1)
+
+            # Counters, rollup and queue view commit with the record and the status change
+            completed = {**current, 'status': 'Completed'}
+            record_changes({**appointment_changes(current, completed), (MEDICAL_RECORDS, ALL_TIME): 1})
+            record_rollup_changes(appointment_rollup_changes(current, completed))
+            refresh_queue_view([appointment_id])
+            notify_appointments_changed([appointment_id])
+            invalidate_on_commit('medical_records')
         print(f"✅ Medical record created. ID: {record_id}")
         return record_id
 
     except Error as e:
-        conn.rollback()
         print(f"❌ Error creating medical record: {e}")
         return None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 def get_medical_record_by_appointment(appointment_id):
@@ -82,31 +93,20 @@ def add_prescriptions_bulk(record_id, prescriptions_list):
     """
     Add multiple prescriptions in one transaction.
     prescriptions_list: list of dicts with keys medicine_name, dosage, duration
+    Sent as a single multi-row INSERT instead of one INSERT per line.
     """
-    conn = get_connection()
-    if not conn:
-        return False
-    cursor = None
-    try:
-        cursor = conn.cursor()
-        query = """
-            INSERT INTO prescriptions (record_id, medicine_name, dosage, duration)
-            VALUES (%s, %s, %s, %s)
-        """
-        for p in prescriptions_list:
-            cursor.execute(query, (record_id, p['medicine_name'], p['dosage'], p['duration']))
-        conn.commit()
-        print(f"✅ {len(prescriptions_list)} prescriptions added for record {record_id}")
-        return True
-    except Error as e:
-        conn.rollback()
-        print(f"❌ Error adding prescriptions: {e}")
+    query = """
+        INSERT INTO prescriptions (record_id, medicine_name, dosage, duration)
+        VALUES (%s, %s, %s, %s)
+    """
+    rows = [(record_id, p['medicine_name'], p['dosage'], p['duration'])
+            for p in prescriptions_list]
+    added = execute_many(query, rows)
+    if added is None:
+        print(f"❌ Error adding prescriptions for record {record_id}")
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    print(f"✅ {len(prescriptions_list)} prescriptions added for record {record_id}")
+    return True
 
 
 def get_prescriptions_by_record(record_id):
@@ -142,7 +142,12 @@ def submit_feedback(patient_id, appointment_id, rating, comment=""):
     VALUES (%s, %s, %s, %s)
     """
     try:
-        return execute_query(query, (patient_id, appointment_id, rating, comment))
+        with transaction():
+            feedback_id = execute_query(query, (patient_id, appointment_id, rating, comment))
+            if feedback_id:
+                bump(FEEDBACK)
+                invalidate_on_commit('feedback')
+        return feedback_id
     except Exception as e:
         print(f"❌ Error submitting feedback: {e}")
         return None
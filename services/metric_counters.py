@@ -0,0 +1,200 @@
+"""
+Metric Counters
+Dashboard counts kept in metric_counters, updated in the same transaction as the write
+Demonstrates: Incrementally maintained aggregates, Upsert deltas, Locked reconciliation
+Run from the project root:  python -m services.metric_counters reconcile [--days N]
+"""
+
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+
+from database.connection import execute_query, transaction
+
+# Bucket of the all-time totals (DATE's minimum; day buckets are real dates)
+ALL_TIME = date(1000, 1, 1)
+
+# All-time totals
+PATIENTS = 'patients'
+APPOINTMENTS = 'appointments'
+MEDICAL_RECORDS = 'medical_records'
+FEEDBACK = 'feedback'
+# Per day: Confirmed appointments (and those with urgency >= 8) by appointment_date,
+# symptom submissions by the server's submission date
+CONFIRMED = 'confirmed'
+CONFIRMED_HIGH = 'confirmed_high'
+SYMPTOMS = 'symptoms'
+
+HIGH_URGENCY = 8
+
+# Source-of-truth recount per metric -> (bucket, value) rows; {since} is "" or an AND range predicate
+_RECOUNT = {
+    PATIENTS: "SELECT DATE('1000-01-01') AS bucket, COUNT(*) AS value FROM patients",
+    APPOINTMENTS: "SELECT DATE('1000-01-01') AS bucket, COUNT(*) AS value FROM appointments",
+    MEDICAL_RECORDS: "SELECT DATE('1000-01-01') AS bucket, COUNT(*) AS value FROM medical_records",
+    FEEDBACK: "SELECT DATE('1000-01-01') AS bucket, COUNT(*) AS value FROM feedback",
+    CONFIRMED: """
+        SELECT appointment_date AS bucket, COUNT(*) AS value FROM appointments
+        WHERE status = 'Confirmed' {since} GROUP BY appointment_date
+        """,
+    CONFIRMED_HIGH: f"""
+        SELECT appointment_date AS bucket, COUNT(*) AS value FROM appointments
+        WHERE status = 'Confirmed' AND urgency_level >= {HIGH_URGENCY} {{since}} GROUP BY appointment_date
+        """,
+    SYMPTOMS: """
+        SELECT DATE(submitted_at) AS bucket, COUNT(*) AS value FROM symptoms
+        WHERE 1=1 {since} GROUP BY DATE(submitted_at)
+        """,
+}
+_SINCE_COLUMN = {CONFIRMED: 'appointment_date', CONFIRMED_HIGH: 'appointment_date', SYMPTOMS: 'submitted_at'}
+
+
+def record_changes(changes, cursor=None):
+    """
+    Apply counter deltas as one upsert
+    Run it inside the write's transaction (or pass that transaction's cursor)
+    so the counters commit or roll back with the rows they count. Keys are
+    written in sorted order, so concurrent writers lock counter rows in the
+    same order and cannot deadlock on them.
+
+    Args:
+        changes (dict): (metric, bucket) -> delta; bucket None = the server's CURDATE()
+        cursor: Cursor of a connection-managed transaction (default: execute_query)
+
+    Returns:
+        bool: False if the upsert failed
+    """
+    items = sorted(((m, b), d) for (m, b), d in changes.items() if d)
+    if not items:
+        return True
+    query = f"""
+        INSERT INTO metric_counters (metric, bucket, value)
+        VALUES {', '.join(['(%s, COALESCE(%s, CURDATE()), %s)'] * len(items))}
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+        """
+    params = tuple(v for (metric, bucket), delta in items for v in (metric, bucket, delta))
+    if cursor is not None:
+        cursor.execute(query, params)
+        return True
+    return execute_query(query, params) is not None
+
+
+def bump(metric, bucket=ALL_TIME, delta=1):
+    """record_changes() for a single counter"""
+    return record_changes({(metric, bucket): delta})
+
+
+def _appointment_counts(state):
+    counts = Counter()
+    if state and state['status'] == 'Confirmed':
+        counts[(CONFIRMED, state['appointment_date'])] += 1
+        if state['urgency_level'] >= HIGH_URGENCY:
+            counts[(CONFIRMED_HIGH, state['appointment_date'])] += 1
+    return counts
+
+
+def appointment_changes(before, after):
+    """
+    Counter deltas for one appointment going from `before` to `after`
+
+    Args:
+        before, after (dict): status, appointment_date, urgency_level; None for
+                              "did not exist" (insert) / "no longer exists" (delete)
+
+    Returns:
+        Counter: (metric, bucket) -> delta
+    """
+    changes = Counter(_appointment_counts(after))
+    changes.subtract(_appointment_counts(before))
+    changes[(APPOINTMENTS, ALL_TIME)] += (after is not None) - (before is not None)
+    return changes
+
+
+def get_metrics(day=None):
+    """
+    Dashboard counts: all-time totals plus one day's counters, one primary-key read
+
+    Args:
+        day (date): Day of the per-day counters; None = the server's CURDATE()
+
+    Returns:
+        dict: patients, appointments, medical_records, feedback, confirmed,
+              confirmed_high, symptoms (0 for counters never written)
+    """
+    totals = (PATIENTS, APPOINTMENTS, MEDICAL_RECORDS, FEEDBACK)
+    daily = (CONFIRMED, CONFIRMED_HIGH, SYMPTOMS)
+    conditions = (["(metric = %s AND bucket = %s)"] * len(totals)
+                  + ["(metric = %s AND bucket = COALESCE(%s, CURDATE()))"] * len(daily))
+    params = [v for metric in totals for v in (metric, ALL_TIME)] + [v for metric in daily for v in (metric, day)]
+    rows = execute_query(f"SELECT metric, value FROM metric_counters WHERE {' OR '.join(conditions)}",
+                         tuple(params), fetch=True, prepared=True)
+    result = dict.fromkeys(totals + daily, 0)
+    result.update({row['metric']: int(row['value']) for row in rows or []})
+    return result
+
+
+def reconcile(days=None):
+    """
+    Recount every metric from its source table and overwrite drifted counters
+
+    Each metric is reconciled in its own transaction that first locks its
+    counter rows (FOR UPDATE also locks the gaps, so no new bucket appears).
+    A writer that has inserted but not yet bumped its counter is not in
+    the recount (uncommitted) and adds its delta after we commit, so the
+    result is exact. Writers of that metric wait for the recount: run it
+    off-peak.
+
+    Args:
+        days (int): Only recount day buckets from today - days on (None = all);
+                    the all-time totals are always recounted
+
+    Returns:
+        dict: metric -> {bucket: (counter, actual)} for every corrected bucket; None on error
+    """
+    since = date.today() - timedelta(days=days) if days is not None else None
+    drift = {}
+    try:
+        for metric, recount in _RECOUNT.items():
+            column = _SINCE_COLUMN.get(metric)
+            window = since if column else None
+            lock = "SELECT bucket, value FROM metric_counters WHERE metric = %s"
+            lock_params, count_params = [metric], []
+            if window:
+                lock += " AND bucket >= %s"
+                lock_params.append(window)
+                count_params.append(window)
+            with transaction():
+                current = {row['bucket']: row['value'] for row in
+                           execute_query(lock + " FOR UPDATE", tuple(lock_params), fetch=True) or []}
+                actual = {row['bucket']: row['value'] for row in
+                          execute_query(recount.format(since=f"AND {column} >= %s" if window else ""),
+                                        tuple(count_params), fetch=True, read_only=False) or []}
+                wrong = {bucket: (current.get(bucket, 0), actual.get(bucket, 0))
+                         for bucket in set(current) | set(actual)
+                         if current.get(bucket, 0) != actual.get(bucket, 0)}
+                if wrong:
+                    record_changes({(metric, bucket): now - was for bucket, (was, now) in wrong.items()})
+                    drift[metric] = wrong
+    except Exception as e:
+        print(f"❌ Metric reconciliation failed: {e}")
+        return None
+    return drift
+
+
+if __name__ == "__main__":
+    from database.connection import ensure_pool
+
+    parser = argparse.ArgumentParser(description="Recount metric_counters from the source tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reconcile_cmd = commands.add_parser("reconcile", help="Correct drifted counters (schedule nightly)")
+    reconcile_cmd.add_argument("--days", type=int, help="Only recount day buckets of the last N days (and later)")
+    args = parser.parse_args()
+
+    ensure_pool()
+    drift = reconcile(args.days)
+    if drift is not None:
+        if not drift:
+            print("✅ All counters match their source tables")
+        for metric, buckets in sorted(drift.items()):
+            print(f"⚠️ {metric}: corrected {len(buckets)} bucket(s) "
+                  + ", ".join(f"{b}: {was} → {now}" for b, (was, now) in sorted(buckets.items())[:10]))
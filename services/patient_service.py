@@ -3,7 +3,11 @@ Patient Service
 Handles all patient-related database operations
 """
 
-from database.connection import execute_query
+from database.connection import execute_query, transaction
+from mysql.connector import Error
+from services.cache import cached, invalidate_on_commit
+from services.metric_counters import PATIENTS, bump
+from services.queue_view import refresh_for_patient
 from datetime import date
 import hashlib
 
@@ -37,7 +41,11 @@ def create_patient(first_name, last_name, gender, age, phone, allergies=None):
     params = (first_name, last_name, full_name, gender, age, phone, allergies)
     
     try:
-        patient_id = execute_query(query, params)
+        with transaction():
+            patient_id = execute_query(query, params)
+            if patient_id:
+                bump(PATIENTS)
+                invalidate_on_commit('patients')
         if patient_id:
             print(f"✅ Patient created successfully. ID: {patient_id}")
         return patient_id
@@ -56,7 +64,7 @@ def get_patient_by_id(patient_id):
         dict: Patient record or None
     """
     query = "SELECT * FROM patients WHERE patient_id = %s"
-    result = execute_query(query, (patient_id,), fetch=True, fetch_one=True)
+    result = execute_query(query, (patient_id,), fetch=True, fetch_one=True, prepared=True)
     return result
 
 def get_patient_by_phone(phone):
@@ -71,7 +79,7 @@ def get_patient_by_phone(phone):
         dict: Patient record or None
     """
     query = "SELECT * FROM patients WHERE phone = %s"
-    result = execute_query(query, (phone,), fetch=True, fetch_one=True)
+    result = execute_query(query, (phone,), fetch=True, fetch_one=True, prepared=True)
     return result
 
 def update_patient_allergies(patient_id, allergies):
@@ -86,8 +94,16 @@ def update_patient_allergies(patient_id, allergies):
         bool: True if successful
     """
     query = "UPDATE patients SET allergies = %s WHERE patient_id = %s"
-    result = execute_query(query, (allergies, patient_id))
-    return result is not None
+    try:
+        # Allergies are shown on every queue row of the patient
+        with transaction():
+            result = execute_query(query, (allergies, patient_id))
+            if result is not None:
+                refresh_for_patient(patient_id)
+        return result is not None
+    except Error as e:
+        print(f"❌ Error updating allergies: {e}")
+        return False
 
 def get_all_patients(limit=50):
     """
@@ -107,32 +123,30 @@ def get_all_patients(limit=50):
     """
     return execute_query(query, (limit,), fetch=True) or []
 
+@cached('patients')
 def get_patient_statistics():
     """
     Get patient statistics for dashboard
+    One GROUP BY gender pass; the total and the average age are summed from
+    its rows (AVG ignores NULL ages, so does SUM(age) / COUNT(age)).
     
     Returns:
-        dict: Statistics (total patients, age distribution, etc.)
-    """
-    queries = {
-        'total_patients': "SELECT COUNT(*) as count FROM patients",
-        'avg_age': "SELECT AVG(age) as avg_age FROM patients",
-        'gender_distribution': """
-            SELECT gender, COUNT(*) as count 
-            FROM patients 
-            GROUP BY gender
-        """
-    }
-    
-    stats = {}
-    stats['total_patients'] = execute_query(queries['total_patients'], 
-                                            fetch=True, fetch_one=True)['count']
-    stats['avg_age'] = round(execute_query(queries['avg_age'], 
-                                           fetch=True, fetch_one=True)['avg_age'] or 0, 1)
-    stats['gender_distribution'] = execute_query(queries['gender_distribution'], 
-                                                 fetch=True)
+        dict: Statistics (total patients, age distribution, etc.); None on error
+    """
+    rows = execute_query("""
+        SELECT gender, COUNT(*) AS count, SUM(age) AS age_sum, COUNT(age) AS aged
+        FROM patients
+        GROUP BY gender
+        """, fetch=True)
+    if rows is None:
+        return None
     
-    return stats
+    aged = sum(r['aged'] for r in rows)
+    return {
+        'total_patients': sum(r['count'] for r in rows),
+        'avg_age': round(float(sum(r['age_sum'] or 0 for r in rows)) / aged, 1) if aged else 0,
+        'gender_distribution': [{'gender': r['gender'], 'count': r['count']} for r in rows]
+    }
 
 
 def set_patient_password(patient_id, password):
@@ -153,13 +167,13 @@ def verify_patient_login(phone, password):
     FROM patients
     WHERE phone = %s AND password_hash = %s
     """
-    return execute_query(query, (phone, hashed), fetch=True, fetch_one=True)
+    return execute_query(query, (phone, hashed), fetch=True, fetch_one=True, prepared=True)
 
 
 def patient_has_password(phone):
     """Check if patient has a password set."""
     query = "SELECT password_hash FROM patients WHERE phone = %s"
-    result = execute_query(query, (phone,), fetch=True, fetch_one=True)
+    result = execute_query(query, (phone,), fetch=True, fetch_one=True, prepared=True)
     if result and result.get('password_hash'):
         return True
     return False
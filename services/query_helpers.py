@@ -0,0 +1,140 @@
+"""
+Query Helpers
+Keyset (seek) pagination and date-range predicates shared by the listing and aggregate services
+Demonstrates: Keyset pagination, Row-value comparisons expanded for mixed ASC/DESC sorts,
+Sargable [start, end) range predicates
+"""
+
+import base64
+import json
+from datetime import date, time, timedelta
+
+
+def _to_json(value):
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {'s': int(value.total_seconds())}
+    if isinstance(value, time):
+        return {'s': value.hour * 3600 + value.minute * 60 + value.second}
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        return timedelta(seconds=value['s'])
+    return value
+
+
+def encode_page_token(direction, key):
+    """Opaque continuation token: direction ('next'/'prev') plus the boundary row's sort key"""
+    payload = json.dumps({'dir': direction, 'key': [_to_json(v) for v in key]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_page_token(token):
+    """(direction, key) from a token; ValueError if it was not produced by encode_page_token()"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        direction, key = payload['dir'], [_from_json(v) for v in payload['key']]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid page token: {e}") from None
+    if direction not in ('next', 'prev'):
+        raise ValueError(f"Invalid page token direction: {direction}")
+    return direction, key
+
+
+def keyset_condition(columns, descending, key, forward=True):
+    """
+    WHERE fragment selecting rows strictly after `key` in the sort order
+
+    Mixed ASC/DESC sorts rule out a plain row-value comparison, so
+    (a, b, c) > (x, y, z) is expanded into a < x OR (a = x AND (b > y OR
+    (b = y AND c > z))), which MySQL turns into index ranges.
+
+    Args:
+        columns (list): Sort columns, most significant first
+        descending (list): True for each column sorted DESC
+        key (list): Boundary values, one per column
+        forward (bool): False selects rows before `key` (previous page)
+
+    Returns:
+        tuple: (sql, params)
+    """
+    sql, params = None, []
+    for column, desc, value in reversed(list(zip(columns, descending, key))):
+        op = '<' if desc == forward else '>'
+        if sql is None:
+            sql, params = f"{column} {op} %s", [value]
+        else:
+            sql = f"({column} {op} %s OR ({column} = %s AND {sql}))"
+            params = [value, value] + params
+    return f"({sql})", params
+
+
+def order_by(columns, descending, forward=True):
+    """ORDER BY for the sort, reversed when fetching a previous page"""
+    return " ORDER BY " + ", ".join(
+        f"{column} {'DESC' if desc == forward else 'ASC'}" for column, desc in zip(columns, descending))
+
+
+def build_page(rows, page_size, sort_key, direction):
+    """
+    Turn page_size + 1 rows fetched in `direction` into one page
+
+    Args:
+        rows (list): Rows in fetch order (reverse order for 'prev')
+        page_size (int): Rows per page
+        sort_key (callable): row -> list of sort values (the token key)
+        direction (str): None for the first page, else the token direction
+
+    Returns:
+        dict: rows, next_token, prev_token (None when there is no such page)
+    """
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_prev = bool(rows), more
+    else:
+        has_next, has_prev = more, direction is not None and bool(rows)
+    return {
+        'rows': rows,
+        'next_token': encode_page_token('next', sort_key(rows[-1])) if has_next else None,
+        'prev_token': encode_page_token('prev', sort_key(rows[0])) if has_prev else None
+    }
+
+
+def date_range_condition(column, date_from=None, date_to=None):
+    """
+    Sargable WHERE fragment for date_from <= column < date_to (either bound optional)
+
+    The column is compared bare, never wrapped in DATE()/YEAR(), so an index
+    on it serves the range. Works for DATE and DATETIME/TIMESTAMP columns:
+    a date bound means midnight, and the half-open end includes the whole
+    last day without 23:59:59 tricks.
+
+    Returns:
+        tuple: (sql, params) - sql is "" when both bounds are None
+    """
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append(f"{column} < %s")
+        params.append(date_to)
+    return " AND ".join(conditions), params
+
+
+def day_range(day):
+    """[day, day + 1)"""
+    return day, day + timedelta(days=1)
+
+
+def week_range(day):
+    """[Monday, next Monday) of the calendar week containing day"""
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=7)
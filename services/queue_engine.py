@@ -0,0 +1,280 @@
+"""
+Queue Engine
+Shared in-process appointment queue kept sorted by (urgency desc, date, time)
+Demonstrates: Sorted index maintenance (bisect), Delta application, Commit hooks, Change feeds
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from config import QUEUE_RELOAD_SECONDS, QUEUE_POLL_SECONDS
+from database.connection import execute_query, on_commit
+from services.cache import invalidate_on_commit
+from services.change_feed import get_appointment_changes, get_change_token
+from services.query_helpers import build_page, decode_page_token
+from services.queue_view import VIEW_SELECT, summarize
+
+# Active-queue SELECT shared by the queue listing (filters/ORDER BY appended per call):
+# a single-table read of appointment_queue_view, maintained with every appointment write
+QUEUE_SELECT = VIEW_SELECT + " WHERE a.status IN ('Confirmed', 'Pending')"
+
+# Same columns for specific appointments whatever their status (cancelled rows leave the queue)
+_CHANGED_SELECT = QUEUE_SELECT.replace(
+    "WHERE a.status IN ('Confirmed', 'Pending')", "WHERE a.appointment_id IN ({ids})"
+)
+
+ACTIVE_STATUSES = ('Confirmed', 'Pending')
+URGENCY_BANDS = {'High': (8, 10), 'Medium': (4, 7), 'Low': (1, 3)}
+
+
+def _sort_key(row):
+    return (-row['urgency_level'], row['appointment_date'], row['appointment_time'], row['appointment_id'])
+
+
+def _page_key(row):
+    return [row['urgency_level'], row['appointment_date'], row['appointment_time'], row['appointment_id']]
+
+
+def _matcher(date_filter, urgency_filter, specialization_filter, date_from=None, date_to=None):
+    """Row predicate for the dashboard filters ([date_from, date_to) like the SQL path)"""
+    band = URGENCY_BANDS.get(urgency_filter)
+    if specialization_filter == 'All':
+        specialization_filter = None
+
+    def matches(row):
+        if date_filter and row['appointment_date'] != date_filter:
+            return False
+        if date_from and row['appointment_date'] < date_from:
+            return False
+        if date_to and row['appointment_date'] >= date_to:
+            return False
+        if band and not band[0] <= row['urgency_level'] <= band[1]:
+            return False
+        if specialization_filter and row['specialization'] != specialization_filter:
+            return False
+        return True
+    return matches
+
+
+def _copier(columns):
+    """Per-row copy for a projection; the engine keeps full rows and hands out copies"""
+    if columns not in ('summary', 'full'):
+        raise ValueError(f"columns must be 'summary' or 'full', not {columns!r}")
+    return summarize if columns == 'summary' else dict
+
+
+class QueueEngine:
+    """
+    The active appointment queue, loaded once and shared by every session.
+
+    Rows live in a dict by appointment_id plus a list of sort keys kept in
+    order with bisect, so a filtered view is one in-memory scan that is
+    already sorted. Writes made through the service layer call
+    notify_appointments_changed(); after their transaction commits the
+    engine re-reads just those rows on the next view. Writes from other
+    processes arrive through the change feed, polled every `poll_seconds`;
+    the full reload every `reload_seconds` also catches deleted rows.
+    """
+
+    def __init__(self, reload_seconds=QUEUE_RELOAD_SECONDS, poll_seconds=QUEUE_POLL_SECONDS):
+        self.reload_seconds = reload_seconds
+        self.poll_seconds = poll_seconds
+        self._rows = {}
+        self._order = []
+        self._dirty = set()
+        self._token = None
+        self._loaded_at = None
+        self._polled_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.loads = 0
+        self.delta_queries = 0
+        self.feed_polls = 0
+        self.views = 0
+
+    def get_queue(self, date_filter=None, urgency_filter=None, specialization_filter=None,
+                  date_from=None, date_to=None, columns='full'):
+        """
+        Sorted queue view, same filters and projections as get_appointment_queue()
+
+        Returns:
+            list: Appointment dicts, most urgent first
+        """
+        copy = _copier(columns)
+        self._refresh()
+        matches = _matcher(date_filter, urgency_filter, specialization_filter, date_from, date_to)
+
+        with self._lock:
+            self.views += 1
+            return [copy(self._rows[key[-1]]) for key in self._order if matches(self._rows[key[-1]])]
+
+    def get_queue_page(self, date_filter=None, urgency_filter=None, specialization_filter=None,
+                       page_size=25, token=None, date_from=None, date_to=None, columns='full'):
+        """
+        One keyset page of the queue view (see get_appointment_queue_page())
+        The token's sort key is located with bisect, so a page costs the rows
+        it scans from there, not its depth in the queue.
+        """
+        copy = _copier(columns)
+        direction = None
+        if token:
+            direction, (urgency, appointment_date, appointment_time, appointment_id) = decode_page_token(token)
+            boundary = (-urgency, appointment_date, appointment_time, appointment_id)
+        self._refresh()
+        matches = _matcher(date_filter, urgency_filter, specialization_filter, date_from, date_to)
+
+        with self._lock:
+            self.views += 1
+            if direction == 'prev':
+                keys = (self._order[i] for i in range(bisect_left(self._order, boundary) - 1, -1, -1))
+            elif direction == 'next':
+                keys = (self._order[i] for i in range(bisect_right(self._order, boundary), len(self._order)))
+            else:
+                keys = iter(self._order)
+            rows = []
+            for key in keys:
+                row = self._rows[key[-1]]
+                if matches(row):
+                    rows.append(copy(row))
+                    if len(rows) > page_size:
+                        break
+        return build_page(rows, page_size, _page_key, direction)
+
+    def mark_dirty(self, appointment_ids):
+        """Re-read these appointments on the next view"""
+        with self._lock:
+            self._dirty.update(appointment_ids)
+
+    def poll_now(self):
+        """
+        Apply pending changes and poll the change feed once, without a full reload
+        For a viewer's "Refresh": cheap for every other session sharing the engine.
+        """
+        with self._refresh_lock:
+            with self._lock:
+                if self._loaded_at is None:
+                    return  # The next view loads everything anyway
+                dirty, self._dirty = self._dirty, set()
+            self._poll()
+            if dirty:
+                self._apply(dirty)
+
+    def invalidate(self):
+        """Force a full reload on the next view (admin / CLI use: every session shares the reload)"""
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._rows), 'loads': self.loads, 'delta_queries': self.delta_queries,
+                    'feed_polls': self.feed_polls, 'views': self.views}
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            expired = self._loaded_at is None or now - self._loaded_at >= self.reload_seconds
+            poll_due = self._polled_at is not None and now - self._polled_at >= self.poll_seconds
+            if not expired and not poll_due and not self._dirty:
+                return
+            must_wait = self._loaded_at is None or bool(self._dirty)
+
+        # One thread refreshes; for a periodic reload/poll the others keep serving the current snapshot
+        if not self._refresh_lock.acquire(blocking=must_wait):
+            return
+        try:
+            with self._lock:
+                now = time.monotonic()
+                expired = self._loaded_at is None or now - self._loaded_at >= self.reload_seconds
+                poll_due = self._polled_at is not None and now - self._polled_at >= self.poll_seconds
+                dirty, self._dirty = self._dirty, set()
+            if expired:
+                self._reload()
+                return
+            if poll_due:
+                self._poll()
+            if dirty:
+                self._apply(dirty)
+        finally:
+            self._refresh_lock.release()
+
+    def _reload(self):
+        # Cursor first: anything changed while the JOIN runs is replayed by the next poll
+        token = get_change_token()
+        rows = execute_query(QUEUE_SELECT, fetch=True, prepared=True)
+        if rows is None:
+            return
+        order = sorted(_sort_key(row) for row in rows)
+        with self._lock:
+            self._rows = {row['appointment_id']: row for row in rows}
+            self._order = order
+            self._token = token
+            self._loaded_at = self._polled_at = time.monotonic()
+            self.loads += 1
+
+    def _poll(self):
+        """Apply the change feed since the last cursor (other workers' writes)"""
+        with self._lock:
+            self._polled_at = time.monotonic()
+            token = self._token
+        if token is None:
+            self.invalidate()
+            return
+        while True:
+            feed = get_appointment_changes(token)
+            if feed is None:
+                return
+            # Feed rows are view rows plus the cursor column; keep the engine's rows one shape
+            fresh = {}
+            for row in feed['changes']:
+                row.pop('updated_at', None)
+                fresh[row['appointment_id']] = row
+            with self._lock:
+                self.feed_polls += 1
+                self._merge([row['appointment_id'] for row in feed['changes']], fresh)
+                self._token = token = feed['token']
+            if not feed['has_more']:
+                return
+
+    def _apply(self, appointment_ids):
+        ids = sorted(appointment_ids)
+        rows = execute_query(_CHANGED_SELECT.format(ids=", ".join(["%s"] * len(ids))),
+                             tuple(ids), fetch=True, read_only=False)
+        if rows is None:
+            self.invalidate()
+            return
+        with self._lock:
+            self.delta_queries += 1
+            self._merge(ids, {row['appointment_id']: row for row in rows})
+
+    def _merge(self, ids, fresh):
+        """Replace/insert/remove rows by id (caller holds _lock); fresh lacks ids that left the queue"""
+        for appointment_id in ids:
+            old = self._rows.pop(appointment_id, None)
+            if old is not None:
+                i = bisect_left(self._order, _sort_key(old))
+                del self._order[i]
+            row = fresh.get(appointment_id)
+            if row is not None and row['status'] in ACTIVE_STATUSES:
+                self._rows[appointment_id] = row
+                insort(self._order, _sort_key(row))
+
+
+_engine = QueueEngine()
+
+
+def get_queue_engine():
+    """Process-wide queue engine shared by every session/thread"""
+    return _engine
+
+
+def notify_appointments_changed(appointment_ids):
+    """
+    Tell the queue engine (and the cached dashboard statistics) these
+    appointments were inserted/updated/cancelled
+    Applied after the surrounding transaction() commits (dropped on rollback).
+    """
+    appointment_ids = [i for i in appointment_ids if i]
+    if appointment_ids:
+        on_commit(lambda: _engine.mark_dirty(appointment_ids))
+        invalidate_on_commit('appointments')
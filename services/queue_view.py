@@ -0,0 +1,233 @@
+"""
+Queue View
+appointment_queue_view: one flattened row per appointment, kept in step with the
+six-table queue JOIN by the service layer so listings read a single table
+Demonstrates: Denormalized read models, Write-path maintenance, INSERT ... SELECT,
+NULL-safe consistency checks
+Run from the project root:  python -m services.queue_view check [--repair] | rebuild
+"""
+
+import argparse
+
+from database.connection import execute_query, transaction
+
+VIEW_TABLE = 'appointment_queue_view'
+
+# Column order shared by the view, its source JOIN and the consistency check
+VIEW_COLUMNS = (
+    'appointment_id', 'patient_id', 'doctor_id', 'symptom_id', 'spec_id',
+    'appointment_date', 'appointment_time', 'status', 'mode', 'urgency_level',
+    'patient_name', 'age', 'gender', 'phone', 'allergies',
+    'symptom_text', 'predicted_disease', 'probability', 'urgency_reason',
+    'doctor_name', 'qualification', 'specialization', 'appointment_code'
+)
+
+# Large TEXT columns only the details expanders show; 'summary' listings leave them out
+DETAIL_COLUMNS = ('symptom_text', 'urgency_reason', 'allergies')
+SUMMARY_COLUMNS = tuple(c for c in VIEW_COLUMNS if c not in DETAIL_COLUMNS)
+
+# Listing SELECT over the view (filters/ORDER BY appended per call, `a` like the JOINs it replaces)
+VIEW_SELECT = "SELECT " + ", ".join(f"a.{c}" for c in VIEW_COLUMNS) + f" FROM {VIEW_TABLE} a"
+SUMMARY_SELECT = "SELECT " + ", ".join(f"a.{c}" for c in SUMMARY_COLUMNS) + f" FROM {VIEW_TABLE} a"
+_PROJECTIONS = {'full': VIEW_SELECT, 'summary': SUMMARY_SELECT}
+
+# Source of truth: the queue JOIN for every status; a re-diagnosed symptom uses its latest prediction
+_SOURCE_SELECT = """
+    SELECT
+        a.appointment_id,
+        a.patient_id,
+        a.doctor_id,
+        a.symptom_id,
+        d.spec_id,
+        a.appointment_date,
+        a.appointment_time,
+        a.status,
+        a.mode,
+        a.urgency_level,
+        p.full_name AS patient_name,
+        p.age,
+        p.gender,
+        p.phone,
+        p.allergies,
+        s.symptom_text,
+        pred.predicted_disease,
+        pred.probability,
+        pred.urgency_reason,
+        d.name AS doctor_name,
+        d.qualification,
+        spec.spec_name AS specialization,
+        CONCAT('APT-', LPAD(a.appointment_id, 3, '0')) AS appointment_code
+    FROM appointments a
+    INNER JOIN patients p ON a.patient_id = p.patient_id
+    INNER JOIN symptoms s ON a.symptom_id = s.symptom_id
+    INNER JOIN predictions pred ON pred.prediction_id =
+        (SELECT MAX(prediction_id) FROM predictions WHERE symptom_id = a.symptom_id)
+    INNER JOIN doctors d ON a.doctor_id = d.doctor_id
+    INNER JOIN specializations spec ON d.spec_id = spec.spec_id
+    WHERE {where}
+    """
+
+_INSERT = f"INSERT INTO {VIEW_TABLE} ({', '.join(VIEW_COLUMNS)})" + _SOURCE_SELECT
+
+REBUILD_BATCH = 5000
+
+
+def view_select(columns='full'):
+    """Listing SELECT for a projection: 'full' rows or 'summary' rows without DETAIL_COLUMNS"""
+    if columns not in _PROJECTIONS:
+        raise ValueError(f"columns must be 'summary' or 'full', not {columns!r}")
+    return _PROJECTIONS[columns]
+
+
+def summarize(row):
+    """Copy of a full row without DETAIL_COLUMNS (same keys as a 'summary' listing row)"""
+    return {k: v for k, v in row.items() if k not in DETAIL_COLUMNS}
+
+
+def _refresh(column, values, touch=False):
+    """
+    Re-derive the view rows whose `column` is in values (DELETE + INSERT ... SELECT)
+    touch bumps appointments.updated_at for refreshes the appointment row itself
+    did not cause, so the change feed carries them to other workers.
+    """
+    values = sorted({v for v in values if v})
+    if not values:
+        return
+    placeholders = ", ".join(["%s"] * len(values))
+    params = tuple(values)
+    # Joins the caller's transaction; on its own the statements still commit together
+    with transaction():
+        if touch:
+            execute_query(f"UPDATE appointments SET updated_at = CURRENT_TIMESTAMP "
+                          f"WHERE {column} IN ({placeholders})", params)
+        execute_query(f"DELETE FROM {VIEW_TABLE} WHERE {column} IN ({placeholders})", params)
+        execute_query(_INSERT.format(where=f"a.{column} IN ({placeholders})"), params)
+
+
+def refresh_queue_view(appointment_ids):
+    """
+    Bring these appointments' view rows up to date
+    Call it in the same transaction() as the write so the view commits (or
+    rolls back) with it; rows that no longer join are removed.
+
+    Raises:
+        TransactionRolledBack: a statement failed (the caller's transaction rolls back)
+    """
+    _refresh('appointment_id', appointment_ids)
+
+
+def refresh_for_symptom(symptom_id):
+    """A prediction was (re)saved: refresh the appointments booked for this symptom"""
+    _refresh('symptom_id', [symptom_id], touch=True)
+
+
+def refresh_for_patient(patient_id):
+    """Patient details changed: refresh every appointment of the patient"""
+    _refresh('patient_id', [patient_id], touch=True)
+
+
+def refresh_for_doctor(doctor_id):
+    """Doctor details changed: refresh every appointment of the doctor"""
+    _refresh('doctor_id', [doctor_id], touch=True)
+
+
+def _id_batches(batch):
+    bounds = execute_query("SELECT MIN(appointment_id) AS lo, MAX(appointment_id) AS hi FROM appointments",
+                           fetch=True, fetch_one=True, read_only=False)
+    if not bounds or bounds['lo'] is None:
+        return
+    for lo in range(bounds['lo'], bounds['hi'] + 1, batch):
+        yield lo, lo + batch
+
+
+def rebuild_queue_view(batch=REBUILD_BATCH):
+    """
+    Re-derive the whole view, one appointment_id range per transaction
+    Readers see every row throughout: a range is swapped in one commit.
+    Deleted appointments need no pass of their own (the view's FK cascades).
+
+    Returns:
+        int: Rows in the view afterwards, or None on error
+    """
+    try:
+        for lo, hi in _id_batches(batch):
+            with transaction():
+                execute_query(f"DELETE FROM {VIEW_TABLE} WHERE appointment_id >= %s AND appointment_id < %s",
+                              (lo, hi))
+                execute_query(_INSERT.format(where="a.appointment_id >= %s AND a.appointment_id < %s"),
+                              (lo, hi))
+    except Exception as e:
+        print(f"❌ Queue view rebuild failed: {e}")
+        return None
+    row = execute_query(f"SELECT COUNT(*) AS n FROM {VIEW_TABLE}", fetch=True, fetch_one=True, read_only=False)
+    rows = row['n'] if row else 0
+    print(f"✅ Queue view rebuilt: {rows} rows")
+    return rows
+
+
+_DIFF = f"""
+    SELECT src.appointment_id, IF(v.appointment_id IS NULL, 'missing', 'stale') AS kind
+    FROM ({_SOURCE_SELECT.format(where="a.appointment_id >= %s AND a.appointment_id < %s")}) src
+    LEFT JOIN {VIEW_TABLE} v ON v.appointment_id = src.appointment_id
+    WHERE v.appointment_id IS NULL OR NOT ({' AND '.join(f'src.{c} <=> v.{c}' for c in VIEW_COLUMNS)})
+    UNION ALL
+    SELECT v.appointment_id, 'extra' AS kind
+    FROM {VIEW_TABLE} v
+    LEFT JOIN ({_SOURCE_SELECT.format(where="a.appointment_id >= %s AND a.appointment_id < %s")}) src
+        ON src.appointment_id = v.appointment_id
+    WHERE v.appointment_id >= %s AND v.appointment_id < %s AND src.appointment_id IS NULL
+    """
+
+
+def check_queue_view(repair=False, batch=REBUILD_BATCH):
+    """
+    Compare the view with the JOIN it denormalizes, range by range
+    Columns are compared with <=> so NULLs (e.g. no allergies) match.
+
+    Args:
+        repair (bool): Refresh every row found missing, stale or extra
+        batch (int): appointment_id range per comparison query
+
+    Returns:
+        dict: missing, stale, extra (counts) and ids (up to 20 examples); None on error
+
+    Raises:
+        TransactionRolledBack: a repair failed
+    """
+    report = {'missing': 0, 'stale': 0, 'extra': 0, 'ids': []}
+    for lo, hi in _id_batches(batch):
+        rows = execute_query(_DIFF, (lo, hi, lo, hi, lo, hi), fetch=True, read_only=False)
+        if rows is None:
+            return None
+        bad = set()
+        for row in rows:
+            bad.add(row['appointment_id'])
+            report[row['kind']] += 1
+        if repair and bad:
+            refresh_queue_view(bad)
+        report['ids'] += sorted(bad)[:20 - len(report['ids'])]
+    return report
+
+
+if __name__ == "__main__":
+    from database.connection import ensure_pool
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify appointment_queue_view")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Re-derive every row from the queue JOIN")
+    check = commands.add_parser("check", help="Report rows that differ from the queue JOIN")
+    check.add_argument("--repair", action="store_true", help="Refresh the rows that differ")
+    args = parser.parse_args()
+
+    ensure_pool()
+    if args.command == "rebuild":
+        rebuild_queue_view()
+    else:
+        result = check_queue_view(repair=args.repair)
+        if result is None:
+            print("❌ Consistency check failed")
+        else:
+            verdict = "✅" if not (result['missing'] or result['stale'] or result['extra']) else "⚠️"
+            print(f"{verdict} missing={result['missing']} stale={result['stale']} extra={result['extra']}"
+                  + (f" e.g. {result['ids']}" if result['ids'] else "")
+                  + (" (repaired)" if args.repair else ""))
@@ -0,0 +1,282 @@
+"""
+Scheduler
+Re-optimizes a day's doctor and slot assignment so urgent patients are seen first
+Demonstrates: Weighted scheduling, Two-phase UPDATE under a unique key, Temporary tables
+"""
+
+import argparse
+import random
+from collections import Counter, defaultdict, deque
+from datetime import date, datetime
+from time import sleep
+
+from database.connection import execute_query, execute_many, in_transaction, transaction
+from mysql.connector import Error
+from services.appointment_service import RETRYABLE_ERRNOS
+from services.analytics_rollup import appointment_rollup_changes, record_rollup_changes
+from services.doctor_load_index import record_load_change
+from services.queue_engine import notify_appointments_changed
+from services.queue_view import refresh_queue_view
+from services.slot_service import (
+    OCCUPIES_SLOT, SLOT_COUNT, SLOT_MINUTES, rebuild_slot_masks, slot_to_time, time_to_slot
+)
+
+ACTIVE_STATUSES = ('Confirmed', 'Pending')
+
+# Upsert locks every doctor's day row in doctor_id order (same order as the booking path);
+# day rows before appointment rows, like status changes and reschedules (slot_service.lock_day)
+_LOCK_DAY_ROWS = """
+INSERT INTO doctor_day_slots (doctor_id, slot_date, taken_mask)
+SELECT doctor_id, %s, 0 FROM doctors ORDER BY doctor_id
+ON DUPLICATE KEY UPDATE taken_mask = taken_mask
+"""
+
+_DAY_APPOINTMENTS = f"""
+SELECT a.appointment_id, a.doctor_id, a.appointment_time, a.urgency_level, a.status,
+       a.created_at, d.spec_id
+FROM appointments a
+INNER JOIN doctors d ON a.doctor_id = d.doctor_id
+WHERE a.appointment_date = %s AND {OCCUPIES_SLOT}
+FOR UPDATE OF a
+"""
+
+_AVAILABLE_DOCTORS = "SELECT doctor_id, spec_id FROM doctors WHERE available = TRUE ORDER BY doctor_id"
+
+
+def weighted_wait(assignments):
+    """Sum of urgency x minutes after 9:00 over (urgency_level, slot_index) pairs"""
+    return sum(urgency * slot * SLOT_MINUTES for urgency, slot in assignments)
+
+
+def plan_day(appointments, doctors, reassign_doctors=True, first_open_slot=0):
+    """
+    Compute the best assignment for one day (pure function, no database access)
+
+    Within each specialization (or each doctor when reassign_doctors=False)
+    the open (slot, doctor) pairs are taken in slot order and handed to the
+    movable appointments in urgency order. Putting the largest weights on the
+    earliest slots minimizes the urgency-weighted wait (rearrangement
+    inequality), so a sort is enough; no assignment solver is needed. Within a
+    slot, an appointment keeps its current doctor when that doctor is free.
+
+    Args:
+        appointments (list): dicts with appointment_id, doctor_id, appointment_time,
+                             urgency_level, status, created_at, spec_id
+        doctors (list): dicts with doctor_id, spec_id (available doctors)
+        reassign_doctors (bool): Allow moving patients to another doctor of the same specialization
+        first_open_slot (int): Slots before this index are in the past and stay as they are
+
+    Returns:
+        tuple: (moves, skipped) - moves is a list of dicts with appointment_id,
+               doctor_id, slot, old_doctor_id, old_slot, urgency_level, status;
+               skipped lists groups left alone because they do not fit
+    """
+    occupied = defaultdict(set)   # doctor_id -> slot indexes that stay put
+    movable = defaultdict(list)   # group key -> appointments to place
+    group_doctors = defaultdict(list)
+
+    for doctor in doctors:
+        key = doctor['spec_id'] if reassign_doctors else doctor['doctor_id']
+        group_doctors[key].append(doctor['doctor_id'])
+
+    for appt in appointments:
+        slot = time_to_slot(appt['appointment_time'])
+        appt['slot'] = slot
+        fixed = (appt['status'] not in ACTIVE_STATUSES or slot is None or slot < first_open_slot)
+        if fixed:
+            if slot is not None:
+                occupied[appt['doctor_id']].add(slot)
+            continue
+        key = appt['spec_id'] if reassign_doctors else appt['doctor_id']
+        if not reassign_doctors and appt['doctor_id'] not in group_doctors[key]:
+            group_doctors[key].append(appt['doctor_id'])
+        movable[key].append(appt)
+
+    moves, skipped = [], []
+    for key, group in movable.items():
+        doctor_ids = sorted(group_doctors.get(key, []))
+        layers = []
+        for slot in range(first_open_slot, SLOT_COUNT):
+            free = [d for d in doctor_ids if slot not in occupied[d]]
+            if free:
+                layers.append((slot, free))
+        if len(group) > sum(len(free) for _, free in layers):
+            skipped.append(key)
+            continue
+
+        queue = deque(sorted(group, key=lambda a: (-a['urgency_level'], a['created_at'], a['appointment_id'])))
+        for slot, free in layers:
+            if not queue:
+                break
+            batch = [queue.popleft() for _ in range(min(len(free), len(queue)))]
+            open_doctors = set(free)
+            placed = {}
+            # Keep the current doctor where possible, then fill the rest in doctor order
+            for appt in batch:
+                if appt['doctor_id'] in open_doctors:
+                    placed[appt['appointment_id']] = appt['doctor_id']
+                    open_doctors.discard(appt['doctor_id'])
+            remaining = sorted(open_doctors)
+            for appt in batch:
+                if appt['appointment_id'] not in placed:
+                    placed[appt['appointment_id']] = remaining.pop(0)
+            for appt in batch:
+                moves.append({
+                    'appointment_id': appt['appointment_id'],
+                    'doctor_id': placed[appt['appointment_id']],
+                    'slot': slot,
+                    'old_doctor_id': appt['doctor_id'],
+                    'old_slot': appt['slot'],
+                    'urgency_level': appt['urgency_level'],
+                    'status': appt['status']
+                })
+    return moves, skipped
+
+
+def _write_plan(changes, appointment_date):
+    """
+    Apply changed assignments with set-based UPDATEs
+    Rows first move to unique negative TIMEs so swaps never trip the
+    (doctor, date, slot) unique key, then to their final slots.
+    """
+    execute_query("DROP TEMPORARY TABLE IF EXISTS schedule_plan")
+    execute_query("""
+        CREATE TEMPORARY TABLE schedule_plan (
+            appointment_id INT PRIMARY KEY,
+            seq INT NOT NULL,
+            doctor_id INT NOT NULL,
+            appointment_time TIME NOT NULL
+        )
+        """)
+    try:
+        if execute_many("INSERT INTO schedule_plan (appointment_id, seq, doctor_id, appointment_time) "
+                        "VALUES (%s, %s, %s, %s)",
+                        [(m['appointment_id'], i + 1, m['doctor_id'], slot_to_time(m['slot']))
+                         for i, m in enumerate(changes)]) is None:
+            raise Error("Could not stage the schedule plan")
+        for assignment in ("a.doctor_id = p.doctor_id, a.appointment_time = SEC_TO_TIME(-p.seq)",
+                           "a.appointment_time = p.appointment_time"):
+            if execute_query(f"""
+                UPDATE appointments a
+                INNER JOIN schedule_plan p ON a.appointment_id = p.appointment_id
+                SET {assignment}
+                WHERE a.appointment_date = %s AND a.status IN ('Confirmed', 'Pending')
+                """, (appointment_date,)) is None:
+                raise Error("Schedule update failed")
+    finally:
+        execute_query("DROP TEMPORARY TABLE IF EXISTS schedule_plan")
+
+
+def _optimize_locked(conn, appointment_date, reassign_doctors, dry_run, first_open_slot):
+    """
+    One optimize_day() attempt on the transaction connection
+    The locking reads run on a raw cursor so a deadlock or lock wait timeout
+    raises with its errno (and can be retried); returns (moves, changes, skipped).
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_LOCK_DAY_ROWS, (appointment_date,))
+        cursor.execute(_DAY_APPOINTMENTS, (appointment_date,))
+        appointments = cursor.fetchall()
+    finally:
+        cursor.close()
+    doctors = execute_query(_AVAILABLE_DOCTORS, fetch=True)
+    if doctors is None:
+        raise Error("Could not load the available doctors")
+
+    moves, skipped = plan_day(appointments, doctors, reassign_doctors, first_open_slot)
+    changes = [m for m in moves
+               if (m['doctor_id'], m['slot']) != (m['old_doctor_id'], m['old_slot'])]
+
+    if changes and not dry_run:
+        _write_plan(changes, appointment_date)
+        if not rebuild_slot_masks(appointment_date):
+            raise Error("Could not rebuild slot bitmaps")
+        load_delta = Counter()
+        for m in changes:
+            if m['doctor_id'] != m['old_doctor_id']:
+                load_delta[m['doctor_id']] += 1
+                load_delta[m['old_doctor_id']] -= 1
+        for doctor_id, delta in load_delta.items():
+            if delta:
+                record_load_change(doctor_id, appointment_date, delta)
+        # Only matters when re-planning a day the analytics rollup has already closed
+        rollup = Counter()
+        for m in changes:
+            state = {'appointment_date': appointment_date, 'urgency_level': m['urgency_level'],
+                     'status': m['status']}
+            rollup.update(appointment_rollup_changes({**state, 'doctor_id': m['old_doctor_id']},
+                                                     {**state, 'doctor_id': m['doctor_id']}))
+        if not record_rollup_changes(rollup):
+            raise Error("Could not update the analytics rollup")
+        refresh_queue_view([m['appointment_id'] for m in changes])
+        notify_appointments_changed([m['appointment_id'] for m in changes])
+    return moves, changes, skipped
+
+
+def optimize_day(appointment_date, reassign_doctors=True, dry_run=False, max_attempts=3):
+    """
+    Re-optimize doctor and slot assignment for all Confirmed/Pending appointments on a date
+
+    Every doctor's day row is locked first, so bookings for the date wait
+    until the new schedule commits. Completed appointments, times off the
+    30-minute grid and (for today) slots already started keep their places.
+    Deadlocks and lock wait timeouts (e.g. against a bulk intake locking the
+    same days) are retried with backoff, like book_best_available(); inside
+    an outer transaction() the first conflict fails the call.
+
+    Args:
+        appointment_date (date): Day to optimize
+        reassign_doctors (bool): Allow moving patients between doctors of one specialization
+        dry_run (bool): Compute and report without writing
+        max_attempts (int): Attempts when the day's locks deadlock or time out
+
+    Returns:
+        dict: appointments, moved, weighted_wait_before/after (urgency x minutes),
+              skipped_groups; None on error
+    """
+    first_open_slot = 0
+    if appointment_date == date.today():
+        now = datetime.now()
+        first_open_slot = max(0, min(SLOT_COUNT, -(-((now.hour * 60 + now.minute) - 9 * 60) // SLOT_MINUTES)))
+
+    nested = in_transaction()
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with transaction() as conn:
+                moves, changes, skipped = _optimize_locked(conn, appointment_date, reassign_doctors,
+                                                           dry_run, first_open_slot)
+        except Error as e:
+            retryable = getattr(e, 'errno', None) in RETRYABLE_ERRNOS
+            if nested or not retryable or attempt == max_attempts:
+                print(f"❌ Scheduling failed for {appointment_date}: {e}")
+                return None
+            print(f"⚠️ Scheduling attempt {attempt} failed ({e}), retrying...")
+            sleep(0.02 * (2 ** attempt) + random.uniform(0, 0.02))
+            continue
+        break
+
+    summary = {
+        'appointments': len(moves),
+        'moved': len(changes),
+        'weighted_wait_before': weighted_wait((m['urgency_level'], m['old_slot']) for m in moves),
+        'weighted_wait_after': weighted_wait((m['urgency_level'], m['slot']) for m in moves),
+        'skipped_groups': skipped
+    }
+    verb = "Would move" if dry_run else "Moved"
+    print(f"✅ {verb} {summary['moved']} of {summary['appointments']} appointments on {appointment_date}; "
+          f"weighted wait {summary['weighted_wait_before']} → {summary['weighted_wait_after']}")
+    return summary
+
+
+if __name__ == "__main__":
+    from database.connection import ensure_pool
+
+    parser = argparse.ArgumentParser(description="Re-optimize a day's appointment schedule")
+    parser.add_argument("date", type=date.fromisoformat)
+    parser.add_argument("--keep-doctors", action="store_true", help="Only reorder slots within each doctor")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    ensure_pool()
+    optimize_day(args.date, reassign_doctors=not args.keep_doctors, dry_run=args.dry_run)
@@ -0,0 +1,250 @@
+"""
+Slot Service
+Per-doctor-per-day slot allocation on a 16-bit bitmap of the 9:00-17:00 grid
+Demonstrates: Row locking (SELECT ... FOR UPDATE), Bitwise operations
+"""
+
+from database.connection import execute_query, transaction
+from datetime import time, timedelta
+
+# Time slots: 9 AM to 5 PM, 30-minute intervals (bit i = slot i)
+DAY_START_MINUTES = 9 * 60
+SLOT_MINUTES = 30
+SLOT_COUNT = 16
+FULL_MASK = (1 << SLOT_COUNT) - 1
+
+# Urgency bands as [first, last) slot indexes
+BAND_HIGH = (0, 6)      # 9 AM - 12 PM
+BAND_MEDIUM = (6, 12)   # 12 PM - 3 PM
+BAND_LOW = (12, 16)     # 3 PM - 5 PM
+
+# An appointment occupies its slot (and counts toward the doctor's day) unless Cancelled:
+# the rule behind appointments.active_slot, the bitmap, migration_v3's backfill and the load index
+OCCUPIES_SLOT = "a.status != 'Cancelled'"
+
+
+def occupies_slot(status):
+    """Python side of OCCUPIES_SLOT"""
+    return status != 'Cancelled'
+
+
+def _range_mask(start, end):
+    return ((1 << end) - 1) & ~((1 << start) - 1)
+
+
+# Search order per band: the band itself, then later slots, then earlier ones
+_SEARCH_MASKS = {
+    band: (_range_mask(*band), _range_mask(band[1], SLOT_COUNT), _range_mask(0, band[0]))
+    for band in (BAND_HIGH, BAND_MEDIUM, BAND_LOW)
+}
+
+_LOCK_DAY = """
+INSERT INTO doctor_day_slots (doctor_id, slot_date, taken_mask)
+VALUES (%s, %s, 0)
+ON DUPLICATE KEY UPDATE taken_mask = taken_mask
+"""
+
+_SELECT_MASK = """
+SELECT taken_mask FROM doctor_day_slots
+WHERE doctor_id = %s AND slot_date = %s
+FOR UPDATE
+"""
+
+_SET_BITS = """
+UPDATE doctor_day_slots SET taken_mask = taken_mask | %s
+WHERE doctor_id = %s AND slot_date = %s
+"""
+
+_CLEAR_BITS = """
+UPDATE doctor_day_slots SET taken_mask = taken_mask & ~%s
+WHERE doctor_id = %s AND slot_date = %s
+"""
+
+
+def urgency_band(urgency_level):
+    """
+    Slot band for an urgency level (high urgency gets earlier slots)
+
+    Args:
+        urgency_level (int): 1-10
+
+    Returns:
+        tuple: (first_slot, end_slot)
+    """
+    if urgency_level >= 8:
+        return BAND_HIGH
+    elif urgency_level >= 4:
+        return BAND_MEDIUM
+    else:
+        return BAND_LOW
+
+
+def band_mask(urgency_level):
+    """Bitmap of the slots in an urgency level's band"""
+    return _range_mask(*urgency_band(urgency_level))
+
+
+def slot_to_time(slot_index):
+    """Convert a slot index (0-15) to its start time"""
+    minutes = DAY_START_MINUTES + slot_index * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def time_to_slot(appointment_time):
+    """
+    Convert an appointment time to its slot index
+
+    Args:
+        appointment_time (time | timedelta): MySQL TIME values arrive as timedelta
+
+    Returns:
+        int: Slot index, or None if the time is not on the 30-minute grid
+    """
+    if isinstance(appointment_time, timedelta):
+        seconds = int(appointment_time.total_seconds())
+    else:
+        seconds = appointment_time.hour * 3600 + appointment_time.minute * 60 + appointment_time.second
+
+    offset = seconds - DAY_START_MINUTES * 60
+    if offset < 0 or offset % (SLOT_MINUTES * 60):
+        return None
+    index = offset // (SLOT_MINUTES * 60)
+    return index if index < SLOT_COUNT else None
+
+
+def pick_slot(taken_mask, urgency_level):
+    """
+    First free slot for an urgency level, in constant time
+    Tries the urgency band first, then later slots, then earlier ones.
+
+    Args:
+        taken_mask (int): Bitmap of booked slots
+        urgency_level (int): 1-10
+
+    Returns:
+        int: Slot index, or None if the day is full
+    """
+    free = ~taken_mask & FULL_MASK
+    for search_mask in _SEARCH_MASKS[urgency_band(urgency_level)]:
+        candidates = free & search_mask
+        if candidates:
+            # Lowest set bit = earliest free slot in this range
+            return (candidates & -candidates).bit_length() - 1
+    return None
+
+
+def _lock_day(doctor_id, appointment_date):
+    """Create (if needed) and row-lock the doctor's day; returns its taken_mask"""
+    execute_query(_LOCK_DAY, (doctor_id, appointment_date), prepared=True)
+    row = execute_query(_SELECT_MASK, (doctor_id, appointment_date),
+                        fetch=True, fetch_one=True, prepared=True)
+    return row['taken_mask'] if row else None
+
+
+def lock_day(doctor_id, appointment_date):
+    """
+    Row-lock a doctor's day before locking any of its appointments
+    Day rows are always locked before appointment rows (booking, status
+    changes, reschedules and the day scheduler), so these paths never
+    deadlock on each other. Joins the caller's transaction().
+
+    Returns:
+        int: The day's taken_mask, or None on error
+    """
+    with transaction():
+        return _lock_day(doctor_id, appointment_date)
+
+
+def claim_slot(doctor_id, appointment_date, urgency_level):
+    """
+    Atomically claim the best free slot for a doctor's day
+    Joins the caller's transaction(), so the claim commits or rolls back
+    together with the appointment INSERT.
+
+    Args:
+        doctor_id (int): Doctor ID
+        appointment_date (date): Appointment date
+        urgency_level (int): 1-10
+
+    Returns:
+        time: Claimed slot time, or None if the day is fully booked
+    """
+    with transaction():
+        taken_mask = _lock_day(doctor_id, appointment_date)
+        if taken_mask is None:
+            return None
+
+        slot_index = pick_slot(taken_mask, urgency_level)
+        if slot_index is None:
+            return None
+
+        execute_query(_SET_BITS, (1 << slot_index, doctor_id, appointment_date), prepared=True)
+        return slot_to_time(slot_index)
+
+
+def take_slot(doctor_id, appointment_date, appointment_time):
+    """
+    Atomically claim a specific slot
+    Times off the 30-minute grid are not tracked and always succeed
+    (the unique key on appointments still guards them).
+
+    Returns:
+        bool: False if the slot is already booked
+    """
+    slot_index = time_to_slot(appointment_time)
+    if slot_index is None:
+        return True
+
+    with transaction():
+        taken_mask = _lock_day(doctor_id, appointment_date)
+        if taken_mask is None or taken_mask & (1 << slot_index):
+            return False
+        execute_query(_SET_BITS, (1 << slot_index, doctor_id, appointment_date), prepared=True)
+        return True
+
+
+def release_slot(doctor_id, appointment_date, appointment_time):
+    """Free a slot (cancellation / reschedule) so it can be booked again"""
+    slot_index = time_to_slot(appointment_time)
+    if slot_index is None:
+        return
+    execute_query(_CLEAR_BITS, (1 << slot_index, doctor_id, appointment_date), prepared=True)
+
+
+def get_free_slots(doctor_id, appointment_date):
+    """
+    List free slot times for a doctor's day (no locking, for display)
+
+    Returns:
+        list: time objects in chronological order
+    """
+    row = execute_query(
+        "SELECT taken_mask FROM doctor_day_slots WHERE doctor_id = %s AND slot_date = %s",
+        (doctor_id, appointment_date), fetch=True, fetch_one=True
+    )
+    taken_mask = row['taken_mask'] if row else 0
+    return [slot_to_time(i) for i in range(SLOT_COUNT) if not taken_mask & (1 << i)]
+
+
+def rebuild_slot_masks(appointment_date):
+    """
+    Recompute every doctor's bitmap for a date from the appointments table
+    Repairs drift after manual edits to appointments.
+
+    Returns:
+        bool: True on success
+    """
+    query = """
+    INSERT INTO doctor_day_slots (doctor_id, slot_date, taken_mask)
+    SELECT d.doctor_id, %s,
+           COALESCE(BIT_OR(1 << ((TIME_TO_SEC(a.appointment_time) - 32400) DIV 1800)), 0)
+    FROM doctors d
+    LEFT JOIN appointments a ON a.doctor_id = d.doctor_id
+        AND a.appointment_date = %s
+        AND {occupied}
+        AND a.appointment_time >= '09:00:00' AND a.appointment_time < '17:00:00'
+        AND MOD(TIME_TO_SEC(a.appointment_time) - 32400, 1800) = 0
+    GROUP BY d.doctor_id
+    ON DUPLICATE KEY UPDATE taken_mask = VALUES(taken_mask)
+    """.format(occupied=OCCUPIES_SLOT)
+    return execute_query(query, (appointment_date, appointment_date)) is not None
@@ -3,7 +3,9 @@ Symptom Service
 Handles symptom submission and retrieval
 """
 
-from database.connection import execute_query
+from database.connection import execute_query, transaction
+from services.metric_counters import SYMPTOMS, bump, get_metrics
+from services.query_helpers import date_range_condition
 from datetime import datetime
 
 def save_symptom(patient_id, symptom_text):
@@ -28,7 +30,10 @@ def save_symptom(patient_id, symptom_text):
     """
     
     try:
-        symptom_id = execute_query(query, (patient_id, symptom_text.strip()))
+        with transaction():
+            symptom_id = execute_query(query, (patient_id, symptom_text.strip()))
+            if symptom_id:
+                bump(SYMPTOMS, None)  # today's bucket, by the server's date like submitted_at
         if symptom_id:
             print(f"✅ Symptom recorded. ID: {symptom_id}")
         return symptom_id
@@ -86,18 +91,24 @@ def get_symptoms_by_patient(patient_id, limit=10):
     """
     return execute_query(query, (patient_id, limit), fetch=True) or []
 
-def get_recent_symptoms(days=7, limit=20):
+def get_recent_symptoms(days=7, limit=20, date_from=None, date_to=None):
     """
     Get recent symptoms across all patients (for analytics)
     
     Args:
         days (int): Number of days to look back
         limit (int): Maximum records
+        date_from, date_to (date): Submissions in [date_from, date_to) instead of the last `days`
     
     Returns:
         list: Recent symptom submissions
     """
-    query = """
+    if date_from is not None or date_to is not None:
+        condition, params = date_range_condition('s.submitted_at', date_from, date_to)
+    else:
+        condition, params = "s.submitted_at >= NOW() - INTERVAL %s DAY", [days]
+    
+    query = f"""
     SELECT 
         s.symptom_id,
         p.full_name as patient_name,
@@ -107,23 +118,33 @@ def get_recent_symptoms(days=7, limit=20):
     FROM symptoms s
     INNER JOIN patients p ON s.patient_id = p.patient_id
     LEFT JOIN predictions pred ON s.symptom_id = pred.symptom_id
-    WHERE s.submitted_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+    WHERE {condition}
     ORDER BY s.submitted_at DESC
     LIMIT %s
     """
-    return execute_query(query, (days, limit), fetch=True) or []
+    return execute_query(query, tuple(params) + (limit,), fetch=True) or []
 
 def count_symptoms_today():
     """
     Count symptom submissions today
+    Read from today's metric_counters row instead of counting symptoms;
+    count_symptoms(today, tomorrow) is the exact range count.
     
     Returns:
         int: Count of today's submissions
     """
-    query = """
-    SELECT COUNT(*) as count 
-    FROM symptoms 
-    WHERE DATE(submitted_at) = CURDATE()
+    return get_metrics()['symptoms']
+
+def count_symptoms(date_from=None, date_to=None):
+    """
+    Count symptom submissions with submitted_at in [date_from, date_to)
+    
+    Returns:
+        int: Count of submissions in the range
     """
-    result = execute_query(query, fetch=True, fetch_one=True)
+    condition, params = date_range_condition('submitted_at', date_from, date_to)
+    query = "SELECT COUNT(*) as count FROM symptoms"
+    if condition:
+        query += " WHERE " + condition
+    result = execute_query(query, tuple(params), fetch=True, fetch_one=True)
     return result['count'] if result else 0
@@ -0,0 +1,128 @@
+"""
+Test that the rollup-backed analytics match the raw appointment scans
+Runs each analytics function and the original raw-table query over the same
+ranges and diffs the rows, then checks the closed days grain by grain
+Run after migration_v10.sql:  python test_rollups.py
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from database.connection import initialize_pool, execute_query
+from services import analytics_service
+from services.analytics_rollup import check_rollup, close_days
+from services.query_helpers import date_range_condition
+
+# The queries analytics_service ran before the rollup, over appointments only
+RAW_WORKLOAD = """
+SELECT d.name AS doctor_name, s.spec_name AS specialization,
+       COUNT(a.appointment_id) AS total_appointments,
+       SUM(CASE WHEN a.status = 'Confirmed' THEN 1 ELSE 0 END) AS confirmed,
+       SUM(CASE WHEN a.status = 'Completed' THEN 1 ELSE 0 END) AS completed,
+       SUM(CASE WHEN a.status = 'Cancelled' THEN 1 ELSE 0 END) AS cancelled,
+       ROUND(AVG(a.urgency_level), 1) AS avg_urgency
+FROM doctors d
+LEFT JOIN appointments a ON d.doctor_id = a.doctor_id {on_range}
+INNER JOIN specializations s ON d.spec_id = s.spec_id
+GROUP BY d.doctor_id, d.name, s.spec_name
+"""
+
+RAW_TRENDS = """
+SELECT a.appointment_date AS apt_date, COUNT(*) AS total,
+       SUM(CASE WHEN a.urgency_level >= 8 THEN 1 ELSE 0 END) AS high,
+       SUM(CASE WHEN a.urgency_level BETWEEN 4 AND 7 THEN 1 ELSE 0 END) AS medium,
+       SUM(CASE WHEN a.urgency_level < 4 THEN 1 ELSE 0 END) AS low
+FROM appointments a
+{where}
+GROUP BY a.appointment_date
+"""
+
+RAW_URGENCY = """
+SELECT a.urgency_level, COUNT(*) AS count
+FROM appointments a
+{where}
+GROUP BY a.urgency_level
+"""
+
+RAW_DEMAND = """
+SELECT s.spec_name AS specialization, COUNT(a.appointment_id) AS appointment_count,
+       ROUND(AVG(a.urgency_level), 1) AS avg_urgency
+FROM specializations s
+LEFT JOIN doctors d ON s.spec_id = d.spec_id
+LEFT JOIN appointments a ON d.doctor_id = a.doctor_id {on_range}
+GROUP BY s.spec_id, s.spec_name
+HAVING appointment_count > 0
+"""
+
+
+def raw(query, date_from, date_to, days=None):
+    condition, params = date_range_condition('a.appointment_date', date_from, date_to)
+    if days is not None:
+        condition, params = "a.appointment_date >= CURDATE() - INTERVAL %s DAY", [days]
+    query = query.format(where=f"WHERE {condition}" if condition else "",
+                         on_range=f"AND {condition}" if condition else "")
+    return execute_query(query, tuple(params), fetch=True) or []
+
+
+def normalized(rows):
+    """Order-insensitive comparable form (ties in ORDER BY ... DESC may come back in any order)"""
+    return sorted(tuple(sorted((k, float(v) if isinstance(v, Decimal) else v) for k, v in row.items()))
+                  for row in rows)
+
+
+def diff(label, rollup_rows, raw_rows):
+    got, expected = normalized(rollup_rows), normalized(raw_rows)
+    missing = [row for row in expected if row not in got]
+    extra = [row for row in got if row not in expected]
+    assert not missing and not extra, f"{label}: missing {missing[:3]} / extra {extra[:3]}"
+    print(f"   ✅ {label:<44} {len(got):>5} rows identical")
+
+
+def test_rollups():
+    print("\n" + "=" * 80)
+    print("TESTING ROLLUP-BACKED ANALYTICS AGAINST RAW QUERIES")
+    print("=" * 80)
+
+    initialize_pool()
+    closed_through = close_days()
+    assert closed_through is not None, "close_days() failed"
+    print(f"\n🗓️ Rollup closed through {closed_through}")
+
+    today = date.today()
+    ranges = {
+        "all time": (None, None),
+        "last 30 days": (today - timedelta(days=30), None),
+        "closed days only": (None, closed_through + timedelta(days=1)),
+        "straddling the watermark": (closed_through - timedelta(days=6), closed_through + timedelta(days=8)),
+        "future only": (today + timedelta(days=1), None),
+    }
+    for n, (name, (date_from, date_to)) in enumerate(ranges.items(), 1):
+        print(f"\n{n}️⃣ {name}")
+        diff("get_doctor_workload", analytics_service.get_doctor_workload(date_from, date_to),
+             raw(RAW_WORKLOAD, date_from, date_to))
+        diff("get_daily_trends", analytics_service.get_daily_trends(date_from=date_from, date_to=date_to),
+             raw(RAW_TRENDS, date_from, date_to))
+        diff("get_urgency_distribution", analytics_service.get_urgency_distribution(date_from, date_to),
+             raw(RAW_URGENCY, date_from, date_to))
+        diff("get_specialization_demand", analytics_service.get_specialization_demand(date_from, date_to),
+             raw(RAW_DEMAND, date_from, date_to))
+
+    print("\n📈 Trend chart default (last N days)")
+    for days in (14, 30):
+        diff(f"get_daily_trends({days})", analytics_service.get_daily_trends(days),
+             raw(RAW_TRENDS, None, None, days=days))
+
+    print("\n🔍 Closed days, grain by grain")
+    result = check_rollup()
+    assert result is not None, "check_rollup() failed"
+    assert not result['rows'], (f"{len(result['rows'])} drifted rows on {result['days'][:5]} "
+                                "(python -m services.analytics_rollup check --repair)")
+    print("   ✅ Every closed (day, doctor, urgency, status) count matches appointments")
+
+    print("\n" + "=" * 80)
+    print("✅ ROLLUP ANALYTICS MATCH THE RAW QUERIES")
+    print("=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    test_rollups()